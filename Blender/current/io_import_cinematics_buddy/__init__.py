@@ -16,8 +16,13 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy
-from .ops.cinematics_buddy_import import CinematicsBuddyImport
+try:
+    import bpy
+    from .ops.cinematics_buddy_import import CinematicsBuddyImport
+    from .ops.cinematics_buddy_retime import CinematicsBuddyRetime
+except ImportError:
+    # outside Blender only the bpy-independent core (processors, tracks, animation) is usable
+    pass
 
 bl_info = {
     "name": "Import: Cinematics Buddy Data (.txt)",
@@ -34,13 +39,16 @@ bl_info = {
 
 def menu_func_import(self, context):
     self.layout.operator(CinematicsBuddyImport.bl_idname, text="Cinematics Buddy Animation (.txt)")
+    self.layout.operator(CinematicsBuddyRetime.bl_idname, text="Cinematics Buddy Retime (.json)")
 
 
 def register():
     bpy.utils.register_class(CinematicsBuddyImport)
+    bpy.utils.register_class(CinematicsBuddyRetime)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
 
 
 def unregister():
     bpy.utils.unregister_class(CinematicsBuddyImport)
+    bpy.utils.unregister_class(CinematicsBuddyRetime)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional, TextIO, Tuple
+import numpy as np
+from .animation import Animation, Channel, ObjectAnimation
+from .batch import BatchBuilder, ImportSettings, get_batch_jobs
+from .compression import strip_compression_extension
+from .transforms import quaternions_to_zyx_eulers
+
+PROXIES = {
+    'CAR_PROXY_NAME': 'RL_OCTANE_PROXY',
+    'BALL_PROXY_NAME': 'RL_BALL_PROXY',
+    'STADIUM_PROXY_NAME': 'RL_STADIUM_PROXY'
+}
+
+
+# After Effects Exporter
+class AfterEffectsExporter:
+    """Writes the camera of an Animation as an After Effects script (.jsx) without going through Blender.
+
+    The camera is baked on every scene frame the way Blender evaluates its linear keys, then converted like the
+    Blender After Effects exporter does: scale pixels per Blender unit, AE's Y axis is Blender's -Z and its Z is
+    Blender's Y, orientation is the ZYX euler with the camera's 90 degree X correction, and zoom is the focal
+    length over the sensor width in comp pixels. Running the script in After Effects creates a comp holding the
+    keyed camera.
+    """
+    width: int = 1920
+    height: int = 1080
+    scale: float = 100.0
+
+    def __init__(self, width: int = 1920, height: int = 1080, scale: float = 100.0):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        return
+
+    @staticmethod
+    def get_camera(animation: Animation) -> ObjectAnimation:
+        for obj in animation.objects:
+            if obj.kind == 'camera':
+                return obj
+        raise Exception('Animation has no camera to export')
+
+    @staticmethod
+    def get_frames(animation: Animation) -> np.ndarray:
+        if animation.frame_start is None or animation.frame_end is None:
+            raise Exception('Animation has no frame range to export')
+        return np.arange(animation.frame_start, animation.frame_end + 1, dtype=np.float64)
+
+    @staticmethod
+    def get_fps(animation: Animation) -> float:
+        # a target frame rate of 0 keeps the export's
+        return animation.fps or animation.headers['framerate']
+
+    @staticmethod
+    def sample(animation: Animation, channel: Channel, frames: np.ndarray) -> np.ndarray:
+        """(N, width) values of the channel's linear keys at scene frames, held before the first and after the last."""
+        key_frames, values = channel.get_keys()
+        if animation.time_map is not None:
+            key_frames = animation.time_map.get_scene_frames(key_frames)
+        return np.stack([np.interp(frames, key_frames, values[:, index]) for index in range(channel.width)], axis=-1)
+
+    def get_positions(self, locations: np.ndarray) -> np.ndarray:
+        return np.stack((
+            locations[:, 0] * self.scale + self.width / 2.0,
+            -locations[:, 2] * self.scale + self.height / 2.0,
+            locations[:, 1] * self.scale
+        ), axis=-1)
+
+    @staticmethod
+    def get_orientations(quaternions: np.ndarray) -> np.ndarray:
+        # Blender's linear quaternion keys are normalized when evaluated, quaternions_to_zyx_eulers does the same
+        eulers = np.degrees(quaternions_to_zyx_eulers(quaternions))
+        # a camera of zero rotation looks down in Blender, one of zero orientation looks ahead in After Effects
+        return np.stack((eulers[:, 0] - 90.0, -eulers[:, 1], -eulers[:, 2]), axis=-1)
+
+    def get_zooms(self, lenses: np.ndarray, sensor_widths: np.ndarray) -> np.ndarray:
+        return lenses / sensor_widths * self.width
+
+    def get_camera_keys(self, animation: Animation) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(comp times in seconds, positions (N, 3), orientations (N, 3), zooms (N,)) on every scene frame."""
+        camera = self.get_camera(animation)
+        frames = self.get_frames(animation)
+        positions = self.get_positions(self.sample(animation, camera.channels['location'], frames))
+        orientations = self.get_orientations(self.sample(animation, camera.channels['rotation_quaternion'], frames))
+        sensor_widths = self.sample(animation, camera.data_channels['sensor_width'], frames)[:, 0]
+        zooms = self.get_zooms(self.sample(animation, camera.data_channels['lens'], frames)[:, 0], sensor_widths)
+        return (frames - animation.frame_start) / self.get_fps(animation), positions, orientations, zooms
+
+    @staticmethod
+    def format_values(values: np.ndarray) -> str:
+        if values.ndim == 1:
+            return '[{}]'.format(','.join('{:.6f}'.format(value) for value in values))
+        return '[{}]'.format(','.join('[{}]'.format(','.join('{:.6f}'.format(v) for v in row)) for row in values))
+
+    def write(self, animation: Animation, fp: TextIO, comp_name: str):
+        times, positions, orientations, zooms = self.get_camera_keys(animation)
+        camera = self.get_camera(animation)
+        fps = self.get_fps(animation)
+        duration = (animation.frame_end - animation.frame_start + 1) / fps
+        fp.write('// Cinematics Buddy camera: run with File > Scripts > Run Script File... in After Effects\n')
+        fp.write('(function () {\n')
+        fp.write('    app.beginUndoGroup({});\n'.format(json.dumps('Import ' + comp_name)))
+        fp.write('    var comp = app.project.items.addComp({}, {}, {}, 1.0, {:.6f}, {});\n'.format(
+            json.dumps(comp_name), self.width, self.height, duration, fps))
+        fp.write('    var camera = comp.layers.addCamera({}, [{}, {}]);\n'.format(
+            json.dumps(camera.name), self.width / 2.0, self.height / 2.0))
+        fp.write('    camera.autoOrient = AutoOrientType.NO_AUTO_ORIENT;\n')
+        fp.write('    var times = {};\n'.format(self.format_values(times)))
+        fp.write('    camera.transform.position.setValuesAtTimes(times, {});\n'.format(self.format_values(positions)))
+        fp.write('    camera.transform.orientation.setValuesAtTimes(times, {});\n'.format(
+            self.format_values(orientations)))
+        fp.write('    camera.cameraOption.zoom.setValuesAtTimes(times, {});\n'.format(self.format_values(zooms)))
+        fp.write('    comp.openInViewer();\n')
+        fp.write('    app.endUndoGroup();\n')
+        fp.write('})();\n')
+        return
+
+    def write_file(self, animation: Animation, filepath: str, comp_name: Optional[str] = None):
+        comp_name = comp_name or os.path.splitext(os.path.basename(filepath))[0]
+        with open(filepath, 'w') as fp:
+            self.write(animation, fp, comp_name)
+        return
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Write the camera of Cinematics Buddy exports as After Effects '
+                                                 'scripts (.jsx) without Blender.')
+    parser.add_argument('exports', nargs='+', help='animation exports, each with an optional snapshot .json beside it')
+    parser.add_argument('--output-dir', help='where to write the scripts (default: next to each export)')
+    parser.add_argument('--fps', type=int, default=60, help='comp frame rate (0 uses the export\'s)')
+    parser.add_argument('--vid-speed', type=float, default=1.0, help='video speed the snapshots were recorded at')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--scale', type=float, default=100.0, help='comp pixels per Blender unit')
+    parser.add_argument('--sensor-width', type=float, default=35.0)
+    parser.add_argument('--workers', type=int, default=0, help='exports built at once (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    settings = ImportSettings(PROXIES, 1 / 100.0, False, 0, 999999999, args.fps, args.vid_speed, args.sensor_width,
+                              False, False, 1, True)
+    settings.set_objects(['CAM'])
+    exporter = AfterEffectsExporter(args.width, args.height, args.scale)
+    jobs = get_batch_jobs(args.exports)
+    builder = BatchBuilder(settings, args.workers)
+    for (filepath, snapshot_filename), (animation, report) in zip(jobs, builder.build(jobs)):
+        name = os.path.splitext(os.path.basename(strip_compression_extension(filepath)))[0]
+        output = os.path.join(args.output_dir or os.path.dirname(os.path.abspath(filepath)), name + '.jsx')
+        exporter.write_file(animation, output, name)
+        print('Wrote {}'.format(output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
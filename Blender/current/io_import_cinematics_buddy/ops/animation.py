@@ -0,0 +1,159 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .retiming import TimeMap
+
+
+# Channel
+class Channel:
+    """Keys of a (possibly multi-component) animated property.
+
+    Keys are kept in preallocated NumPy arrays in the order they were added; get_keys() returns them the way
+    Blender would store them after inserting them one by one.
+    """
+    # keyframe_insert() overwrites the value of an existing key closer than this many frames
+    threshold: float = 0.01
+    count: int = 0
+
+    def __init__(self, data_path: str, width: int = 1, group: str = None, capacity: int = 0):
+        self.data_path = data_path
+        self.width = width
+        self.group = group
+        self.frames = np.empty(max(capacity, 1), dtype=np.float64)
+        self.values = np.empty((max(capacity, 1), width), dtype=np.float64)
+        self.count = 0
+        return
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, frame: float, values: tuple):
+        self.extend(np.array([frame]), np.array([values]))
+        return
+
+    def extend(self, frames: np.ndarray, values: np.ndarray):
+        """Append keys; values is (N, width) or broadcastable to it."""
+        count = self.count + len(frames)
+        if count > len(self.frames):
+            capacity = max(count, len(self.frames) * 2)
+            self.frames = np.resize(self.frames, capacity)
+            self.values = np.resize(self.values, (capacity, self.width))
+        self.frames[self.count:count] = frames
+        self.values[self.count:count] = values
+        self.count = count
+        return
+
+    def get_added_keys(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Keys in the order they were added."""
+        return self.frames[:self.count], self.values[:self.count]
+
+    def get_keys(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Keys sorted by frame, merged the way successive keyframe_insert() calls would merge them."""
+        order = np.argsort(self.frames[:self.count], kind='stable')
+        frames = self.frames[order]
+        values = self.values[order]
+        if self.count < 2 or np.min(np.diff(frames)) >= self.threshold:
+            return frames, values
+
+        keep = [0]
+        for index in range(1, self.count):
+            if frames[index] - frames[keep[-1]] < self.threshold:
+                values[keep[-1]] = values[index]
+            else:
+                keep.append(index)
+        return frames[keep], values[keep]
+
+    def set_keys(self, frames: np.ndarray, values: np.ndarray):
+        """Replace the keys."""
+        self.frames = frames
+        self.values = values
+        self.count = len(frames)
+        return
+
+    def keep_keys(self, keep: np.ndarray):
+        """Replace the keys by the keys of get_keys() at indices keep."""
+        frames, values = self.get_keys()
+        self.set_keys(frames[keep], values[keep])
+        return
+
+    def take_preview(self, step: int, rest: bool = False) -> 'Channel':
+        """A channel of every step-th key of get_keys() and the last one, or with rest of the keys in between.
+
+        Keys of get_keys() are far enough apart not to merge, so writing both parts gives the same keys as writing
+        them all at once.
+        """
+        frames, values = self.get_keys()
+        preview = np.zeros(len(frames), dtype=bool)
+        preview[::step] = True
+        preview[-1:] = True
+        keep = ~preview if rest else preview
+        channel = Channel(self.data_path, self.width, self.group)
+        channel.set_keys(frames[keep], values[keep])
+        return channel
+
+
+# Object Animation
+class ObjectAnimation:
+    """Animated channels of one imported object.
+
+    channels hold the object's own properties (location, rotation_quaternion), data_channels those of its
+    object data (the camera's lens, sensor_width and cb_frame).
+    """
+    kind: str = 'object'
+    highest_subframe: float = 0.0
+
+    def __init__(self, prefix: str, name: str, color=(1, 1, 1, 1)):
+        self.prefix = prefix
+        self.name = name
+        self.color = color
+        self.channels: Dict[str, Channel] = {}
+        self.data_channels: Dict[str, Channel] = {}
+        self.decimation_report: Dict[str, tuple] = {}
+        return
+
+    def get_key_count(self) -> int:
+        return sum(len(channel) for channel in list(self.channels.values()) + list(self.data_channels.values()))
+
+
+# Car Animation
+class CarAnimation(ObjectAnimation):
+    kind = 'car'
+
+
+# Ball Animation
+class BallAnimation(ObjectAnimation):
+    kind = 'ball'
+
+
+# Camera Animation
+class CameraAnimation(ObjectAnimation):
+    kind = 'camera'
+    sensor_width: float = 35.0
+
+    def __init__(self, prefix: str, name: str, sensor_width: float):
+        super().__init__(prefix, name)
+        self.sensor_width = sensor_width
+        return
+
+
+# Animation
+class Animation:
+    """Everything an import produces, independent of Blender: per object channels plus scene settings.
+
+    With a time_map the channels are keyed on replay time and the time map takes them to scene frames.
+    """
+    fps: int = 0
+    frame_start: Optional[int] = None
+    frame_end: Optional[int] = None
+    time_map: Optional[TimeMap] = None
+    action_frame_end: float = 0.0
+
+    def __init__(self, headers: dict, objects: List[ObjectAnimation]):
+        self.headers = headers
+        self.objects = objects
+        return
+
+    def get_object(self, prefix: str) -> Optional[ObjectAnimation]:
+        for obj in self.objects:
+            if obj.prefix == prefix:
+                return obj
+        return None
@@ -0,0 +1,173 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import multiprocessing
+import os
+from typing import Iterator, List, Optional, Tuple
+from .animation import Animation
+from .cache import ParseCache
+from .compression import strip_compression_extension
+from .processors import FileProcessor, LinesProcessor, SegmentsProcessor, consts
+
+
+# Import Settings
+class ImportSettings:
+    """Everything but the files that decides how an export is built; picklable, so it can go to a worker."""
+    parse_cache_size: int = 0
+    resample: bool = False
+    location_tolerance: float = 0.0
+    rotation_tolerance: float = 0.0
+    objects: Optional[List[str]] = None
+    time_remap: bool = False
+    lossless: bool = False
+
+    def __init__(
+            self,
+            proxies: dict,
+            unit_scale: float,
+            include_frame_nums: bool,
+            replay_frame_start: int,
+            replay_frame_end: int,
+            target_fps: float,
+            vid_speed: float,
+            sensor_width: float,
+            maintain_sensor_focal_ratio: bool,
+            print_progress: bool,
+            blender_start_frame: int,
+            bulk_keyframes: bool
+    ):
+        self.proxies = proxies
+        self.unit_scale = unit_scale
+        self.include_frame_nums = include_frame_nums
+        self.replay_frame_start = replay_frame_start
+        self.replay_frame_end = replay_frame_end
+        self.target_fps = target_fps
+        self.vid_speed = vid_speed
+        self.sensor_width = sensor_width
+        self.maintain_sensor_focal_ratio = maintain_sensor_focal_ratio
+        self.print_progress = print_progress
+        self.blender_start_frame = blender_start_frame
+        self.bulk_keyframes = bulk_keyframes
+        return
+
+    def set_parse_cache_size(self, parse_cache_size: int):
+        self.parse_cache_size = parse_cache_size
+
+    def set_resample(self, resample: bool):
+        self.resample = resample
+
+    def set_decimation(self, location_tolerance: float, rotation_tolerance: float):
+        self.location_tolerance = location_tolerance
+        self.rotation_tolerance = rotation_tolerance
+
+    def set_objects(self, objects: Optional[List[str]]):
+        self.objects = objects
+
+    def set_time_remap(self, time_remap: bool):
+        self.time_remap = time_remap
+
+    def set_lossless(self, lossless: bool):
+        self.lossless = lossless
+
+    def get_fingerprint(self, filepath: str, snapshot_filename: str = '') -> str:
+        """Hash of the files and of the settings the car and ball keys depend on.
+
+        Imports with the same fingerprint key the same car and ball actions, only moved by the difference of their
+        blender_start_frame; with time remap that has to match too. Files are told apart by path, size and mtime.
+        """
+        files = []
+        for path in [filepath, snapshot_filename]:
+            if path:
+                stat = os.stat(path)
+                files.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+        keyed = [self.unit_scale, self.replay_frame_start, self.replay_frame_end, self.target_fps, self.vid_speed,
+                 self.bulk_keyframes, self.resample, self.location_tolerance, self.rotation_tolerance, self.lossless,
+                 self.time_remap, self.blender_start_frame if self.time_remap else None]
+        return hashlib.sha1(json.dumps([files, keyed]).encode()).hexdigest()
+
+    def get_consts(self) -> dict:
+        """The constants a processor built with these settings keys with, proxy names included."""
+        return dict(consts, **self.proxies)
+
+    def create_processor(self, filepath: str, snapshot_filename: str = '', scn=None) -> FileProcessor:
+        """A LinesProcessor, or a SegmentsProcessor if a snapshot file is given, set up for filepath."""
+        use_segments = True if snapshot_filename else False
+        processor_class = SegmentsProcessor if use_segments else LinesProcessor
+        processor = processor_class(
+            filepath,
+            self.proxies,
+            self.unit_scale,
+            self.include_frame_nums,
+            0 if use_segments else self.replay_frame_start,
+            999999999 if use_segments else self.replay_frame_end,
+            self.target_fps,
+            scn,
+            self.vid_speed,
+            self.sensor_width,
+            self.maintain_sensor_focal_ratio,
+            self.print_progress,
+            self.blender_start_frame,
+            self.bulk_keyframes
+        )
+        if use_segments:
+            processor.set_snapshot_file(snapshot_filename)
+            processor.set_time_remap(self.time_remap)
+        if self.parse_cache_size:
+            processor.set_parse_cache(ParseCache(max_size=self.parse_cache_size))
+        processor.set_resample(self.resample)
+        processor.set_decimation(self.location_tolerance, self.rotation_tolerance)
+        processor.set_lossless(self.lossless)
+        processor.set_objects(self.objects)
+        return processor
+
+
+def get_batch_jobs(filepaths: List[str]) -> List[Tuple[str, str]]:
+    """Pair every export with the snapshot file next to it, if there is one."""
+    jobs = []
+    for filepath in filepaths:
+        snapshot_filename = os.path.splitext(strip_compression_extension(filepath))[0] + '.json'
+        jobs.append((filepath, snapshot_filename if os.path.isfile(snapshot_filename) else ''))
+    return jobs
+
+
+def build_job(job: Tuple[str, str, ImportSettings]) -> Tuple[Animation, dict]:
+    """Build one export without Blender; runs in the worker processes of a BatchBuilder."""
+    filepath, snapshot_filename, settings = job
+    processor = settings.create_processor(filepath, snapshot_filename)
+    animation = processor.build()
+    return animation, processor.instrumentation.get_report()
+
+
+# Batch Builder
+class BatchBuilder:
+    """Builds the animations of many exports concurrently in a pool of processes.
+
+    Jobs are (export path, snapshot path or '') pairs. Results come back in job order as (animation, timing
+    report) pairs, ready to be written into Blender one by one.
+    """
+    max_workers: int = 0
+    executable: Optional[str] = None
+
+    def __init__(self, settings: ImportSettings, max_workers: int = 0):
+        self.settings = settings
+        self.max_workers = max_workers or os.cpu_count() or 1
+        return
+
+    def set_executable(self, executable: Optional[str]):
+        """Python interpreter for the worker processes (inside Blender sys.executable is Blender itself)."""
+        self.executable = executable
+
+    def build(self, jobs: List[Tuple[str, str]]) -> Iterator[Tuple[Animation, dict]]:
+        job_settings = [(filepath, snapshot_filename, self.settings) for filepath, snapshot_filename in jobs]
+        workers = min(self.max_workers, len(jobs))
+        if workers <= 1:
+            for job in job_settings:
+                yield build_job(job)
+            return
+
+        context = multiprocessing.get_context('spawn')
+        if self.executable:
+            context.set_executable(self.executable)
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            yield from executor.map(build_job, job_settings)
+        return
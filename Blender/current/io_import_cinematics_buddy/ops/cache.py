@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from typing import Dict, Optional, Tuple
+from .parsers import ExportData
+
+
+CACHE_VERSION = 1
+INDEX_FILENAME = 'index.json'
+
+
+def get_default_cache_dir() -> str:
+    if os.name == 'nt' and os.environ.get('LOCALAPPDATA'):
+        base = os.environ['LOCALAPPDATA']
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'cinematics_buddy')
+
+
+# Parse Cache
+class ParseCache:
+    """On-disk cache of parsed exports (header dict and column arrays) stored as compressed .npz files.
+
+    Entries are named by a hash of the export's content. An index maps each export path to the size, mtime and
+    content hash it had when cached, so an unchanged file is looked up without being read; a file whose size or
+    mtime changed is re-hashed, which still hits when only its timestamp (or its location) changed. Least recently
+    used entries are evicted once the cache grows past max_size bytes.
+
+    An export can have several entries, one per variant: a name for the part of it that was decoded (e.g. the
+    selected objects). load() returns the key it looked the export up by, which save() takes so a miss does not
+    hash the file a second time.
+    """
+    directory: str = None
+    max_size: int = 0
+
+    def __init__(self, directory: str = None, max_size: int = 1024 * 1024 * 1024):
+        self.directory = directory or get_default_cache_dir()
+        self.max_size = max_size
+        return
+
+    @staticmethod
+    def get_content_hash(filepath: str) -> str:
+        content_hash = hashlib.sha1()
+        content_hash.update('v{}'.format(CACHE_VERSION).encode())
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    def get_entry_path(self, content_hash: str, variant: str = '') -> str:
+        return os.path.join(self.directory, content_hash + ('-' + variant if variant else '') + '.npz')
+
+    def read_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILENAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_index(self, index: Dict[str, dict]):
+        self.replace_file(os.path.join(self.directory, INDEX_FILENAME), lambda f: f.write(json.dumps(index).encode()))
+
+    def replace_file(self, path: str, write):
+        # write to a temporary file first so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return
+
+    def get_key(self, filepath: str, index: Dict[str, dict]) -> Tuple[str, dict]:
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        entry = index.get(path)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': self.get_content_hash(path)}
+        return path, entry
+
+    def load(self, filepath: str, variant: str = '') -> Tuple[Tuple[str, dict], Optional[Tuple[dict, ExportData]]]:
+        """The export's key and its cached (headers, data), or None for the latter on a miss."""
+        index = self.read_index()
+        key = self.get_key(filepath, index)
+        path, entry = key
+        entry_path = self.get_entry_path(entry['hash'], variant)
+        try:
+            with np.load(entry_path) as npz:
+                headers = json.loads(str(npz['headers']))
+                prefixes = json.loads(str(npz['prefixes']))
+                data = ExportData(
+                    npz['frame'],
+                    npz['replay_frame'],
+                    npz['fov'],
+                    {prefix: npz['loc_' + prefix] for prefix in prefixes},
+                    {prefix: npz['quat_' + prefix] for prefix in prefixes},
+                    bool(npz['ended'])
+                )
+        except (OSError, KeyError, ValueError):
+            return key, None
+
+        # mark as recently used for eviction
+        os.utime(entry_path)
+        if index.get(path) != entry:
+            index[path] = entry
+            self.write_index(index)
+        return key, (headers, data)
+
+    def save(self, filepath: str, headers: dict, data: ExportData, key: Optional[Tuple[str, dict]] = None,
+             variant: str = ''):
+        """Cache headers and data for filepath; key is the one load() returned, to skip hashing the file again."""
+        os.makedirs(self.directory, exist_ok=True)
+        index = self.read_index()
+        path, entry = key or self.get_key(filepath, index)
+
+        arrays = {
+            'headers': np.array(json.dumps(headers)),
+            'prefixes': np.array(json.dumps(list(data.locations.keys()))),
+            'frame': data.frame,
+            'replay_frame': data.replay_frame,
+            'fov': data.fov,
+            'ended': np.array(data.ended),
+        }
+        for prefix in data.locations.keys():
+            arrays['loc_' + prefix] = data.locations[prefix]
+            arrays['quat_' + prefix] = data.quaternions[prefix]
+        entry_path = self.get_entry_path(entry['hash'], variant)
+        self.replace_file(entry_path, lambda f: np.savez_compressed(f, **arrays))
+
+        index[path] = entry
+        self.write_index(index)
+        self.evict(os.path.basename(entry_path))
+        return
+
+    def evict(self, keep_filename: str = None):
+        entries = []
+        total_size = 0
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.npz'):
+                continue
+            stat = os.stat(os.path.join(self.directory, filename))
+            entries.append((stat.st_mtime, stat.st_size, filename))
+            total_size += stat.st_size
+
+        removed = False
+        kept = set()
+        for mtime, size, filename in sorted(entries):
+            if total_size > self.max_size and filename != keep_filename:
+                os.remove(os.path.join(self.directory, filename))
+                removed = True
+                total_size -= size
+            else:
+                kept.add(filename[:-len('.npz')].split('-')[0])
+
+        if removed:
+            # forget the exports none of whose variants are left
+            index = self.read_index()
+            self.write_index({path: entry for path, entry in index.items() if entry['hash'] in kept})
+        return
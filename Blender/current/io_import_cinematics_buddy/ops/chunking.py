@@ -0,0 +1,215 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+from itertools import islice
+import multiprocessing
+import os
+import numpy as np
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from .parsers import ColumnarParser, ExportData
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python 3.7 (Blender 2.80 to 2.92): parsed chunks come back pickled
+    shared_memory = None
+
+
+def get_line_ranges(fp: BinaryIO, data_start: int, data_end: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split the bytes from data_start to data_end into ranges of about chunk_size bytes, each a run of whole
+    lines."""
+    ranges = []
+    start = data_start
+    while start < data_end:
+        end = start + chunk_size
+        if end < data_end:
+            # move the end past the line break ending the line it falls in
+            fp.seek(end - 1)
+            fp.readline()
+            end = fp.tell()
+        end = min(end, data_end)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def read_range(filepath: str, start: int, end: int) -> str:
+    """The text of bytes start to end of filepath, decoded like open(filepath) would (universal newlines)."""
+    with open(filepath, 'rb') as fp:
+        fp.seek(start)
+        raw = fp.read(end - start)
+    return io.TextIOWrapper(io.BytesIO(raw)).read()
+
+
+def get_pattern_line(filepath: str, data_start: int) -> str:
+    """The data line ColumnarParser.reduce_text() takes the tab layout from: the first one that is not empty."""
+    with open(filepath) as fp:
+        fp.seek(data_start)
+        for line in fp:
+            if line == '\n':
+                continue
+            return '' if line.startswith('END') else line
+    return ''
+
+
+def create_parser(consts: dict, prefixes: Optional[List[str]], pattern_line: str) -> ColumnarParser:
+    parser = ColumnarParser(consts, prefixes)
+    if parser.reduce and pattern_line:
+        parser.set_pattern(pattern_line)
+    return parser
+
+
+def get_arrays(data: ExportData, prefixes: List[str]) -> List[np.ndarray]:
+    arrays = [data.frame, data.replay_frame, data.fov]
+    for prefix in prefixes:
+        arrays += [data.locations[prefix], data.quaternions[prefix]]
+    return arrays
+
+
+def from_arrays(arrays: List[np.ndarray], prefixes: List[str], ended: bool) -> ExportData:
+    locations = {prefix: arrays[3 + 2 * index] for index, prefix in enumerate(prefixes)}
+    quaternions = {prefix: arrays[4 + 2 * index] for index, prefix in enumerate(prefixes)}
+    return ExportData(arrays[0], arrays[1], arrays[2], locations, quaternions, ended)
+
+
+def parse_range(job: tuple) -> tuple:
+    """Parse one range of lines; runs in the worker processes of a ChunkedParser.
+
+    Returns (line breaks in the range, ended, arrays), where arrays is the name and layout of a shared memory
+    block holding the parsed arrays, or the arrays themselves without shared memory.
+    """
+    filepath, start, end, consts, prefixes, pattern_line, use_shared_memory = job
+    text = read_range(filepath, start, end)
+    parser = create_parser(consts, prefixes, pattern_line)
+    data = parser.parse_text(text)
+    arrays = get_arrays(data, parser.prefixes)
+    if not use_shared_memory:
+        return text.count('\n'), data.ended, arrays
+
+    block = shared_memory.SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays), 1))
+    layout = []
+    offset = 0
+    for array in arrays:
+        np.ndarray(array.shape, array.dtype, block.buf, offset)[...] = array
+        layout.append((array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    block.close()
+    return text.count('\n'), data.ended, (block.name, layout)
+
+
+def load_arrays(arrays, use_shared_memory: bool) -> List[np.ndarray]:
+    """The arrays a parse_range() result holds, removing its shared memory block."""
+    if not use_shared_memory:
+        return arrays
+    name, layout = arrays
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return [np.ndarray(shape, np.dtype(dtype), block.buf, offset).copy() for dtype, shape, offset in layout]
+    finally:
+        block.close()
+        block.unlink()
+
+
+# Chunked Parser
+class ChunkedParser:
+    """Parses the data section of an uncompressed export in a pool of processes.
+
+    The section is split into line-aligned byte ranges that the workers parse with a ColumnarParser of their own,
+    decoding lines exactly like the single process parser does (with the line layout taken from the first data
+    line). Parsed arrays come back through shared memory where available and are returned in file order, up to
+    the chunk holding the END line. A chunk that fails to parse is parsed again in this process, so a malformed
+    line is reported with the same line number as without the pool. At most chunks_per_worker chunks per worker
+    are parsed ahead of the one being taken.
+    """
+    workers: int = 0
+    chunk_size: int = 32 * 1024 * 1024
+    executable: Optional[str] = None
+    # chunks submitted ahead per worker
+    chunks_per_worker: int = 2
+    use_shared_memory: bool = shared_memory is not None
+
+    def __init__(self, consts: dict, prefixes: Optional[List[str]], workers: int = 0,
+                 chunk_size: int = 32 * 1024 * 1024):
+        self.consts = consts
+        self.prefixes = prefixes
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        return
+
+    def set_executable(self, executable: Optional[str]):
+        """Python interpreter for the worker processes (inside Blender sys.executable is Blender itself)."""
+        self.executable = executable
+
+    def get_ranges(self, fp: BinaryIO, data_start: int, data_end: int) -> List[Tuple[int, int]]:
+        # at least chunk_size bytes per chunk, but enough chunks to keep every worker busy
+        chunk_size = max(self.chunk_size, -(-(data_end - data_start) // (self.workers * 4)))
+        return get_line_ranges(fp, data_start, data_end, chunk_size)
+
+    def parse(self, filepath: str, data_start: int) -> Iterator[ExportData]:
+        """Yield the parsed chunks of filepath's lines from byte data_start on, in order."""
+        with open(filepath, 'rb') as fp:
+            data_end = fp.seek(0, 2)
+            ranges = self.get_ranges(fp, data_start, data_end)
+        pattern_line = get_pattern_line(filepath, data_start)
+        jobs = [(filepath, start, end, self.consts, self.prefixes, pattern_line, self.use_shared_memory)
+                for start, end in ranges]
+        if len(jobs) < 2 or self.workers < 2:
+            # not worth starting processes for
+            first_line = 1
+            for job in jobs:
+                line_breaks, data = self.parse_here(job, first_line)
+                first_line += line_breaks
+                yield data
+                if data.ended:
+                    return
+            return
+
+        prefixes = ColumnarParser(self.consts, self.prefixes).prefixes
+        context = multiprocessing.get_context('spawn')
+        if self.executable:
+            context.set_executable(self.executable)
+        workers = min(self.workers, len(jobs))
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            # a few chunks per worker in flight, so parsed chunks waiting to be taken stay bounded
+            queued = iter(jobs)
+            pending = [executor.submit(parse_range, job) for job in islice(queued, workers * self.chunks_per_worker)]
+            try:
+                first_line = 1
+                for job in jobs:
+                    future = pending.pop(0)
+                    for next_job in islice(queued, 1):
+                        pending.append(executor.submit(parse_range, next_job))
+                    try:
+                        line_breaks, ended, arrays = future.result()
+                        data = from_arrays(load_arrays(arrays, self.use_shared_memory), prefixes, ended)
+                    except Exception:
+                        # e.g. a malformed line, raised again here with its line number in the whole section
+                        line_breaks, data = self.parse_here(job, first_line)
+                    first_line += line_breaks
+                    yield data
+                    if data.ended:
+                        return
+            finally:
+                self.release(pending)
+        return
+
+    @staticmethod
+    def parse_here(job: tuple, first_line: int) -> Tuple[int, ExportData]:
+        """Parse a chunk in this process; returns the line breaks in the chunk and its data."""
+        filepath, start, end, consts, prefixes, pattern_line = job[:6]
+        text = read_range(filepath, start, end)
+        return text.count('\n'), create_parser(consts, prefixes, pattern_line).parse_text(text, first_line)
+
+    def release(self, pending: List[Future]):
+        """Drop the results not taken (past the END line, or after a close), freeing their shared memory."""
+        for future in pending:
+            if not self.use_shared_memory:
+                # Python 3.7: a pool shut down with cancelled chunks can hang, so these are parsed and dropped
+                continue
+            if future.cancel():
+                continue
+            try:
+                line_breaks, ended, arrays = future.result()
+                load_arrays(arrays, True)
+            except Exception:
+                continue
+        return
@@ -1,10 +1,16 @@
 import bpy
-from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
-from bpy.types import Operator
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
+from bpy.types import Operator, OperatorFileListElement
 from bpy_extras.io_utils import ImportHelper
-from importlib import import_module
-from typing import Union
-from .processors import FileProcessor, LinesProcessor, SegmentsProcessor
+from math import radians
+import os
+from typing import Generator, List, Optional, Tuple, Union
+from .batch import BatchBuilder, ImportSettings, get_batch_jobs
+from .compression import strip_compression_extension
+from .instrumentation import Instrumentation
+from .keyframers import AnimationWriter, ImportRollback, Preview, SharedActions
+from .processors import LinesProcessor, SegmentsProcessor
+from .stepping import StepEngine, run_steps
 
 
 class CinematicsBuddyImport(Operator, ImportHelper):
@@ -12,8 +18,21 @@ class CinematicsBuddyImport(Operator, ImportHelper):
     bl_idname = "import.cinematics_buddy_data"
     bl_label = "Import Cinematics Buddy Animation"
     filename_ext = ".txt"
+    # seconds of import work per timer event when importing in steps
+    step_time_budget = 0.05
+    stages = ['parse', 'write']
+    preview_stages = ['parse', 'preview', 'refine']
+    stages_text = {'parse': 'reading export', 'write': 'writing keyframes', 'preview': 'keying preview',
+                   'refine': 'refining preview'}
+    engine: StepEngine = None
+    timer = None
+    preview: Optional[Preview] = None
 
-    filter_glob: StringProperty(default="*.txt", options={'HIDDEN'})
+    filter_glob: StringProperty(default="*.txt;*.txt.gz;*.txt.xz;*.txt.bz2", options={'HIDDEN'})
+
+    files: CollectionProperty(type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
+
+    directory: StringProperty(subtype='DIR_PATH', options={'HIDDEN', 'SKIP_SAVE'})
 
     replay_frame_start: IntProperty(
         name="Replay Frame Start",
@@ -103,6 +122,164 @@ class CinematicsBuddyImport(Operator, ImportHelper):
         default=False
     )
 
+    bulk_keyframes: BoolProperty(
+        name="Bulk Keyframes",
+        description="Write all keyframes of each F-curve in one go (much faster than inserting them one at a "
+                    "time)",
+        default=True
+    )
+
+    use_parse_cache: BoolProperty(
+        name="Cache Parsed Export",
+        description="Keep a parsed copy of the objects imported from the export on disk, so importing them again "
+                    "(e.g. with a different frame range, video speed or snapshot file) skips parsing",
+        default=True
+    )
+
+    parse_cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used parsed exports are removed once the cache grows past this size",
+        default=1024,
+        min=1
+    )
+
+    resample: BoolProperty(
+        name="Resample to Target Frames",
+        description="Key every object on whole frames at the target frame rate instead of on the recorded "
+                    "subframes",
+        default=False
+    )
+
+    time_remap: BoolProperty(
+        name="Time Remap",
+        description="Key objects on replay time and play them through NLA strips timed by the snapshot file, so "
+                    "the video speed or snapshot file can be changed later with Retime. Ignored when snapshot file "
+                    "isn't used",
+        default=False
+    )
+
+    follow: BoolProperty(
+        name="Follow Export Being Written",
+        description="Start importing while Cinematics Buddy is still writing the export and finish when it writes "
+                    "its END line. Keyframes are inserted as lines are read, so Bulk Keyframes, Resample, Decimate, "
+                    "Drop Redundant Keyframes and Preview are not used; the import always runs in steps",
+        default=False
+    )
+
+    follow_timeout: FloatProperty(
+        name="Follow Timeout (s)",
+        description="Give up when the export being followed has not grown for this long",
+        default=60.0,
+        min=1.0
+    )
+
+    lossless: BoolProperty(
+        name="Drop Redundant Keyframes",
+        description="Drop keyframes the animation evaluates to exactly without them: constant runs (unused "
+                    "cars, a steady field of view) and keyframes on a straight line between their neighbours",
+        default=False
+    )
+
+    decimate: BoolProperty(
+        name="Decimate Keyframes",
+        description="Drop keyframes that linear interpolation reproduces within the tolerances below",
+        default=False
+    )
+
+    location_tolerance: FloatProperty(
+        name="Location Tolerance",
+        description="Largest distance an object may deviate from its recorded location",
+        default=0.005,
+        min=0.0,
+        subtype='DISTANCE'
+    )
+
+    rotation_tolerance: FloatProperty(
+        name="Rotation Tolerance",
+        description="Largest angle an object may deviate from its recorded rotation",
+        default=radians(0.1),
+        min=0.0,
+        subtype='ANGLE'
+    )
+
+    import_objects: EnumProperty(
+        items=[
+            ("CAM", "Camera", ""),
+            ("BALL", "Ball", ""),
+            ("CAR1", "Car 1", ""),
+            ("CAR2", "Car 2", ""),
+            ("CAR3", "Car 3", ""),
+            ("CAR4", "Car 4", ""),
+            ("CAR5", "Car 5", ""),
+            ("CAR6", "Car 6", ""),
+            ("CAR7", "Car 7", ""),
+            ("CAR8", "Car 8", ""),
+        ],
+        name="Objects",
+        description="Objects to import; the columns of the others are skipped while reading the export",
+        default={"CAM", "BALL", "CAR1", "CAR2", "CAR3", "CAR4", "CAR5", "CAR6", "CAR7", "CAR8"},
+        options={'ENUM_FLAG'}
+    )
+
+    batch_workers: IntProperty(
+        name="Batch Processes",
+        description="When several exports are selected, parse this many at once, each into its own scene; the "
+                    "snapshot file next to an export with the same name is used for it (0 uses every CPU)",
+        default=0,
+        min=0
+    )
+
+    step_import: BoolProperty(
+        name="Keep Blender Responsive",
+        description="Import in short steps between interface updates, with progress in the status bar; Esc "
+                    "cancels the import and removes everything it added",
+        default=True
+    )
+
+    threaded_build: BoolProperty(
+        name="Read in Background",
+        description="Read and convert the export on a background thread while keyframes are written; in insert "
+                    "mode without decimation, resampling or dropped keyframes, keys are written as they are read",
+        default=True
+    )
+
+    parse_workers: IntProperty(
+        name="Parse Processes",
+        description="Split exports with over 32 MB of data lines into chunks parsed this many at once in "
+                    "separate processes (0 uses every CPU, 1 parses in Blender)",
+        default=0,
+        min=0
+    )
+
+    share_actions: BoolProperty(
+        name="Share Car and Ball Actions",
+        description="When this export was imported before with the same settings, play the cars and ball of that "
+                    "import instead of keying them again, moved to this start frame; editing their keys changes "
+                    "every scene that shares them",
+        default=True
+    )
+
+    preview_step: IntProperty(
+        name="Preview Every Nth Key",
+        description="Key every Nth frame of each object first, so the scene can be played early, then the frames "
+                    "in between; Esc while refining keeps the preview (1 keys every frame at once)",
+        default=1,
+        min=1
+    )
+
+    refine_preview: BoolProperty(
+        name="Refine Preview",
+        description="Fill in the frames the preview left out; off stops at the preview",
+        default=True
+    )
+
+    report_filename: StringProperty(
+        name="Timing Report",
+        description="Write stage timings, line counts and keys written per object to this JSON file (optional)",
+        default='',
+        subtype='FILE_PATH'
+    )
+
     def draw(self, context):
         layout = self.layout
         box = layout.box()
@@ -115,6 +292,30 @@ class CinematicsBuddyImport(Operator, ImportHelper):
         sub_box.label(text='Advanced:')
         sub_box.prop(self, 'blender_start_frame')
         sub_box.prop(self, 'sensor_width')
+        sub_box.prop(self, 'bulk_keyframes')
+        sub_box.prop(self, 'use_parse_cache')
+        sub_box.prop(self, 'parse_cache_size')
+        sub_box.prop(self, 'resample')
+        sub_box.prop(self, 'time_remap')
+        sub_box.prop(self, 'follow')
+        if self.follow:
+            sub_box.prop(self, 'follow_timeout')
+        sub_box.prop(self, 'lossless')
+        sub_box.prop(self, 'decimate')
+        if self.decimate:
+            sub_box.prop(self, 'location_tolerance')
+            sub_box.prop(self, 'rotation_tolerance')
+        sub_box.label(text='Objects:')
+        sub_box.prop(self, 'import_objects')
+        sub_box.prop(self, 'batch_workers')
+        sub_box.prop(self, 'step_import')
+        sub_box.prop(self, 'threaded_build')
+        sub_box.prop(self, 'parse_workers')
+        sub_box.prop(self, 'share_actions')
+        sub_box.prop(self, 'preview_step')
+        if self.preview_step > 1:
+            sub_box.prop(self, 'refine_preview')
+        sub_box.prop(self, 'report_filename')
         # sub_box.prop(self, 'car_proxy_name')
         # sub_box.prop(self, 'ball_proxy_name')
         # sub_box.prop(self, 'stadium_proxy_name')
@@ -125,8 +326,12 @@ class CinematicsBuddyImport(Operator, ImportHelper):
         # box.prop(self, 'replay_frame_start')
         # box.prop(self, 'replay_frame_end')
 
+    def get_batch_jobs(self) -> List[Tuple[str, str]]:
+        return get_batch_jobs([os.path.join(self.directory, file.name) for file in self.files])
+
     def execute(self, context):
-        return Importer.import_cinematics_data(
+        self.preview = Preview(self.preview_step, self.refine_preview) if self.preview_step > 1 else None
+        steps = Importer.import_cinematics_steps(
             context,
             self.filepath,
             self.replay_frame_start,
@@ -141,8 +346,85 @@ class CinematicsBuddyImport(Operator, ImportHelper):
             self.sensor_width,
             self.maintain_sensor_focal_ratio,
             self.print_progress,
-            self.blender_start_frame
+            self.blender_start_frame,
+            self.bulk_keyframes,
+            self.parse_cache_size * 1024 * 1024 if self.use_parse_cache else 0,
+            self.resample,
+            self.location_tolerance if self.decimate else 0.0,
+            self.rotation_tolerance if self.decimate else 0.0,
+            self.report_filename,
+            list(self.import_objects),
+            self.time_remap,
+            self.follow_timeout if self.follow else 0.0,
+            self.get_batch_jobs() if len(self.files) > 1 else None,
+            self.batch_workers,
+            self.lossless,
+            self.threaded_build,
+            self.parse_workers,
+            self.share_actions,
+            self.preview
         )
+        if len(self.files) > 1:
+            ignored = Importer.get_batch_ignored_options(self.threaded_build, self.parse_workers, self.share_actions,
+                                                         self.preview)
+            if ignored:
+                self.report({'INFO'}, 'Not used by batch imports: {}'.format(', '.join(ignored)))
+        elif self.follow:
+            ignored = Importer.get_follow_ignored_options(self.bulk_keyframes, self.resample, self.decimate,
+                                                          self.lossless, self.preview)
+            if ignored:
+                self.report({'INFO'}, 'Not used when following an export: {}'.format(', '.join(ignored)))
+            self.preview = None
+        # a followed export may take minutes to be written, which the interface must not freeze for
+        if not (self.step_import or self.follow) or not context.window_manager.windows:
+            run_steps(steps)
+            return {'FINISHED'}
+
+        window_manager = context.window_manager
+        self.engine = StepEngine(steps, self.step_time_budget)
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+        if self.preview is not None and len(self.files) <= 1:
+            self.stages = self.preview_stages
+        window_manager.progress_begin(0, len(self.stages))
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS' and self.engine.stage == 'refine':
+            # the preview is complete, keep it
+            self.preview.stop()
+            return {'RUNNING_MODAL'}
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # closing the steps removes what the import added so far
+            self.engine.cancel()
+            self.finish(context)
+            self.report({'WARNING'}, 'Cinematics Buddy import cancelled')
+            return {'CANCELLED'}
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {'PASS_THROUGH'}
+
+        try:
+            running = self.engine.step()
+        except Exception as error:
+            self.engine.cancel()
+            self.finish(context)
+            self.report({'ERROR'}, 'Cinematics Buddy import failed: {}'.format(error))
+            return {'CANCELLED'}
+        if not running:
+            self.finish(context)
+            return {'FINISHED'}
+        stage = self.engine.stage
+        context.window_manager.progress_update(self.stages.index(stage) + self.engine.fraction if stage else 0)
+        context.workspace.status_text_set('Cinematics Buddy: {} {:.0f}% (Esc to {})'.format(
+            self.stages_text.get(stage, 'reading'), self.engine.fraction * 100,
+            'keep the preview' if stage == 'refine' else 'cancel'))
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        return
 
 
 class Importer:
@@ -163,9 +445,109 @@ class Importer:
             sensor_width: float,
             maintain_sensor_focal_ratio: bool,
             print_progress: bool,
-            blender_start_frame: int
+            blender_start_frame: int,
+            bulk_keyframes: bool,
+            parse_cache_size: int,
+            resample: bool,
+            location_tolerance: float,
+            rotation_tolerance: float,
+            report_filename: str,
+            objects: list = None,
+            time_remap: bool = False,
+            follow_timeout: float = 0.0,
+            batch_jobs: List[Tuple[str, str]] = None,
+            batch_workers: int = 0,
+            lossless: bool = False,
+            threaded: bool = False,
+            parse_workers: int = 1,
+            share_actions: bool = False,
+            preview: Optional[Preview] = None
     ):
+        """Run the import of import_cinematics_steps() to the end."""
+        run_steps(Importer.import_cinematics_steps(
+            context,
+            filepath,
+            replay_frame_start,
+            replay_frame_end,
+            target_fps,
+            include_frame_nums,
+            car_proxy_name,
+            ball_proxy_name,
+            stadium_proxy_name,
+            snapshot_filename,
+            vid_speed,
+            sensor_width,
+            maintain_sensor_focal_ratio,
+            print_progress,
+            blender_start_frame,
+            bulk_keyframes,
+            parse_cache_size,
+            resample,
+            location_tolerance,
+            rotation_tolerance,
+            report_filename,
+            objects,
+            time_remap,
+            follow_timeout,
+            batch_jobs,
+            batch_workers,
+            lossless,
+            threaded,
+            parse_workers,
+            share_actions,
+            preview
+        ))
+        return {'FINISHED'}
+
+    @staticmethod
+    def import_cinematics_steps(
+            context,
+            filepath: str,
+            replay_frame_start: int,
+            replay_frame_end: int,
+            target_fps: float,
+            include_frame_nums: bool,
+            car_proxy_name: str,
+            ball_proxy_name: str,
+            stadium_proxy_name: str,
+            snapshot_filename: str,
+            vid_speed: float,
+            sensor_width: float,
+            maintain_sensor_focal_ratio: bool,
+            print_progress: bool,
+            blender_start_frame: int,
+            bulk_keyframes: bool,
+            parse_cache_size: int,
+            resample: bool,
+            location_tolerance: float,
+            rotation_tolerance: float,
+            report_filename: str,
+            objects: list = None,
+            time_remap: bool = False,
+            follow_timeout: float = 0.0,
+            batch_jobs: List[Tuple[str, str]] = None,
+            batch_workers: int = 0,
+            lossless: bool = False,
+            threaded: bool = False,
+            parse_workers: int = 1,
+            share_actions: bool = False,
+            preview: Optional[Preview] = None
+    ) -> Generator[Tuple[str, float], None, None]:
+        """The import as (stage, fraction) steps; closing the steps before the end, or a step raising, removes what
+        they added."""
         unit_scale = 1 / 100.0  # centimeters
+        instrumentation = Instrumentation()
+
+        follow_ignored = []
+        if follow_timeout and not batch_jobs:
+            follow_ignored = Importer.get_follow_ignored_options(bulk_keyframes, resample,
+                                                                 location_tolerance > 0.0 or rotation_tolerance > 0.0,
+                                                                 lossless, preview)
+            if follow_ignored and print_progress:
+                print('Not used when following an export: {}'.format(', '.join(follow_ignored)), flush=True)
+            bulk_keyframes = resample = lossless = False
+            location_tolerance = rotation_tolerance = 0.0
+            preview = None
 
         if include_frame_nums:
             bpy.types.Camera.cb_frame = FloatProperty(
@@ -181,7 +563,161 @@ class Importer:
             'STADIUM_PROXY_NAME': stadium_proxy_name
         }
 
+        settings = ImportSettings(
+            proxies,
+            unit_scale,
+            include_frame_nums,
+            replay_frame_start,
+            replay_frame_end,
+            target_fps,
+            vid_speed,
+            sensor_width,
+            maintain_sensor_focal_ratio,
+            print_progress,
+            blender_start_frame,
+            bulk_keyframes
+        )
+        # a partial export must not end up in the parse cache
+        settings.set_parse_cache_size(0 if follow_timeout else parse_cache_size)
+        settings.set_resample(resample)
+        settings.set_decimation(location_tolerance, rotation_tolerance)
+        settings.set_objects(objects)
+        settings.set_time_remap(time_remap)
+        settings.set_lossless(lossless)
+
+        rollback = ImportRollback(bpy.context.scene)
+        report = {'filepath': filepath}
+        try:
+            if batch_jobs:
+                ignored = Importer.get_batch_ignored_options(threaded, parse_workers, share_actions, preview)
+                if ignored and print_progress:
+                    print('Not used by batch imports: {}'.format(', '.join(ignored)), flush=True)
+                job_reports = yield from Importer.import_cinematics_batch_steps(settings, batch_jobs, batch_workers,
+                                                                                instrumentation)
+                report['jobs'] = [dict(job_report, filepath=job[0]) for job, job_report in zip(batch_jobs, job_reports)]
+                report['ignored_options'] = ignored
+            else:
+                yield from Importer.import_file_steps(settings, filepath, snapshot_filename, follow_timeout, threaded,
+                                                      instrumentation, parse_workers, share_actions, preview)
+                if follow_timeout:
+                    report['ignored_options'] = follow_ignored
+        except BaseException:
+            # cancelled (GeneratorExit) or failed: the scene is left as it was before
+            rollback.rollback()
+            raise
+
+        if report_filename:
+            instrumentation.write_report(bpy.path.abspath(report_filename), report)
+        return
+
+    @staticmethod
+    def get_batch_ignored_options(threaded: bool, parse_workers: int, share_actions: bool,
+                                  preview: Optional[Preview]) -> List[str]:
+        """Names of the options given that a batch import does not use: every export is built whole in a process
+        of the batch pool, then written at once into a scene of its own."""
+        ignored = []
+        if threaded:
+            ignored.append('Read in Background')
+        if parse_workers != 1:
+            ignored.append('Parse Processes')
+        if share_actions:
+            ignored.append('Share Car and Ball Actions')
+        if preview is not None:
+            ignored.append('Preview Every Nth Key')
+        return ignored
+
+    @staticmethod
+    def get_follow_ignored_options(bulk_keyframes: bool, resample: bool, decimate: bool, lossless: bool,
+                                   preview: Optional[Preview]) -> List[str]:
+        """Names of the options given that following an export turns off: its keys are inserted as lines are read,
+        while these options work on the whole animation."""
+        ignored = []
+        if bulk_keyframes:
+            ignored.append('Bulk Keyframes')
+        if resample:
+            ignored.append('Resample to Target Frames')
+        if decimate:
+            ignored.append('Decimate Keyframes')
+        if lossless:
+            ignored.append('Drop Redundant Keyframes')
+        if preview is not None:
+            ignored.append('Preview Every Nth Key')
+        return ignored
+
+    @staticmethod
+    def import_file_steps(settings: ImportSettings, filepath: str, snapshot_filename: str, follow_timeout: float,
+                          threaded: bool, instrumentation: Instrumentation,
+                          parse_workers: int = 1,
+                          share_actions: bool = False,
+                          preview: Optional[Preview] = None) -> Generator[Tuple[str, float], None, None]:
         scn = bpy.context.scene
+        file_processor: Union[LinesProcessor, SegmentsProcessor] = settings.create_processor(
+            filepath,
+            snapshot_filename,
+            scn
+        )
+        if follow_timeout:
+            file_processor.set_follow(True, timeout=follow_timeout)
+        # a followed export is waited for on the background thread, so steps keep returning meanwhile
+        file_processor.set_threaded(threaded or bool(follow_timeout))
+        file_processor.set_parse_workers(parse_workers, getattr(bpy.app, 'binary_path_python', None))
+        # a followed export is still growing, its actions are not kept for sharing
+        if share_actions and not follow_timeout:
+            shared_actions = SharedActions(settings.get_fingerprint(filepath, snapshot_filename),
+                                           settings.blender_start_frame)
+            found = shared_actions.find(settings.objects)
+            if found:
+                # only what is not shared is decoded and keyed
+                prefixes = settings.objects
+                if prefixes is None:
+                    prefixes = [obj['prefix'] for obj in file_processor.objs]
+                file_processor.set_objects([prefix for prefix in prefixes if prefix not in found])
+            file_processor.set_shared_actions(shared_actions)
+        file_processor.set_preview(preview)
+        file_processor.set_instrumentation(instrumentation)
+
+        with instrumentation.stage('scene setup'):
+            Importer.setup_scene(scn, settings.proxies, settings.unit_scale)
+        yield from file_processor.process_steps()
+        return
+
+    @staticmethod
+    def import_cinematics_batch(settings: ImportSettings, jobs: List[Tuple[str, str]], workers: int):
+        run_steps(Importer.import_cinematics_batch_steps(settings, jobs, workers))
+        return {'FINISHED'}
+
+    @staticmethod
+    def import_cinematics_batch_steps(
+            settings: ImportSettings,
+            jobs: List[Tuple[str, str]],
+            workers: int,
+            instrumentation: Optional[Instrumentation] = None
+    ) -> Generator[Tuple[str, float], None, List[dict]]:
+        """Build every (export, snapshot file) job in a pool of processes, then write each into a new scene; one
+        step per scene, yielding ('write', fraction of the scenes written). Returns the build report of every job;
+        their totals and the writes are added to instrumentation."""
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        builder = BatchBuilder(settings, workers)
+        # inside Blender sys.executable is Blender, not the Python the workers should run
+        builder.set_executable(getattr(bpy.app, 'binary_path_python', None))
+        reports = []
+        for index, ((filepath, snapshot_filename), (animation, report)) in enumerate(zip(jobs, builder.build(jobs))):
+            instrumentation.merge_report(report)
+            reports.append(report)
+            scn = bpy.data.scenes.new(os.path.splitext(os.path.basename(strip_compression_extension(filepath)))[0])
+            with instrumentation.stage('scene setup'):
+                Importer.setup_scene(scn, settings.proxies, settings.unit_scale)
+            writer = AnimationWriter(scn, settings.get_consts(), settings.bulk_keyframes)
+            writer.set_instrumentation(instrumentation)
+            writer.write(animation)
+            if settings.print_progress:
+                print('Imported {} into scene {}'.format(filepath, scn.name), flush=True)
+            yield 'write', (index + 1) / len(jobs)
+        return reports
+
+    @staticmethod
+    def setup_scene(scn, proxies: dict, unit_scale: float):
         stadium_obj = bpy.data.objects.get(proxies['STADIUM_PROXY_NAME']).copy()
         stadium_obj.name = 'Stadium'
         stadium_obj.rotation_mode = 'QUATERNION'
@@ -201,37 +737,7 @@ class Importer:
         y = 51.4
         Importer.create_empty(scn, 'Goal Line 1', (0.0, -y, 0.0), unit_scale)
         Importer.create_empty(scn, 'Goal Line 2', (0.0, y, 0.0), unit_scale)
-
-        use_segments = True if len(snapshot_filename) else False
-
-        module = import_module('io_import_cinematics_buddy.ops.processors')
-        processor_class = getattr(
-            module,
-            'SegmentsProcessor' if use_segments else 'LinesProcessor'
-        )
-
-        file_processor: Union[LinesProcessor, SegmentsProcessor] = processor_class(
-            filepath,
-            proxies,
-            unit_scale,
-            include_frame_nums,
-            0 if use_segments else replay_frame_start,
-            999999999 if use_segments else replay_frame_end,
-            target_fps,
-            scn,
-            vid_speed,
-            sensor_width,
-            maintain_sensor_focal_ratio,
-            print_progress,
-            blender_start_frame
-        )
-
-        if use_segments:
-            file_processor.set_snapshot_file(snapshot_filename)
-
-        file_processor.process()
-
-        return {'FINISHED'}
+        return
 
     @staticmethod
     def create_empty(scn, name: str, location, scale):
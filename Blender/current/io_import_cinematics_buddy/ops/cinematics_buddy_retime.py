@@ -0,0 +1,73 @@
+from bpy.props import EnumProperty, IntProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ImportHelper
+from .keyframers import TimeRemapWriter
+from .processors import SegmentsProcessor
+from .retiming import TimeMap
+from .timing import SegmentTiming
+
+
+class CinematicsBuddyRetime(Operator, ImportHelper):
+    """Retime a Cinematics Buddy Animation imported with Time Remap to another snapshot file or video speed"""
+    bl_idname = "import.cinematics_buddy_retime"
+    bl_label = "Retime Cinematics Buddy Animation"
+    filename_ext = ".json"
+
+    filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+
+    target_fps: IntProperty(
+        name="Target FPS",
+        description="FPS you intend to use in Blender",
+        default=60,
+        min=1
+    )
+
+    vid_speed: EnumProperty(
+        items=[
+            ("2.0", "200%", ""),
+            ("1.0", "100%", ""),
+            ("0.5", "50%", ""),
+            ("0.25", "25%", ""),
+            ("0.1", "10%", ""),
+            ("0.05", "5%", ""),
+        ],
+        name="",
+        description="Video Speed",
+        default="1.0",
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        box = layout.box()
+        box.label(text='Video Speed:')
+        box.prop(self, 'vid_speed')
+        box.prop(self, 'target_fps')
+
+    def execute(self, context):
+        return Retimer.retime_cinematics_data(
+            context,
+            self.filepath,
+            float(self.vid_speed),
+            float(self.target_fps)
+        )
+
+
+class Retimer:
+
+    @staticmethod
+    def retime_cinematics_data(context, snapshot_filename: str, vid_speed: float, target_fps: float):
+        scn = context.scene
+        if 'cb_replay_origin' not in scn:
+            raise Exception('No animation imported with Time Remap in scene: {}'.format(scn.name))
+
+        snapshots = SegmentsProcessor.load_snapshots(snapshot_filename)
+        timing = SegmentTiming(SegmentsProcessor.get_segments(snapshots, vid_speed, target_fps), target_fps)
+        time_map = TimeMap.from_timing(timing, scn['cb_replay_origin'], scn['cb_blender_start_frame'])
+
+        targets = list(scn.objects) + [obj.data for obj in scn.objects if obj.data is not None]
+        TimeRemapWriter(time_map).retime(targets)
+
+        scn.render.fps = int(target_fps)
+        scn.frame_start = time_map.blender_start_frame
+        scn.frame_end = time_map.get_scene_frame_end(scn['cb_action_frame_end'])
+        return {'FINISHED'}
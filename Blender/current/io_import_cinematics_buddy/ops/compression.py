@@ -0,0 +1,37 @@
+import bz2
+import gzip
+import lzma
+import os
+from typing import IO
+
+
+# leading bytes of each supported compressed format, with the module that opens it
+COMPRESSED_FORMATS = [
+    (b'\x1f\x8b', gzip),
+    (b'\xfd7zXZ\x00', lzma),
+    (b'BZh', bz2),
+]
+COMPRESSED_EXTENSIONS = ['.gz', '.xz', '.bz2']
+
+
+def get_compression(filepath: str):
+    """Module that decompresses the file (gzip, lzma or bz2), or None if it is not compressed."""
+    with open(filepath, 'rb') as fp:
+        magic = fp.read(6)
+    for prefix, module in COMPRESSED_FORMATS:
+        if magic.startswith(prefix):
+            return module
+    return None
+
+
+def open_export(filepath: str, compression=None) -> IO[str]:
+    """Open an export for reading as text, decompressing it on the fly if compression is given."""
+    if compression is None:
+        return open(filepath)
+    return compression.open(filepath, 'rt')
+
+
+def strip_compression_extension(filepath: str) -> str:
+    """filepath without a trailing .gz, .xz or .bz2."""
+    root, extension = os.path.splitext(filepath)
+    return root if extension.lower() in COMPRESSED_EXTENSIONS else filepath
@@ -0,0 +1,96 @@
+import numpy as np
+from typing import Callable, Tuple
+
+
+def interpolate_linear(times: np.ndarray, values: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Values Blender's linear interpolation produces between keys start and end at the interior times."""
+    factors = (times[start + 1:end] - times[start]) / (times[end] - times[start])
+    return values[start] + factors[:, None] * (values[end] - values[start])
+
+
+def location_errors(actual: np.ndarray, interpolated: np.ndarray) -> np.ndarray:
+    """Distance between the keyed and the interpolated locations."""
+    return np.linalg.norm(actual - interpolated, axis=1)
+
+
+def rotation_errors(actual: np.ndarray, interpolated: np.ndarray) -> np.ndarray:
+    """Angle in radians between keyed quaternions and component-wise interpolated ones (as Blender evaluates
+    quaternion F-curves, normalizing the result)."""
+    norms = np.linalg.norm(interpolated, axis=1) * np.linalg.norm(actual, axis=1)
+    dots = np.abs(np.einsum('ij,ij->i', actual, interpolated)) / np.maximum(norms, 1e-12)
+    return 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+
+
+def decimate(
+        times: np.ndarray,
+        values: np.ndarray,
+        tolerance: float,
+        get_errors: Callable[[np.ndarray, np.ndarray], np.ndarray]
+) -> Tuple[np.ndarray, float]:
+    """Ramer-Douglas-Peucker over keys (times (N,), values (N, k)) with linear interpolation between kept keys.
+
+    Returns the indices of the keys to keep and the largest error of a dropped key. Error is measured at the
+    dropped key's time, so it is the deviation the animation actually shows on playback.
+    """
+    count = len(times)
+    if count < 3:
+        return np.arange(count), 0.0
+
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    max_error = 0.0
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        errors = get_errors(values[start + 1:end], interpolate_linear(times, values, start, end))
+        index = int(np.argmax(errors))
+        if errors[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+        else:
+            max_error = max(max_error, float(errors[index]))
+    return np.flatnonzero(keep), max_error
+
+
+def lossless_errors(actual: np.ndarray, interpolated: np.ndarray) -> np.ndarray:
+    """Largest difference of any component, in steps of 32 bit float resolution at that component's values."""
+    resolutions = np.finfo(np.float32).eps * np.maximum(np.abs(actual), np.abs(interpolated))
+    differences = np.abs(actual - interpolated)
+    # both zero is exact, a difference from zero is not
+    errors = np.where(differences > 0.0, np.inf, 0.0)
+    np.divide(differences, resolutions, out=errors, where=resolutions > 0.0)
+    return np.max(errors, axis=1)
+
+
+def lossless_keep(times: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Indices of the keys (times (N,), values (N, k)) that linear interpolation between the others does not
+    reproduce, constant runs collapsing to their end points.
+
+    F-curves store keys as 32 bit floats, so a key closer to the interpolated value than their resolution at
+    the magnitude of the key and its neighbours on that F-curve is reproduced exactly.
+    """
+    count = len(times)
+    if count < 3:
+        return np.arange(count)
+    magnitudes = np.maximum(np.maximum(np.abs(values[:-2]), np.abs(values[1:-1])), np.abs(values[2:]))
+    tolerances = float(np.finfo(np.float32).eps) * magnitudes
+
+    factors = (times[1:-1] - times[:-2]) / (times[2:] - times[:-2])
+    expected = values[:-2] + factors[:, None] * (values[2:] - values[:-2])
+    keep = np.ones(count, dtype=bool)
+    keep[1:-1] = np.any(np.abs(values[1:-1] - expected) > tolerances, axis=1)
+
+    # the test above only compares each key with its neighbours, so check every dropped run against the keys
+    # around it, which slow curvature over a long run could otherwise fail
+    kept = np.flatnonzero(keep)
+    for gap in np.flatnonzero(np.diff(kept) > 1):
+        start, end = kept[gap], kept[gap + 1]
+        errors = lossless_errors(values[start + 1:end], interpolate_linear(times, values, start, end))
+        if errors.max() > 1.0:
+            run_keep = decimate(times[start:end + 1], values[start:end + 1], 1.0, lossless_errors)[0]
+            keep[start + run_keep] = True
+    return np.flatnonzero(keep)
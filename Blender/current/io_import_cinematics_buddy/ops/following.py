@@ -0,0 +1,76 @@
+import os
+from time import monotonic, sleep
+from typing import BinaryIO
+
+
+# File Follower
+class FileFollower:
+    """Reads complete lines from an export that is still being written.
+
+    The file size is polled every poll_interval seconds. A partial last line stays buffered until the rest of it
+    is appended, except the END line, which the writer may leave without a line break. If the file does not grow
+    for timeout seconds before END, an exception is raised.
+    """
+    poll_interval: float = 0.25
+    timeout: float = 60.0
+    # upper bound on what one read_lines() call returns
+    max_read: int = 4 * 1024 * 1024
+
+    def __init__(self, fp: BinaryIO, poll_interval: float = 0.25, timeout: float = 60.0):
+        self.fp = fp
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.buffer = b''
+        self.ended = False
+        return
+
+    def read_available(self) -> bool:
+        """Append what has been written since the last read to the buffer; returns False if nothing was."""
+        size = os.fstat(self.fp.fileno()).st_size
+        position = self.fp.tell()
+        if size <= position:
+            return False
+        self.buffer += self.fp.read(min(size - position, self.max_read))
+        return True
+
+    def wait(self, has_text) -> None:
+        """Poll the file until has_text() is true."""
+        last_growth = monotonic()
+        while not has_text():
+            if self.read_available():
+                last_growth = monotonic()
+                continue
+            if monotonic() - last_growth > self.timeout:
+                raise Exception('Animation export stopped growing before its END line')
+            sleep(self.poll_interval)
+        return
+
+    def is_end(self) -> bool:
+        # the buffer always starts at the beginning of a line
+        return self.buffer.startswith(b'END')
+
+    def take(self, end: int) -> str:
+        text = self.buffer[:end]
+        self.buffer = self.buffer[end:]
+        return text.decode()
+
+    def readline(self) -> str:
+        """Next complete line; '' once the END line has been read."""
+        if self.ended:
+            return ''
+        self.wait(lambda: b'\n' in self.buffer or self.is_end())
+        if self.is_end():
+            self.ended = True
+        line_end = self.buffer.find(b'\n')
+        return self.take(line_end + 1 if line_end >= 0 else len(self.buffer))
+
+    def read_lines(self) -> str:
+        """All complete lines written so far, waiting for at least one; the END line is included once written."""
+        if self.ended:
+            return ''
+        self.wait(lambda: b'\n' in self.buffer or self.is_end())
+        end = self.buffer.find(b'\nEND')
+        if self.is_end() or end >= 0:
+            self.ended = True
+            return self.take(len(self.buffer))
+        return self.take(self.buffer.rfind(b'\n') + 1)
@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+import json
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Instrumentation
+class Instrumentation:
+    """Wall time per stage, counters and keys written per object for one import.
+
+    Stages nest (parsing runs while the timing stage pulls blocks from it), so the running stages are kept
+    on a stack and only the innermost one is charged: stage times are exclusive and add up to the total.
+    """
+    stack: List[str] = None
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.key_counts: Dict[str, int] = {}
+        self.stack = []
+        self.started = perf_counter()
+        self.mark = self.started
+        return
+
+    def sample(self):
+        """Charge the time since the last stage change to the running stage."""
+        now = perf_counter()
+        if self.stack:
+            stage = self.stack[-1]
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + now - self.mark
+        self.mark = now
+
+    def enter(self, stage: str):
+        self.sample()
+        self.stack.append(stage)
+        self.seconds.setdefault(stage, 0.0)
+
+    def exit(self):
+        self.sample()
+        self.stack.pop()
+
+    @contextmanager
+    def stage(self, stage: str):
+        self.enter(stage)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def time_iterator(self, stage: str, iterator: Iterator) -> Iterator:
+        """Yield the items of iterator, charging the time spent producing them to stage."""
+        iterator = iter(iterator)
+        while True:
+            self.enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def add_keys(self, name: str, count: int):
+        self.key_counts[name] = self.key_counts.get(name, 0) + count
+
+    def merge(self, other: 'Instrumentation'):
+        """Add the stage times, counters and keys of other, e.g. of work done on another thread."""
+        for stage, seconds in other.seconds.items():
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        for counter, amount in other.counters.items():
+            self.count(counter, amount)
+        for name, count in other.key_counts.items():
+            self.add_keys(name, count)
+        return
+
+    def merge_report(self, report: dict):
+        """Add the stage times, counters and keys of a get_report() result, e.g. of an import in another process."""
+        for stage, seconds in report['seconds'].items():
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        for counter, amount in report['counters'].items():
+            self.count(counter, amount)
+        for name, count in report['keys'].items():
+            self.add_keys(name, count)
+        return
+
+    def get_report(self) -> dict:
+        return {
+            'total_seconds': perf_counter() - self.started,
+            'seconds': dict(self.seconds),
+            'counters': dict(self.counters),
+            'keys': dict(self.key_counts),
+        }
+
+    def write_report(self, filepath: str, extra: Optional[dict] = None):
+        report = self.get_report()
+        if extra:
+            report.update(extra)
+        with open(filepath, 'w') as fp:
+            json.dump(report, fp, indent=4)
+        return
+
+    def format_summary(self) -> str:
+        report = self.get_report()
+        stages = ', '.join('{} {:.3f}s'.format(stage, seconds) for stage, seconds in report['seconds'].items())
+        return 'Import took {:.3f}s ({}), {} keys written'.format(
+            report['total_seconds'], stages, sum(report['keys'].values()))
+
+
+# Progress
+class Progress:
+    """Throttled progress messages: at most one every interval seconds, unless step percent more is done."""
+    interval: float = 1.0
+    step: float = 10.0
+
+    def __init__(self, log: Callable[[str], None], total: int, interval: float = 1.0, step: float = 10.0):
+        self.log = log
+        self.total = total
+        self.interval = interval
+        self.step = step
+        self.last_time = perf_counter()
+        self.last_percent = 0.0
+        return
+
+    def get_percent(self, done: int) -> float:
+        return min(100.0 * done / self.total, 100.0) if self.total else 0.0
+
+    def update(self, done: int):
+        now = perf_counter()
+        percent = self.get_percent(done)
+        if now - self.last_time >= self.interval or percent - self.last_percent >= self.step:
+            self.report(done, percent)
+            self.last_time = now
+            self.last_percent = percent
+        return
+
+    def report(self, done: int, percent: float):
+        if self.total:
+            self.log('Read {} of {} lines ({:.0f}%)'.format(done, self.total, percent))
+        else:
+            self.log('Read {} lines'.format(done))
@@ -1,92 +1,167 @@
 import bpy
-from math import cos, floor, radians
-from typing import Union
-from mathutils import Quaternion
+from math import ceil, floor, radians
+import numpy as np
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Tuple
+from .animation import Animation, BallAnimation, CameraAnimation, CarAnimation, Channel, ObjectAnimation
+from .instrumentation import Instrumentation
+from .retiming import TimeMap
+from .stepping import run_steps
+
+
+LINEAR = 1  # index of 'LINEAR' in Keyframe.interpolation enum items
 
 
 # Object Keyframer
 class ObjectKeyframer:
+    """Creates the Blender object of an ObjectAnimation and keys it.
+
+    In bulk mode every F-curve is written with one keyframe_points.add() and foreach_set() instead of one
+    keyframe_insert() per key.
+    """
     obj = None
     base_unit: float = 1.0
-    color = None
-    blender_start_frame = 1
-    unit_scale: float = 1.0
-    prev_quat: Union[Quaternion, None] = None
-    prev_subframe: float = 0.0
-    ninety: float = 0.0
-    highest_subframe = 0.0
-
-    def __init__(self, prefix: str, headers: dict, consts: dict, scn, unit_scale, color=(1, 1, 1, 1)):
-        self.prefix = prefix
-        self.headers = headers
+    bulk: bool = True
+    instrumentation: Instrumentation = None
+    # keys keyframe_insert()ed per step of write_steps()
+    insert_step: int = 500
+
+    def __init__(self, animation: ObjectAnimation, consts: dict, scn):
+        self.animation = animation
+        self.prefix = animation.prefix
+        self.color = animation.color
         self.consts = consts
         self.scn = scn
-        self.unit_scale = unit_scale
-        self.color = color
-        self.ninety = cos(radians(90)/2)
+        self.instrumentation = Instrumentation()
         return
 
-    def set_blender_start_frame(self, blender_start_frame: int):
-        self.blender_start_frame = blender_start_frame
+    def set_bulk(self, bulk: bool):
+        self.bulk = bulk
 
-    @staticmethod
-    def round(num: float) -> float:
-        return float(round(num, 6))
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
 
-    def add_subframe(self, subframe: float, line: list):
-        subframe = self.round(subframe + self.blender_start_frame)
-        obj = self.get_object()
-        obj.rotation_mode = 'QUATERNION'
+    def write(self):
+        """Key the object, with a single update() per F-curve."""
+        run_steps(self.write_steps())
+        return
 
-        loc = [self.round(float(x)) for x in line[self.consts[self.prefix + '_LOC']].split(',')]
-        rot = [self.round(float(x)) for x in line[self.consts[self.prefix + '_QUAT']].split(',')]
+    def write_steps(self) -> Iterator[None]:
+        """write() one channel per step, or insert_step keys per step in insert mode."""
+        for channel, target in self.get_channel_targets():
+            yield from self.write_channel(channel, target)
+        if not self.bulk:
+            self.interpolate(self.get_list_for_keyframing())
+        return
 
-        obj.location = (loc[self.consts['LOC_X']] * self.unit_scale, -loc[self.consts['LOC_Y']] * self.unit_scale,
-                        loc[self.consts['LOC_Z']] * self.unit_scale)
+    def write_preview_steps(self, step: int, refine: bool = False) -> Iterator[None]:
+        """write_steps() for every step-th key of each channel and its last one, or with refine for the keys that
+        were left out; interpolating inserted keys is left to the caller."""
+        for channel, target in self.get_channel_targets():
+            if refine and self.bulk:
+                # add_keys() completes the F-curves in place, ending up exactly like a write()
+                yield from self.write_channel(channel, target)
+            else:
+                yield from self.write_channel(channel.take_preview(step, refine), target)
+        return
 
-        quat = self.get_rotation(
-            rot[self.consts['QUAT_W']],
-            rot[self.consts['QUAT_X']],
-            rot[self.consts['QUAT_Y']],
-            rot[self.consts['QUAT_Z']]
-        )
+    def get_channel_targets(self) -> List[Tuple[Channel, object]]:
+        """The channels to write with the object or data they animate, in the order they are written."""
+        obj = self.get_object()
+        obj.rotation_mode = 'QUATERNION'
+        return [(channel, obj) for channel in self.animation.channels.values()]
+
+    def write_channel(self, channel: Channel, target) -> Iterator[None]:
+        if self.bulk:
+            self.add_keys(channel, target)
+            yield
+        else:
+            yield from self.insert_key_steps(channel, target)
+        return
 
-        # if this subframe and previous subframe both fall on real frames or within the same real frame
-        # then polarity constraint is not necessary
-        if self.prev_quat:
-            real_frame = floor(subframe)
-            prev_real_frame = floor(self.prev_subframe)
-            if real_frame != prev_real_frame:
-                if self.round(real_frame - subframe) or self.round(prev_real_frame - self.prev_subframe):
-                    if self.prev_quat.dot(quat) < 0:
-                        quat.negate()
+    def add_keys(self, channel: Channel, target):
+        if not len(channel):
+            return
+        if target.animation_data is None:
+            target.animation_data_create()
+        # keys a refine adds after the preview was remapped go to the action of the remapping strip
+        action = TimeRemapWriter.get_action(target)
+        if action is None:
+            action = bpy.data.actions.new(name=target.name + 'Action')
+            target.animation_data.action = action
+
+        frames, values = channel.get_keys()
+        count = len(frames)
+        added = count
+        for index in range(channel.width):
+            fcurve = self.get_fcurve(action, channel, index)
+            # keys a preview wrote are among the channel's keys and are set again in place
+            added = count - len(fcurve.keyframe_points)
+            co = np.column_stack((frames, values[:, index])).ravel()
+            fcurve.keyframe_points.add(added)
+            fcurve.keyframe_points.foreach_set('co', co)
+            fcurve.keyframe_points.foreach_set('interpolation', [LINEAR] * count)
+            with self.instrumentation.stage('update'):
+                fcurve.update()
+        self.instrumentation.add_keys(self.prefix, added)
+        return
 
-        obj.rotation_quaternion = (quat.w, quat.x, quat.y, quat.z)
-        self.prev_quat = quat
+    @staticmethod
+    def get_fcurve(action, channel: Channel, index: int):
+        fcurves = action.fcurves
+        fcurve = fcurves.find(channel.data_path, index=index)
+        if fcurve is None:
+            if channel.group:
+                fcurve = fcurves.new(channel.data_path, index=index, action_group=channel.group)
+            else:
+                fcurve = fcurves.new(channel.data_path, index=index)
+        return fcurve
+
+    def insert_keys(self, channel: Channel, target):
+        run_steps(self.insert_key_steps(channel, target))
+        return
 
-        obj.keyframe_insert(data_path='location', frame=subframe)
-        obj.keyframe_insert(data_path='rotation_quaternion', frame=subframe)
-        self.interpolate(self.get_list_for_keyframing())
-        self.prev_subframe = subframe
-        if subframe > self.highest_subframe:
-            self.highest_subframe = subframe
+    def insert_key_steps(self, channel: Channel, target) -> Iterator[None]:
+        # in the order the keys were added, so Blender merges close keys exactly like a streamed import
+        frames, values = channel.get_added_keys()
+        # keyframe_insert() would start a new action on a target whose action was moved to a remapping strip
+        remapped = None
+        if target.animation_data is not None and target.animation_data.action is None:
+            remapped = TimeRemapWriter.get_action(target)
+        for start in range(0, len(frames), self.insert_step):
+            stop = start + self.insert_step
+            for frame, value in zip(frames[start:stop].tolist(), values[start:stop].tolist()):
+                if remapped is None:
+                    setattr(target, channel.data_path, value if channel.width > 1 else value[0])
+                    target.keyframe_insert(data_path=channel.data_path, frame=frame)
+                    continue
+                for index, component in enumerate(value):
+                    self.get_fcurve(remapped, channel, index).keyframe_points.insert(frame, component,
+                                                                                     options={'FAST'})
+            self.instrumentation.add_keys(self.prefix, min(stop, len(frames)) - start)
+            yield
         return
 
-    @staticmethod
-    def interpolate(objs: list):
+    def insert_part(self, part: ObjectAnimation):
+        """Insert the keys of part, which holds the keys the object gained since the previous part."""
+        obj = self.get_object()
+        obj.rotation_mode = 'QUATERNION'
+        for channel in part.channels.values():
+            self.insert_keys(channel, obj)
+        return
+
+    def interpolate(self, objs: list):
         for obj in objs:
-            for fcurve in obj.animation_data.action.fcurves:
+            action = TimeRemapWriter.get_action(obj)
+            if action is None:
+                continue
+            for fcurve in action.fcurves:
                 list_len = len(fcurve.keyframe_points)
                 if list_len:
-                    index = -1 if list_len > 1 else 0
-                    kf = fcurve.keyframe_points[index]
-                    kf.interpolation = 'LINEAR'
-                    fcurve.update()
+                    fcurve.keyframe_points.foreach_set('interpolation', [LINEAR] * list_len)
+                    with self.instrumentation.stage('update'):
+                        fcurve.update()
         return
 
-    def get_rotation(self, w: float, x: float, y: float, z: float) -> Quaternion:
-        return Quaternion((w, -y, -x, -z))
-
     def get_object(self):
         if self.obj is None:
             bpy.ops.mesh.primitive_plane_add()
@@ -121,15 +196,11 @@ class ObjectKeyframer:
 class CarKeyframer(ObjectKeyframer):
     proxy_object_name = 'RL_OCTANE_PROXY'
 
-    def __init__(self, prefix: str, headers: dict, consts: dict, scn, unit_scale, color=(1, 1, 1, 1)):
-        super().__init__(prefix, headers, consts, scn, unit_scale, color)
+    def __init__(self, animation: ObjectAnimation, consts: dict, scn):
+        super().__init__(animation, consts, scn)
         self.proxy_object_name = consts['CAR_PROXY_NAME']
         return
 
-    def get_rotation(self, w: float, x: float, y: float, z: float) -> Quaternion:
-        quat = Quaternion((w, -x, y, -z))
-        return quat
-
     def get_object(self):
         if self.obj is None:
             # mesh = bpy.context.scene.objects[self.proxy_object_name].data
@@ -145,74 +216,389 @@ class CarKeyframer(ObjectKeyframer):
 
 # Ball Keyframer
 class BallKeyframer(CarKeyframer):
-    def __init__(self, prefix: str, headers: dict, consts: dict, scn, unit_scale, color=(1, 1, 1, 1)):
-        super().__init__(prefix, headers, consts, scn, unit_scale, color)
+    def __init__(self, animation: ObjectAnimation, consts: dict, scn):
+        super().__init__(animation, consts, scn)
         self.proxy_object_name = consts['BALL_PROXY_NAME']
         return
 
 
 # Camera Keyframer
 class CameraKeyframer(ObjectKeyframer):
-    default_sensor_width = 36.0
     cam_data = None
     cam = None
-    include_frame_nums: bool = False
-    sensor_width_keyframe_added: bool = False
-    sensor_width: float = 35.0
-    maintain_sensor_focal_ratio: bool = True
-
-    def __init__(
-            self,
-            prefix: str,
-            headers: dict,
-            consts: dict,
-            scn,
-            unit_scale,
-            include_frame_nums: bool,
-            sensor_width: float,
-            maintain_sensor_focal_ratio: bool
-    ):
-        super().__init__(prefix, headers, consts, scn, unit_scale)
-        self.include_frame_nums = include_frame_nums
-        self.sensor_width = sensor_width
-        self.maintain_sensor_focal_ratio = maintain_sensor_focal_ratio
-        return
+    animation: CameraAnimation = None
 
     def get_data(self):
         if self.cam_data is None:
-            self.cam_data = bpy.data.cameras.new(self.headers['camera'])
+            self.cam_data = bpy.data.cameras.new(self.animation.name)
             self.cam_data.sensor_fit = 'HORIZONTAL'
-            self.cam_data.sensor_width = self.sensor_width
+            self.cam_data.sensor_width = self.animation.sensor_width
             self.cam_data.angle = radians(90)
         return self.cam_data
 
-    def get_rotation(self, w: float, x: float, y: float, z: float) -> Quaternion:
-        # rotate -90d on z, +90d on x
-        quat = super().get_rotation(w, x, y, z)
-        quat = Quaternion((self.ninety, 0.0, 0.0, -self.ninety)) @ quat
-        return quat @ Quaternion((self.ninety, self.ninety, 0.0, 0.0))
-
     def get_object(self):
         if self.cam is None:
-            self.cam = bpy.data.objects.new(self.headers['camera'], self.get_data())
+            self.cam = bpy.data.objects.new(self.animation.name, self.get_data())
             self.scn.camera = self.cam
             self.set_object(self.cam)
         return self.cam
 
-    def add_subframe(self, subframe: float, line: list):
-        cam_data = self.get_data()
-        cam_data.angle = radians(float(line[self.consts['FOV']]))
-        if self.maintain_sensor_focal_ratio:
-            cam_data.lens = cam_data.lens * self.default_sensor_width / self.sensor_width
-        cam_data.keyframe_insert(data_path='lens', frame=subframe + self.blender_start_frame)
-        if not self.sensor_width_keyframe_added:
-            cam_data.keyframe_insert(data_path='sensor_width', frame=subframe + self.blender_start_frame)
-            self.sensor_width_keyframe_added = True
-        if self.include_frame_nums:
-            cam_data.cb_frame = float(line[self.consts['FRAME']])
-            cam_data.keyframe_insert(data_path='cb_frame', frame=subframe + self.blender_start_frame)
-        super().add_subframe(subframe, line)
+    def get_channel_targets(self) -> List[Tuple[Channel, object]]:
+        data_targets = [(channel, self.get_data()) for channel in self.animation.data_channels.values()]
+        return data_targets + super().get_channel_targets()
+
+    def insert_part(self, part: ObjectAnimation):
+        for channel in part.data_channels.values():
+            self.insert_keys(channel, self.get_data())
+        super().insert_part(part)
         return
 
     def get_list_for_keyframing(self):
         return [self.get_object(), self.get_data()]
+
+
+# Time Remap Writer
+class TimeRemapWriter:
+    """Plays imported actions through NLA strips whose animated strip time follows a TimeMap.
+
+    Retiming rewrites the strip time keys only; the actions are left alone.
+    """
+    strip_name = 'Cinematics Buddy'
+
+    def __init__(self, time_map: TimeMap):
+        self.time_map = time_map
+        return
+
+    @classmethod
+    def get_action(cls, target):
+        """The action target plays: its active action, or else the one of a strip write() moved it into."""
+        animation_data = target.animation_data
+        if animation_data is None:
+            return None
+        if animation_data.action is not None:
+            return animation_data.action
+        for track in animation_data.nla_tracks:
+            for strip in track.strips:
+                if strip.name == cls.strip_name:
+                    return strip.action
+        return None
+
+    def write(self, target):
+        """Move target's action into a new NLA strip playing on the time map."""
+        animation_data = target.animation_data
+        if animation_data is None or animation_data.action is None:
+            return
+        action = animation_data.action
+        track = animation_data.nla_tracks.new()
+        track.name = self.strip_name
+        strip = track.strips.new(self.strip_name, int(action.frame_range[0]), action)
+        animation_data.action = None
+        strip.use_animated_time = True
+        self.write_strip_time(strip)
+        return
+
+    def write_strip_time(self, strip):
+        scene_frames, action_frames = self.time_map.get_strip_time_keys()
+        fcurve = strip.fcurves.find('strip_time')
+        points = fcurve.keyframe_points
+        while len(points):
+            points.remove(points[0], fast=True)
+        count = len(scene_frames)
+        points.add(count)
+        points.foreach_set('co', np.column_stack((scene_frames, action_frames)).ravel())
+        points.foreach_set('interpolation', [LINEAR] * count)
+        fcurve.update()
+        # the strip is only evaluated within its frame range
+        strip.frame_end = max(ceil(scene_frames[-1]), strip.frame_start + 1)
+        return
+
+    def retime(self, targets: Iterable) -> int:
+        """Rewrite the strip time of every strip written for targets; returns the number of strips."""
+        count = 0
+        for target in targets:
+            animation_data = getattr(target, 'animation_data', None)
+            if animation_data is None:
+                continue
+            for track in animation_data.nla_tracks:
+                for strip in track.strips:
+                    if strip.name == self.strip_name:
+                        self.write_strip_time(strip)
+                        count += 1
+        return count
+
+
+# Shared Actions
+class SharedActions:
+    """Lets imports of the same export with the same settings share their car and ball Actions.
+
+    The Actions an import keys are tagged with its fingerprint (see ImportSettings.get_fingerprint()), the object's
+    prefix and the blender_start_frame they were keyed from. A later import with that fingerprint finds them and
+    plays them on its own objects instead of keying them again, through an NLA strip moved by the difference
+    if it starts on another frame.
+    """
+    kinds = ('car', 'ball')
+    strip_name = 'Cinematics Buddy Shared'
+
+    def __init__(self, fingerprint: str, blender_start_frame: int):
+        self.fingerprint = fingerprint
+        self.blender_start_frame = blender_start_frame
+        # the tagged actions find() found, by object prefix
+        self.found = {}
+        return
+
+    def find(self, objects: Optional[List[str]] = None) -> dict:
+        """The tagged actions of this fingerprint by object prefix, of the objects listed (None for all)."""
+        self.found = {}
+        for action in bpy.data.actions:
+            if action.get('cb_fingerprint') == self.fingerprint and action.get('cb_prefix') not in self.found:
+                if objects is None or action['cb_prefix'] in objects:
+                    self.found[action['cb_prefix']] = action
+        return self.found
+
+    def tag(self, action, prefix: str, frame_end: Optional[int]):
+        action['cb_fingerprint'] = self.fingerprint
+        action['cb_prefix'] = prefix
+        action['cb_blender_start_frame'] = self.blender_start_frame
+        if frame_end is not None:
+            action['cb_frame_end'] = frame_end
+        return
+
+    def get_offset(self, action) -> int:
+        return self.blender_start_frame - action['cb_blender_start_frame']
+
+    def get_frame_end(self) -> Optional[int]:
+        """The scene's last frame according to the found actions, for an import that keyed nothing itself."""
+        frame_ends = [action['cb_frame_end'] + self.get_offset(action) for action in self.found.values()
+                      if 'cb_frame_end' in action]
+        return max(frame_ends) if frame_ends else None
+
+    def link(self, target, action):
+        """Play action on target, moved to this import's start frame."""
+        if target.animation_data is None:
+            target.animation_data_create()
+        offset = self.get_offset(action)
+        if not offset:
+            target.animation_data.action = action
+            return
+        track = target.animation_data.nla_tracks.new()
+        track.name = self.strip_name
+        # strips start on whole frames; starting the action on one too keeps its keys on their subframes
+        action_start = floor(action.frame_range[0])
+        strip = track.strips.new(self.strip_name, action_start + offset, action)
+        strip.action_frame_start = action_start
+        return
+
+
+# Import Rollback
+class ImportRollback:
+    """Remembers the datablocks that exist before an import, so that everything it added can be removed again
+    when it is cancelled."""
+    # objects first, so the data they use is no longer in use when it is removed
+    collections = ('objects', 'actions', 'cameras', 'meshes', 'materials', 'scenes')
+
+    def __init__(self, scn):
+        self.scn = scn
+        self.camera = scn.camera
+        self.existing = {name: {block.as_pointer() for block in getattr(bpy.data, name)} for name in self.collections}
+        return
+
+    def rollback(self) -> int:
+        """Remove the datablocks added since this was created; returns how many were removed."""
+        removed = 0
+        for name in self.collections:
+            blocks = getattr(bpy.data, name)
+            for block in [block for block in blocks if block.as_pointer() not in self.existing[name]]:
+                blocks.remove(block)
+                removed += 1
+        self.scn.camera = self.camera
+        return removed
+
+
+# Preview
+class Preview:
+    """Asks for a progressive write: every step-th key of each channel first, so the scene can be looked at
+    early, then the keys in between unless refine is off.
+
+    stop() may be called between steps (the import operator does on Esc) to keep the keys written so far.
+    """
+    step: int = 4
+    refine: bool = True
+
+    def __init__(self, step: int = 4, refine: bool = True):
+        self.step = step
+        self.refine = refine
+        return
+
+    def stop(self):
+        """Stop refining after the current step."""
+        self.refine = False
+
+
+# Animation Writer
+class AnimationWriter:
+    """Applies an Animation to a scene: creates and keys its objects and sets the frame rate and range."""
+    bulk: bool = True
+    instrumentation: Instrumentation = None
+    shared_actions: Optional[SharedActions] = None
+    preview: Optional[Preview] = None
+    keyframer_classes = {
+        'camera': CameraKeyframer,
+        'ball': BallKeyframer,
+        'car': CarKeyframer,
+    }
+
+    def __init__(self, scn, consts: dict, bulk: bool = True):
+        self.scn = scn
+        self.consts = consts
+        self.bulk = bulk
+        self.instrumentation = Instrumentation()
+        # keyframers of write_keys() by object prefix
+        self.keyframers: Dict[str, ObjectKeyframer] = {}
+        return
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
+
+    def set_shared_actions(self, shared_actions: Optional[SharedActions]):
+        """Tag the car and ball actions written for sharing, and add objects playing the actions shared_actions
+        found."""
+        self.shared_actions = shared_actions
+
+    def set_preview(self, preview: Optional[Preview]):
+        """Write in a preview pass and a refining pass, see write_preview_steps()."""
+        self.preview = preview
+
+    def create_keyframer(self, animation: ObjectAnimation) -> ObjectKeyframer:
+        keyframer = self.keyframer_classes.get(animation.kind, ObjectKeyframer)(animation, self.consts, self.scn)
+        keyframer.set_bulk(self.bulk)
+        keyframer.set_instrumentation(self.instrumentation)
+        return keyframer
+
+    def write(self, animation: Animation):
+        run_steps(self.write_steps(animation))
+        return
+
+    def write_steps(self, animation: Animation) -> Generator[Tuple[str, float], None, None]:
+        """write() one F-curve (or insert_step keys) per step, yielding ('write', fraction of the keys written)."""
+        keyframers = [self.create_keyframer(obj) for obj in animation.objects]
+        if self.preview is not None:
+            yield from self.write_preview_steps(animation, keyframers)
+            self.write_scene(animation, keyframers)
+            return
+        total = sum(obj.get_key_count() for obj in animation.objects)
+        for keyframer in keyframers:
+            for _ in self.instrumentation.time_iterator('write', keyframer.write_steps()):
+                written = self.get_keys_written(animation)
+                yield 'write', min(written / total, 1.0) if total else 1.0
+        self.write_scene(animation, keyframers)
+        return
+
+    def write_preview_steps(self, animation: Animation, keyframers: List[ObjectKeyframer]) -> Iterator[tuple]:
+        """Write every preview.step-th key, yielding ('preview', fraction), then the others, yielding ('refine',
+        fraction), until the preview is stopped. Scene settings and the time map are written after the preview, so
+        it plays."""
+        step = self.preview.step
+        total = sum(obj.get_key_count() for obj in animation.objects)
+        # about what the preview writes; the fraction is capped, as merged keys are not counted
+        preview_total = -(-total // step)
+        for keyframer in keyframers:
+            for _ in self.instrumentation.time_iterator('write', keyframer.write_preview_steps(step)):
+                yield 'preview', min(self.get_keys_written(animation) / preview_total, 1.0) if total else 1.0
+        self.interpolate_inserted(keyframers)
+        if animation.time_map is not None:
+            # the preview plays on scene time like the finished import; the refine keys the strips' actions
+            self.write_time_map(animation, keyframers)
+        self.write_frame_range(animation)
+
+        previewed = self.get_keys_written(animation)
+        for keyframer in keyframers:
+            if not self.preview.refine:
+                break
+            for _ in self.instrumentation.time_iterator('write', keyframer.write_preview_steps(step, True)):
+                written = self.get_keys_written(animation) - previewed
+                yield 'refine', min(written / (total - previewed), 1.0) if total > previewed else 1.0
+                if not self.preview.refine:
+                    break
+        self.interpolate_inserted(keyframers)
+        return
+
+    def interpolate_inserted(self, keyframers: List[ObjectKeyframer]):
+        if self.bulk:
+            return
+        with self.instrumentation.stage('write'):
+            for keyframer in keyframers:
+                keyframer.interpolate(keyframer.get_list_for_keyframing())
+        return
+
+    def get_keys_written(self, animation: Animation) -> int:
+        return sum(self.instrumentation.key_counts.get(obj.prefix, 0) for obj in animation.objects)
+
+    def write_keys(self, parts: List[ObjectAnimation]):
+        """Insert keys as they are parsed; parts hold the keys the objects gained from a block of lines."""
+        with self.instrumentation.stage('write'):
+            for part in parts:
+                if part.prefix not in self.keyframers:
+                    self.keyframers[part.prefix] = self.create_keyframer(part)
+                self.keyframers[part.prefix].insert_part(part)
+        return
+
+    def finish_keys(self, animation: Animation):
+        """Complete a write done by write_keys() once the whole animation is built."""
+        keyframers = [self.keyframers[obj.prefix] for obj in animation.objects if obj.prefix in self.keyframers]
+        with self.instrumentation.stage('write'):
+            for keyframer in keyframers:
+                keyframer.interpolate(keyframer.get_list_for_keyframing())
+        self.write_scene(animation, keyframers)
+        return
+
+    def write_scene(self, animation: Animation, keyframers: List[ObjectKeyframer]):
+        if self.shared_actions is not None:
+            keyframers = keyframers + self.write_shared_actions(animation, keyframers)
+        if animation.time_map is not None:
+            self.write_time_map(animation, keyframers)
+        self.write_frame_range(animation)
+        return
+
+    def write_frame_range(self, animation: Animation):
+        """Set the scene's frame rate and range."""
+        self.scn.render.fps = animation.fps
+        if animation.frame_end is not None:
+            self.scn.frame_start = animation.frame_start
+            self.scn.frame_end = animation.frame_end
+        elif self.shared_actions is not None and self.shared_actions.get_frame_end() is not None:
+            self.scn.frame_start = self.shared_actions.blender_start_frame
+            self.scn.frame_end = self.shared_actions.get_frame_end()
+        return
+
+    def write_shared_actions(self, animation: Animation, keyframers: List[ObjectKeyframer]) -> List[ObjectKeyframer]:
+        """Tag the actions of the keyed cars and ball, then add the objects of the found ones; returns the
+        keyframers of the added objects."""
+        shared_actions = self.shared_actions
+        for keyframer in keyframers:
+            obj = keyframer.obj
+            if keyframer.animation.kind in shared_actions.kinds and obj is not None:
+                # after a remapped preview, the action is in its strip already
+                action = TimeRemapWriter.get_action(obj)
+                if action is not None:
+                    shared_actions.tag(action, keyframer.prefix, animation.frame_end)
+        added = []
+        with self.instrumentation.stage('share'):
+            for prefix, action in shared_actions.found.items():
+                animation_class = BallAnimation if prefix == 'BALL' else CarAnimation
+                keyframer = self.create_keyframer(animation_class(prefix, prefix))
+                shared_actions.link(keyframer.get_object(), action)
+                added.append(keyframer)
+        self.instrumentation.count('actions_shared', len(added))
+        return added
+
+    def write_time_map(self, animation: Animation, keyframers: list):
+        with self.instrumentation.stage('time remap'):
+            remap_writer = TimeRemapWriter(animation.time_map)
+            for keyframer in keyframers:
+                for target in keyframer.get_list_for_keyframing():
+                    remap_writer.write(target)
+        # what a retime needs to map the actions to scene frames again
+        self.scn['cb_replay_origin'] = animation.time_map.origin
+        self.scn['cb_blender_start_frame'] = animation.time_map.blender_start_frame
+        self.scn['cb_action_frame_end'] = animation.action_frame_end
+        return
@@ -0,0 +1,293 @@
+from itertools import islice
+import numpy as np
+import re
+from typing import Dict, Iterator, List, Optional, TextIO
+
+
+LOC_WIDTH = 3
+QUAT_WIDTH = 4
+TITLE_COLUMNS = {
+    'Frame': 'FRAME',
+    'Timestamp': 'REPLAY_FRAME',
+    'Camera FOV': 'FOV',
+    'Camera Position': 'CAM_LOC',
+    'Camera Quaternions': 'CAM_QUAT',
+    'Ball Position': 'BALL_LOC',
+    'Ball Quaternions': 'BALL_QUAT',
+}
+CAR_TITLE = re.compile(r'Car (\d+) Shortcut$')
+
+
+def parse_title_line(line: str) -> Optional[Dict[str, int]]:
+    """Map the column titles line of an export to the token positions of the data lines.
+
+    Tokens are the non-empty tab separated fields of a line; a car's Position and Quaternions follow its
+    'Car N Shortcut' title. Returns None if the line is not a titles line.
+    """
+    positions = {}
+    car = None
+    fields = [field.strip() for field in line.split('\t') if field.strip()]
+    for token, field in enumerate(fields):
+        match = CAR_TITLE.match(field)
+        if field in TITLE_COLUMNS:
+            positions[TITLE_COLUMNS[field]] = token
+        elif match:
+            car = 'CAR' + match.group(1)
+        elif car is not None and field == 'Position':
+            positions[car + '_LOC'] = token
+        elif car is not None and field == 'Quaternions':
+            positions[car + '_QUAT'] = token
+    if any(key not in positions for key in ('FRAME', 'REPLAY_FRAME', 'FOV')):
+        return None
+    # objects missing either of their columns are left out
+    for key in [key for key in positions if key.endswith('_LOC') or key.endswith('_QUAT')]:
+        prefix = key.rsplit('_', 1)[0]
+        if prefix + '_LOC' not in positions or prefix + '_QUAT' not in positions:
+            del positions[key]
+    return positions
+
+
+# Export Line
+class ExportLine:
+    """Read-only view of a single parsed data line."""
+    __slots__ = ('data', 'index')
+
+    def __init__(self, data: 'ExportData', index: int):
+        self.data = data
+        self.index = index
+
+    @property
+    def frame(self) -> int:
+        return int(self.data.frame[self.index])
+
+    @property
+    def replay_frame(self) -> int:
+        return int(self.data.replay_frame[self.index])
+
+    @property
+    def fov(self) -> float:
+        return float(self.data.fov[self.index])
+
+    def location(self, prefix: str) -> np.ndarray:
+        return self.data.locations[prefix][self.index]
+
+    def quaternion(self, prefix: str) -> np.ndarray:
+        return self.data.quaternions[prefix][self.index]
+
+
+# Export Data
+class ExportData:
+    """Columnar arrays for the data section of an animation export.
+
+    Locations are (N, 3) arrays and quaternions (N, 4) arrays in the export's
+    x, y, z, w order, both keyed by object prefix (CAM, BALL, CAR1...).
+    """
+    frame: np.ndarray = None
+    replay_frame: np.ndarray = None
+    fov: np.ndarray = None
+    locations: Dict[str, np.ndarray] = None
+    quaternions: Dict[str, np.ndarray] = None
+    ended: bool = False
+
+    def __init__(
+            self,
+            frame: np.ndarray,
+            replay_frame: np.ndarray,
+            fov: np.ndarray,
+            locations: Dict[str, np.ndarray],
+            quaternions: Dict[str, np.ndarray],
+            ended: bool = False
+    ):
+        self.frame = frame
+        self.replay_frame = replay_frame
+        self.fov = fov
+        self.locations = locations
+        self.quaternions = quaternions
+        self.ended = ended
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def line(self, index: int) -> ExportLine:
+        return ExportLine(self, index)
+
+    @staticmethod
+    def concatenate(blocks: List['ExportData']) -> 'ExportData':
+        """Join consecutive blocks; the result is ended if the last block is."""
+        return ExportData(
+            np.concatenate([data.frame for data in blocks]),
+            np.concatenate([data.replay_frame for data in blocks]),
+            np.concatenate([data.fov for data in blocks]),
+            {prefix: np.concatenate([data.locations[prefix] for data in blocks]) for prefix in blocks[0].locations},
+            {prefix: np.concatenate([data.quaternions[prefix] for data in blocks]) for prefix in blocks[0].quaternions},
+            blocks[-1].ended
+        )
+
+    def take(self, indices) -> 'ExportData':
+        """Rows at indices (an index array, boolean mask or slice) as a new ExportData."""
+        return ExportData(
+            self.frame[indices],
+            self.replay_frame[indices],
+            self.fov[indices],
+            {prefix: locations[indices] for prefix, locations in self.locations.items()},
+            {prefix: quaternions[indices] for prefix, quaternions in self.quaternions.items()},
+            self.ended
+        )
+
+
+# Columnar Parser
+class ColumnarParser:
+    """Parses the data section of an export into NumPy arrays in one pass.
+
+    Every data line is expanded to a fixed number of numeric columns (commas
+    inside the _LOC/_QUAT fields become separators), so the whole section can
+    be converted with a single array constructor and sliced per object.
+
+    When only some objects are wanted, every line is first cut down to the
+    fields of those objects, so the columns of the others are never converted.
+    """
+    prefixes: List[str] = None
+    columns: Dict[str, int] = None
+    width: int = 0
+    tokens: List[int] = None
+    reduce: bool = False
+    pattern = None
+    replacement: str = ''
+
+    def __init__(self, consts: dict, prefixes: Optional[List[str]] = None):
+        self.consts = consts
+        all_prefixes = [key[:-len('_LOC')] for key in consts if key.endswith('_LOC')]
+        self.prefixes = [prefix for prefix in all_prefixes if prefixes is None or prefix in prefixes]
+
+        widths = {}
+        for prefix in all_prefixes:
+            widths[consts[prefix + '_LOC']] = LOC_WIDTH
+            widths[consts[prefix + '_QUAT']] = QUAT_WIDTH
+        token_count = max(widths.keys()) + 1
+
+        wanted = {consts['FRAME'], consts['REPLAY_FRAME'], consts['FOV']}
+        for prefix in self.prefixes:
+            wanted.update((consts[prefix + '_LOC'], consts[prefix + '_QUAT']))
+        # cutting lines down only pays off when it drops a good part of them
+        self.reduce = len(wanted) < token_count * 0.75
+        self.tokens = sorted(wanted) if self.reduce else list(range(token_count))
+
+        # map each decoded token of a line to its first expanded column
+        offsets = {}
+        offset = 0
+        for token in self.tokens:
+            offsets[token] = offset
+            offset += widths.get(token, 1)
+        self.width = offset
+
+        self.columns = {
+            'FRAME': offsets[consts['FRAME']],
+            'REPLAY_FRAME': offsets[consts['REPLAY_FRAME']],
+            'FOV': offsets[consts['FOV']],
+        }
+        for prefix in self.prefixes:
+            self.columns[prefix + '_LOC'] = offsets[consts[prefix + '_LOC']]
+            self.columns[prefix + '_QUAT'] = offsets[consts[prefix + '_QUAT']]
+        return
+
+    def set_pattern(self, line: str):
+        """Build the expression that keeps only the decoded tokens' fields, from the tab layout of a data line.
+
+        Tokens are the non-empty tab separated fields of a line.
+        """
+        fields = [index for index, field in enumerate(line.rstrip('\n').split('\t')) if field]
+        if len(fields) <= self.tokens[-1]:
+            raise Exception('Malformed data line of animation export: expected at least {} values, found {}'.format(
+                self.tokens[-1] + 1, len(fields)))
+        kept = {fields[token] for token in self.tokens}
+        last = fields[self.tokens[-1]]
+        parts = []
+        for field in range(last):
+            parts.append('([^\\t\\n]*)\\t' if field in kept else '[^\\t\\n]*\\t')
+        parts.append('([^\\t\\n]*)[^\\n]*')
+        self.pattern = re.compile('^' + ''.join(parts), re.MULTILINE)
+        self.replacement = '\t'.join('\\{}'.format(group + 1) for group in range(len(self.tokens)))
+        return
+
+    def reduce_text(self, text: str) -> str:
+        if self.pattern is None:
+            first = text.lstrip('\n').split('\n', 1)[0]
+            if not first:
+                return text
+            self.set_pattern(first)
+        return self.pattern.sub(self.replacement, text)
+
+    def parse(self, fp: TextIO) -> ExportData:
+        """Parse every remaining data line of fp up to the END line."""
+        return self.parse_text(fp.read())
+
+    def parse_blocks(self, fp: TextIO, block_size: int) -> Iterator[ExportData]:
+        """Parse the remaining data lines of fp in blocks of at most block_size lines."""
+        first_line = 1
+        while True:
+            lines = list(islice(fp, block_size))
+            if not lines:
+                return
+            data = self.parse_text(''.join(lines), first_line)
+            first_line += len(lines)
+            yield data
+            if data.ended:
+                return
+
+    def parse_text(self, text: str, first_line: int = 1) -> ExportData:
+        ended = False
+        end = self.find_end(text)
+        if end is not None:
+            text = text[:end]
+            ended = True
+
+        if self.reduce:
+            text = self.reduce_text(text)
+        tokens = text.replace(',', ' ').split()
+        if len(tokens) % self.width:
+            self.raise_malformed(text, first_line)
+        try:
+            table = np.array(tokens, dtype=np.float64)
+        except ValueError:
+            self.raise_malformed(text, first_line)
+        table = table.reshape((-1, self.width))
+        return self.to_export_data(table, ended)
+
+    def to_export_data(self, table: np.ndarray, ended: bool = False) -> ExportData:
+        locations = {}
+        quaternions = {}
+        for prefix in self.prefixes:
+            loc = self.columns[prefix + '_LOC']
+            quat = self.columns[prefix + '_QUAT']
+            locations[prefix] = np.round(table[:, loc:loc + LOC_WIDTH], 6)
+            quaternions[prefix] = np.round(table[:, quat:quat + QUAT_WIDTH], 6)
+
+        return ExportData(
+            table[:, self.columns['FRAME']].astype(np.int64),
+            table[:, self.columns['REPLAY_FRAME']].astype(np.int64),
+            table[:, self.columns['FOV']].copy(),
+            locations,
+            quaternions,
+            ended
+        )
+
+    @staticmethod
+    def find_end(text: str) -> Optional[int]:
+        if text.startswith('END'):
+            return 0
+        end = text.find('\nEND')
+        return None if end < 0 else end + 1
+
+    def raise_malformed(self, text: str, first_line: int = 1):
+        for line_num, line in enumerate(text.splitlines(), first_line):
+            tokens = line.replace(',', ' ').split()
+            if not tokens:
+                continue
+            if len(tokens) != self.width:
+                raise Exception('Malformed data line {} of animation export: expected {} values, found {}'.format(
+                    line_num, self.width, len(tokens)))
+            try:
+                [float(x) for x in tokens]
+            except ValueError:
+                raise Exception('Malformed data line {} of animation export: non-numeric value'.format(line_num))
+        raise Exception('Malformed data section in animation export')
@@ -0,0 +1,92 @@
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Iterator, Tuple
+
+
+# Build Pipeline
+class BuildPipeline:
+    """Runs a processor's build steps on a background thread, handing what is ready to write to the main thread
+    through a bounded queue.
+
+    Items are (kind, payload, progress) tuples: ('keys', the objects' keys added by a block, progress) when keys
+    can be inserted as they are parsed, ('progress', None, progress) otherwise, and finally ('done', animation,
+    progress). The thread blocks while the queue is full, so it never gets more than queue_size items ahead of
+    the writer. While the thread has nothing ready, items() yields ('wait', None, None) every wait_interval
+    seconds instead of blocking, so a caller stepping through it keeps to its time budget. An exception on the
+    thread is raised again by items() on the main thread.
+    """
+    queue_size: int = 4
+    # seconds between checks for a stop while waiting on the queue
+    poll_interval: float = 0.1
+    # seconds items() waits for the next item before handing control back to the caller
+    wait_interval: float = 0.01
+    # longest wait for the thread to end after a stop; it is a daemon, so one still busy does not block exit
+    stop_timeout: float = 5.0
+
+    def __init__(self, processor, queue_size: int = 4):
+        self.processor = processor
+        self.queue_size = queue_size
+        self.stream_keys = processor.can_stream_keys()
+        self.queue = Queue(queue_size)
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, name='Cinematics Buddy build', daemon=True)
+        return
+
+    def start(self):
+        self.thread.start()
+
+    def put(self, item: tuple) -> bool:
+        """Put item on the queue, waiting for room; returns False if the pipeline was stopped meanwhile."""
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=self.poll_interval)
+                return True
+            except Full:
+                continue
+        return False
+
+    def run(self):
+        steps = self.processor.build_steps()
+        try:
+            while True:
+                try:
+                    progress = next(steps)
+                except StopIteration as stop:
+                    self.put(('done', stop.value, ('parse', 1.0)))
+                    return
+                if self.stream_keys:
+                    item = ('keys', self.processor.get_key_batch(), progress)
+                else:
+                    item = ('progress', None, progress)
+                if not self.put(item):
+                    steps.close()
+                    return
+        except BaseException as error:
+            self.put(('error', error, None))
+        return
+
+    def items(self) -> Iterator[Tuple[str, Any, Tuple[str, float]]]:
+        """The thread's items up to and including 'done', with 'wait' items while none is ready."""
+        while True:
+            try:
+                kind, payload, progress = self.queue.get(timeout=self.wait_interval)
+            except Empty:
+                yield 'wait', None, None
+                continue
+            if kind == 'error':
+                raise payload
+            yield kind, payload, progress
+            if kind == 'done':
+                return
+
+    def stop(self):
+        """Stop the thread, e.g. when the write was cancelled, and wait for it."""
+        self.stopped.set()
+        # make room, so a thread blocked on a full queue sees the stop
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                break
+        self.thread.join(self.stop_timeout)
+        return
@@ -1,8 +1,22 @@
 from abc import ABC, abstractmethod
+import hashlib
 import json
-from .keyframers import BallKeyframer, CameraKeyframer, CarKeyframer
+from .animation import Animation, ObjectAnimation
+from .cache import ParseCache
+from .chunking import ChunkedParser
+from .compression import get_compression, open_export
+from .following import FileFollower
+from .instrumentation import Instrumentation, Progress
+from .parsers import ColumnarParser, ExportData, parse_title_line
+from .pipeline import BuildPipeline
+from .retiming import TimeMap
+from .seeking import FrameSeeker
+from .stepping import run_steps
+from .timing import SegmentTiming
+from .tracks import BallTrack, CameraTrack, CarTrack
 from math import ceil
-from typing import Dict, List, Optional
+import numpy as np
+from typing import Dict, Generator, Iterator, List, Optional, TextIO, Tuple
 
 
 consts = {
@@ -54,7 +68,32 @@ class FileProcessor(ABC):
     maintain_sensor_focal_ratio: bool = None
     print_progress: bool = False
     blender_start_frame: int = 1
+    bulk_keyframes: bool = False
+    block_size: int = 4096
+    parse_cache: Optional[ParseCache] = None
+    resample: bool = False
+    location_tolerance: float = 0.0
+    rotation_tolerance: float = 0.0
+    lossless: bool = False
+    threaded: bool = False
+    queue_size: int = 4
+    parse_workers: int = 1
+    parse_chunk_size: int = 32 * 1024 * 1024
+    parse_executable: Optional[str] = None
+    # a keyframers.SharedActions and a keyframers.Preview handed to the writer
+    shared_actions = None
+    preview = None
+    instrumentation: Instrumentation = None
+    time_map: Optional[TimeMap] = None
+    follow: bool = False
+    follow_poll_interval: float = 0.25
+    follow_timeout: float = 60.0
     objs: list = None
+    consts: dict = None
+    objects: Optional[List[str]] = None
+    columns: Dict[str, int] = None
+    # the column titles line has to turn up within this many lines
+    header_limit: int = 64
 
     def __init__(
             self,
@@ -70,12 +109,14 @@ class FileProcessor(ABC):
             sensor_width: float,
             maintain_sensor_focal_ratio: bool,
             print_progress: bool,
-            blender_start_frame: int
+            blender_start_frame: int,
+            bulk_keyframes: bool = False
     ):
-        global consts
-        consts['CAR_PROXY_NAME'] = proxies['CAR_PROXY_NAME']
-        consts['BALL_PROXY_NAME'] = proxies['BALL_PROXY_NAME']
-        consts['STADIUM_PROXY_NAME'] = proxies['STADIUM_PROXY_NAME']
+        # a copy per processor, so processors with different proxies can run side by side
+        self.consts = dict(consts)
+        self.consts['CAR_PROXY_NAME'] = proxies['CAR_PROXY_NAME']
+        self.consts['BALL_PROXY_NAME'] = proxies['BALL_PROXY_NAME']
+        self.consts['STADIUM_PROXY_NAME'] = proxies['STADIUM_PROXY_NAME']
 
         self.filepath = filepath
         self.unit_scale = unit_scale
@@ -89,6 +130,8 @@ class FileProcessor(ABC):
         self.maintain_sensor_focal_ratio = maintain_sensor_focal_ratio
         self.print_progress = print_progress
         self.blender_start_frame = blender_start_frame
+        self.bulk_keyframes = bulk_keyframes
+        self.instrumentation = Instrumentation()
 
         self.objs: List[dict] = [
             {'type': 'camera', 'prefix': 'CAM', 'obj': None},
@@ -132,159 +175,464 @@ class FileProcessor(ABC):
                     highest_subframe = highest_obj_subframe
         return highest_subframe
 
-    def process(self) -> None:
-        headers = {}
-        frame = 0
-        # if self.print_progress:
-        #     file_len = self.get_file_len(self.filepath)
-        self.log("Loading header.")
-        with open(self.filepath) as fp:
-            line_num = 0
-            for line in fp:
-                line_num += 1
-                if line_num < consts['DATA_LINE_START']:
-                    if line_num < consts['HEADER_END']:
-                        self.add_cb_header(headers, line)
-                    continue
+    def read_header(self, fp: TextIO, headers: dict) -> None:
+        """Read the header block (up to the first blank line) into headers and the data line layout from the
+        column titles line, leaving fp at the first data line."""
+        with self.instrumentation.stage('header'):
+            in_header = True
+            # readline() rather than iterating, so fp.tell() keeps working for seek_start()
+            for line_num, line in enumerate(iter(fp.readline, ''), 1):
+                if line.startswith('Frame\t'):
+                    self.columns = self.get_columns(parse_title_line(line))
+                    return
+                if not line.strip():
+                    in_header = False
+                elif in_header:
+                    self.add_cb_header(headers, line)
+                if line_num >= self.header_limit:
+                    break
+        raise Exception('No column titles line found in animation export: {}'.format(self.filepath))
+
+    def get_columns(self, positions: Optional[Dict[str, int]]) -> Dict[str, int]:
+        """Token positions from the column titles line, falling back to the usual layout."""
+        if positions is None:
+            return self.consts
+        columns = {key: value for key, value in self.consts.items() if not key.endswith(('_LOC', '_QUAT'))}
+        columns.update(positions)
+        return columns
+
+    def get_prefixes(self, headers: dict) -> List[str]:
+        """Prefixes of the objects to decode: the selected ones among the camera, ball and the export's cars."""
+        prefixes = []
+        for index, obj in enumerate(self.objs):
+            if obj['type'] == 'car' and index - 2 >= headers.get('cars', len(self.objs)):
+                continue
+            if self.objects is None or obj['prefix'] in self.objects:
+                prefixes.append(obj['prefix'])
+        return prefixes
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
+
+    def set_objects(self, objects: Optional[List[str]]):
+        """Import only the objects with these prefixes (CAM, BALL, CAR1...); None imports all of them."""
+        self.objects = objects
+
+    def set_follow(self, follow: bool, poll_interval: float = 0.25, timeout: float = 60.0):
+        """Read an export that is still being written, keying lines as they are appended until its END line.
+
+        Gives up if the export does not grow for timeout seconds. Waiting for lines blocks the build, so a followed
+        import builds on the background thread (set_threaded) with keys written as they are read.
+        """
+        self.follow = follow
+        self.follow_poll_interval = poll_interval
+        self.follow_timeout = timeout
+
+    def set_parse_cache(self, parse_cache: Optional[ParseCache]):
+        self.parse_cache = parse_cache
+
+    def set_resample(self, resample: bool):
+        self.resample = resample
+
+    def set_decimation(self, location_tolerance: float, rotation_tolerance: float):
+        self.location_tolerance = location_tolerance
+        self.rotation_tolerance = rotation_tolerance
+
+    def set_lossless(self, lossless: bool):
+        self.lossless = lossless
+
+    def set_threaded(self, threaded: bool, queue_size: int = 4):
+        """Build on a background thread while the calling thread writes (see BuildPipeline); queue_size bounds how
+        many blocks the build may get ahead of the writes."""
+        self.threaded = threaded
+        self.queue_size = queue_size
+
+    def set_parse_workers(self, workers: int, executable: Optional[str] = None):
+        """Parse uncompressed exports in a pool of this many processes (0 uses every CPU, 1 parses here); see
+        ChunkedParser. executable is the Python interpreter the workers run."""
+        self.parse_workers = workers
+        self.parse_executable = executable
+
+    def set_shared_actions(self, shared_actions):
+        self.shared_actions = shared_actions
+
+    def set_preview(self, preview):
+        self.preview = preview
+
+    def can_stream_keys(self) -> bool:
+        """Whether keys can be written as they are parsed: in insert mode, when finishing leaves the keys as added."""
+        return not (self.bulk_keyframes or self.resample or self.lossless or self.location_tolerance > 0.0
+                    or self.rotation_tolerance > 0.0 or self.preview is not None)
+
+    def get_key_batch(self) -> List[ObjectAnimation]:
+        """The keys every object gained since the last call, as partial animations."""
+        return [obj['obj'].take_added_keys() for obj in self.objs if obj['obj'] is not None]
+
+    def get_cache_variant(self) -> str:
+        """Names the part of the export a cache entry holds: the selected objects' columns of every data line."""
+        return hashlib.sha1(json.dumps(self.objects).encode()).hexdigest()[:16]
+
+    def read_cached_blocks(self, headers: dict) -> Iterator[ExportData]:
+        variant = self.get_cache_variant()
+        key, cached = self.parse_cache.load(self.filepath, variant)
+        if cached is not None:
+            self.log("Using cached parse of {}".format(self.filepath))
+            headers.update(cached[0])
+            data = cached[1]
+            # the entry is whole, the range starts at the first line at or past replay_frame_start
+            yield from self.split_blocks(data.take(slice(np.searchsorted(data.replay_frame, self.replay_frame_start),
+                                                         None)))
+            return
+
+        # decode from the first line to the end whatever the replay frame range, so the entry stays whole
+        blocks = []
+        last = None
+        compression = get_compression(self.filepath)
+        with open_export(self.filepath, compression) as fp:
+            self.read_header(fp, headers)
+            decoded = self.decode_blocks(fp, compression, headers, False)
+            for data in decoded:
+                blocks.append(data)
+                if data.ended or np.any(data.replay_frame > self.replay_frame_end):
+                    # select_blocks stops at this block, so the lines after it are decoded for the entry first
+                    blocks.extend(decoded)
+                    last = data
+                    break
+                yield data
+        if blocks:
+            data = ExportData.concatenate(blocks)
+        else:
+            data = ColumnarParser(self.columns, self.get_prefixes(headers)).parse_text('')
+        self.parse_cache.save(self.filepath, headers, data, key, variant)
+        if last is not None:
+            yield last
+        return
 
-                line = line.split()
+    def split_blocks(self, data: ExportData) -> Iterator[ExportData]:
+        """data's lines in blocks of up to block_size lines; only the last can be ended."""
+        for start in range(0, max(len(data), 1), self.block_size):
+            block = data.take(slice(start, start + self.block_size))
+            block.ended = data.ended and start + self.block_size >= len(data)
+            yield block
+        return
 
-                if line[consts['FRAME']] == "END" or int(line[consts['REPLAY_FRAME']]) > self.replay_frame_end:
-                    self.process_end(line, frame, headers)
-                    break
+    def parse_chunks(self, data_start: int, prefixes: Optional[List[str]]) -> Iterator[ExportData]:
+        """Parse the data lines from byte data_start on in a pool of processes, chunk by chunk."""
+        parser = ChunkedParser(self.columns, prefixes, self.parse_workers, self.parse_chunk_size)
+        parser.set_executable(self.parse_executable)
+        for data in parser.parse(self.filepath, data_start):
+            self.instrumentation.count('parse_chunks')
+            yield data
+        return
 
-                if int(line[consts['REPLAY_FRAME']]) < self.replay_frame_start:
-                    continue
+    def read_blocks(self, headers: dict) -> Iterator[ExportData]:
+        """Yield the export's data section in blocks of up to block_size lines; the last block is flagged
+        as ended if the END line was reached."""
+        if self.follow:
+            yield from self.follow_blocks(headers)
+            return
+        if self.parse_cache is not None:
+            yield from self.read_cached_blocks(headers)
+            return
+
+        compression = get_compression(self.filepath)
+        with open_export(self.filepath, compression) as fp:
+            self.read_header(fp, headers)
+            yield from self.decode_blocks(fp, compression, headers)
+        return
+
+    def decode_blocks(self, fp: TextIO, compression, headers: dict, seek: bool = True) -> Iterator[ExportData]:
+        """Decode the selected objects' columns of the data lines from fp, which is past the header, in blocks;
+        seek skips the lines before replay_frame_start first."""
+        # a compressed stream cannot be bisected, select_blocks drops the lines before the range instead
+        if compression is None:
+            if seek:
+                self.seek_start(fp)
+            if self.parse_workers != 1:
+                for data in self.parse_chunks(fp.tell(), self.get_prefixes(headers)):
+                    yield from self.split_blocks(data)
+                return
+        parser = ColumnarParser(self.columns, self.get_prefixes(headers))
+        yield from parser.parse_blocks(fp, self.block_size)
+        return
+
+    def follow_blocks(self, headers: dict) -> Iterator[ExportData]:
+        """Yield a block for every batch of lines appended to the export, up to the END line."""
+        if get_compression(self.filepath) is not None:
+            raise Exception('Compressed animation exports cannot be followed: ' + self.filepath)
+        with open(self.filepath, 'rb') as fp:
+            follower = FileFollower(fp, self.follow_poll_interval, self.follow_timeout)
+            self.read_header(follower, headers)
+            parser = ColumnarParser(self.columns, self.get_prefixes(headers))
+            first_line = 1
+            while True:
+                text = follower.read_lines()
+                data = parser.parse_text(text, first_line)
+                first_line += text.count('\n')
+                self.instrumentation.count('follow_batches')
+                yield data
+                if data.ended or follower.ended:
+                    return
+
+    def seek_start(self, fp: TextIO):
+        """Move fp from the first data line to the first line at or past replay_frame_start."""
+        if self.replay_frame_start <= 0:
+            return
+        with self.instrumentation.stage('seek'):
+            data_start = fp.tell()
+            with open(self.filepath, 'rb') as binary_fp:
+                offset = FrameSeeker(binary_fp, self.columns['REPLAY_FRAME'], data_start).find(self.replay_frame_start)
+            fp.seek(offset)
+        self.instrumentation.count('bytes_skipped', offset - data_start)
+        return
+
+    def select_blocks(self, blocks: Iterator[ExportData]) -> Iterator[ExportData]:
+        """Yield the lines within the replay frame range, stopping at END or the first line past the range."""
+        for data in blocks:
+            # replay frames are monotonic, so the first line past the end ends processing
+            past_end = np.flatnonzero(data.replay_frame > self.replay_frame_end)
+            selected = data.take(slice(0, past_end[0])) if len(past_end) else data
+            selected = selected.take(selected.replay_frame >= self.replay_frame_start)
+            if len(selected):
+                yield selected
+            if len(past_end) or data.ended:
+                break
+        return
+
+    def build(self) -> Animation:
+        """Run the import up to the finished animation, without touching Blender."""
+        return run_steps(self.build_steps())
+
+    def build_steps(self) -> Generator[Tuple[str, float], None, Animation]:
+        """build() one block of lines per step, yielding ('parse', fraction of the header's frame count read);
+        returns the animation."""
+        headers = {}
+        instrumentation = self.instrumentation
+        self.log("Loading header.")
+        blocks = self.count_blocks(instrumentation.time_iterator('parse', self.read_blocks(headers)), headers)
+        for subframes, data in instrumentation.time_iterator('timing', self.time_blocks(self.select_blocks(blocks),
+                                                                                         headers)):
+            with instrumentation.stage('keyframe'):
+                self.process_objects(headers, data, subframes)
+            instrumentation.count('lines_keyed', len(data))
+            yield 'parse', self.get_fraction_read(headers)
+        instrumentation.count('lines_skipped', instrumentation.counters.get('lines_read', 0)
+                              - instrumentation.counters.get('lines_keyed', 0))
+
+        with instrumentation.stage('finish'):
+            animation = Animation(headers, self.finish_objects())
+        animation.fps = int(self.target_fps)
+        highest_subframe = self.get_highest_subframe()
+        if highest_subframe:
+            animation.frame_start = self.blender_start_frame
+            animation.frame_end = ceil(highest_subframe)
+        return animation
+
+    def get_fraction_read(self, headers: dict) -> float:
+        frames = headers.get('frames', 0)
+        return min(self.instrumentation.counters.get('lines_read', 0) / frames, 1.0) if frames else 0.0
+
+    def count_blocks(self, blocks: Iterator[ExportData], headers: dict) -> Iterator[ExportData]:
+        """Count the lines read and report progress against the header's frame count."""
+        progress = None
+        lines_read = 0
+        for data in blocks:
+            if progress is None:
+                progress = Progress(self.log, headers.get('frames', 0))
+            lines_read += len(data)
+            self.instrumentation.count('lines_read', len(data))
+            progress.update(lines_read)
+            yield data
+        return
 
-                self.log("Processing replay frame: {} ".format(
-                    line[consts['REPLAY_FRAME']] + " " * 10))
-                self.process_line(line, frame, headers)
-                frame += 1
-            fp.close()
-            self.scn.render.fps = int(self.target_fps)
-            highest_subframe = self.get_highest_subframe()
-            if highest_subframe:
-                self.scn.frame_start = self.blender_start_frame
-                self.scn.frame_end = ceil(highest_subframe)
-            self.log('Processing complete.')
+    def process(self) -> Animation:
+        return run_steps(self.process_steps())
+
+    def process_steps(self) -> Generator[Tuple[str, float], None, Animation]:
+        """process() in steps: the steps of build_steps(), then those of write_steps(); when threaded, the steps
+        of pipeline_steps()."""
+        if self.threaded:
+            animation = yield from self.pipeline_steps()
+        else:
+            animation = yield from self.build_steps()
+            yield from self.write_steps(animation)
+        self.log('Processing complete.')
+        self.log(self.instrumentation.format_summary())
+        return animation
+
+    def write(self, animation: Animation):
+        run_steps(self.write_steps(animation))
         return
 
+    def write_steps(self, animation: Animation) -> Generator[Tuple[str, float], None, None]:
+        yield from self.create_writer(self.instrumentation).write_steps(animation)
+        return
+
+    def create_writer(self, instrumentation: Instrumentation):
+        # imported here so everything up to build() runs without bpy
+        from .keyframers import AnimationWriter
+        writer = AnimationWriter(self.scn, self.consts, self.bulk_keyframes)
+        writer.set_instrumentation(instrumentation)
+        writer.set_shared_actions(self.shared_actions)
+        writer.set_preview(self.preview)
+        return writer
+
+    def pipeline_steps(self) -> Generator[Tuple[str, float], None, Animation]:
+        """Build on a background thread and write on this one: keys as their blocks are parsed if they can be
+        streamed, otherwise the animation once it is built. A step per item of the pipeline; waiting for the
+        thread yields steps without progress (None)."""
+        # stages nest on a stack, so the writes are timed separately from the thread and merged in at the end
+        write_instrumentation = Instrumentation()
+        writer = self.create_writer(write_instrumentation)
+        pipeline = BuildPipeline(self, self.queue_size)
+        animation = None
+        pipeline.start()
+        try:
+            for kind, payload, progress in write_instrumentation.time_iterator('wait', pipeline.items()):
+                if kind == 'keys':
+                    writer.write_keys(payload)
+                elif kind == 'done':
+                    animation = payload
+                yield progress
+        finally:
+            pipeline.stop()
+        if pipeline.stream_keys:
+            writer.finish_keys(animation)
+        else:
+            yield from writer.write_steps(animation)
+        self.instrumentation.merge(write_instrumentation)
+        return animation
+
+    def finish_objects(self) -> List[ObjectAnimation]:
+        animations = []
+        for obj in self.objs:
+            if obj['obj'] is not None:
+                animations.append(obj['obj'].finish())
+                self.instrumentation.count('keys_dropped_lossless', obj['obj'].keys_dropped)
+                for data_path, (kept, total, max_error) in obj['obj'].decimation_report.items():
+                    self.log("{} {}: kept {} of {} keys, max error {:.6f}".format(
+                        obj['prefix'], data_path, kept, total, max_error))
+        return animations
+
     def log(self, msg: str):
         if self.print_progress:
             print(msg, flush=True)
 
     @abstractmethod
-    def process_line(self, line: list, frame: int, headers: dict):
+    def time_blocks(self, blocks: Iterator[ExportData], headers: dict) -> Iterator[Tuple[np.ndarray, ExportData]]:
+        """Yield (subframes, data) for the lines to keyframe."""
         return
 
     @abstractmethod
-    def process_end(self, line: list, frame: int, headers: dict):
+    def process_objects(self, headers: dict, data: ExportData, subframes: np.ndarray):
         return
 
-    def create_camera_keyframer(
+    def create_camera_track(
             self,
             prefix: str,
             headers: dict,
-            scn,
             unit_scale,
             include_frame_nums: bool,
 
-    ) -> CameraKeyframer:
-        keyframer = CameraKeyframer(
+    ) -> CameraTrack:
+        track = CameraTrack(
             prefix,
             headers,
-            consts,
-            scn,
+            self.consts,
             unit_scale,
             include_frame_nums,
             self.sensor_width,
             self.maintain_sensor_focal_ratio
         )
-        keyframer.set_blender_start_frame(self.blender_start_frame)
-        return keyframer
-
-    def create_ball_keyframer(
+        track.set_blender_start_frame(self.blender_start_frame)
+        track.set_resample(self.resample)
+        track.set_decimation(self.location_tolerance, self.rotation_tolerance)
+        track.set_lossless(self.lossless)
+        track.set_time_map(self.time_map)
+        return track
+
+    def create_ball_track(
             self,
             prefix: str,
             headers: dict,
-            scn,
             unit_scale,
             color=(1, 1, 1, 1)
-    ) -> BallKeyframer:
-        keyframer = BallKeyframer(
+    ) -> BallTrack:
+        track = BallTrack(
             prefix,
             headers,
-            consts,
-            scn,
+            self.consts,
             unit_scale,
             color
         )
-        keyframer.set_blender_start_frame(self.blender_start_frame)
-        return keyframer
-
-    def create_car_keyframer(
+        track.set_blender_start_frame(self.blender_start_frame)
+        track.set_resample(self.resample)
+        track.set_decimation(self.location_tolerance, self.rotation_tolerance)
+        track.set_lossless(self.lossless)
+        track.set_time_map(self.time_map)
+        return track
+
+    def create_car_track(
             self,
             prefix: str,
             headers: dict,
-            scn,
             unit_scale,
             color=(1, 1, 1, 1)
-    ) -> CarKeyframer:
-        keyframer = CarKeyframer(
+    ) -> CarTrack:
+        track = CarTrack(
             prefix,
             headers,
-            consts,
-            scn,
+            self.consts,
             unit_scale,
             color
         )
-        keyframer.set_blender_start_frame(self.blender_start_frame)
-        return keyframer
+        track.set_blender_start_frame(self.blender_start_frame)
+        track.set_resample(self.resample)
+        track.set_decimation(self.location_tolerance, self.rotation_tolerance)
+        track.set_lossless(self.lossless)
+        track.set_time_map(self.time_map)
+        return track
 
 
 class LinesProcessor(FileProcessor):
-    __subframe_scale: float = None
 
-    def process_line(self, line: list, frame: int, headers: dict):
-        if self.__subframe_scale is None:
+    def time_blocks(self, blocks: Iterator[ExportData], headers: dict) -> Iterator[Tuple[np.ndarray, ExportData]]:
+        frame = 0
+        for data in blocks:
             target_fps = self.target_fps if self.target_fps else headers['framerate']
-            self.__subframe_scale = target_fps / headers['framerate']
-        subframe = frame * self.__subframe_scale
-        self.process_objects(headers, line, subframe)
+            subframe_scale = target_fps / headers['framerate']
+            yield np.arange(frame, frame + len(data)) * subframe_scale, data
+            frame += len(data)
         return
 
-    def process_end(self, line: list, frame: int, headers: dict):
-        return
-
-    def process_objects(self, headers: dict, line: list, subframe: float):
+    def process_objects(self, headers: dict, data: ExportData, subframes: np.ndarray):
         for index, obj in enumerate(self.objs):
+            if obj['prefix'] not in data.locations or (self.objects is not None and obj['prefix'] not in self.objects):
+                continue
             if obj['obj'] is None:
                 if obj['type'] == 'camera':
-                    obj['obj'] = self.create_camera_keyframer(
+                    obj['obj'] = self.create_camera_track(
                         obj['prefix'],
                         headers,
-                        self.scn,
                         self.unit_scale,
                         self.include_frame_nums
                     )
                 elif obj['type'] == 'ball':
-                    obj['obj'] = self.create_ball_keyframer(
+                    obj['obj'] = self.create_ball_track(
                         obj['prefix'],
                         headers,
-                        self.scn,
                         self.unit_scale
                     )
                 elif index - 2 < headers['cars']:
-                    obj['obj'] = self.create_car_keyframer(
+                    obj['obj'] = self.create_car_track(
                         obj['prefix'],
                         headers,
-                        self.scn,
                         self.unit_scale,
                         obj['color']
                     )
                 else:
                     continue
-            obj['obj'].add_subframe(subframe, line)
+            obj['obj'].add_subframes(subframes, data)
         return
 
 
@@ -298,106 +646,116 @@ class Segment:
 class SegmentsProcessor(LinesProcessor):
     snapshots: list = None
     segments: List[Segment] = None
-    segment_lines = []
-    __current_segment: int = 0
+    timing: SegmentTiming = None
+    time_remap: bool = False
 
     def set_snapshot_file(self, snapshot_filename: str):
+        self.snapshots = self.load_snapshots(snapshot_filename)
+
+    def set_time_remap(self, time_remap: bool):
+        """Key on replay time and leave the snapshot timing to the animation's time map, so it can be retimed."""
+        self.time_remap = time_remap
+
+    @staticmethod
+    def load_snapshots(snapshot_filename: str) -> list:
         try:
             with open(snapshot_filename) as f:
-                snapshots = dict(sorted(json.load(f).items()))
-                self.snapshots = list(snapshots.values())
+                snapshots = sorted(json.load(f).items(), key=lambda item: float(item[0]))
+                snapshots = [snapshot for key, snapshot in snapshots]
         except Exception:
             raise Exception('Unable to parse snapshot file: {} Ensure file is readable and '
                             'contains valid JSON'.format(snapshot_filename))
 
-        if len(self.snapshots) < 1:
+        if len(snapshots) < 1:
             raise Exception('No snapshots in file: {}'.format(snapshot_filename))
+        return snapshots
 
-    def process_line(self, line: list, frame: int, headers: dict):
-        segment = self.get_current_segment()
-        if segment is not None:
-            replay_frame = int(line[consts['REPLAY_FRAME']])
-            if not replay_frame < segment.out_frame:
-                self.write_out_lines(segment, headers)
-                self.segment_lines = []
-                self.__current_segment += 1
-            if replay_frame >= segment.start_frame:
-                self.segment_lines.append(line)
-
-    def process_end(self, line: list, frame: int, headers: dict):
-        segment = self.get_current_segment()
-        if segment is not None:
-            self.write_out_lines(segment, headers)
-
-    def write_out_lines(self, segment: Segment, headers: dict):
-        line_len = len(self.segment_lines)
-        if line_len:
-            parts: Dict[str, List] = {}
-            for x in range(line_len):
-                replay_frame_num = str(self.segment_lines[x][consts['REPLAY_FRAME']])
-                if replay_frame_num not in parts.keys():
-                    parts[replay_frame_num] = [self.segment_lines[x]]
-                else:
-                    parts[replay_frame_num].append(self.segment_lines[x])
-
-            prev_subframe = 0.0
-            prev_replay_frame = 0
-
-            expected_parts_count = segment.out_frame - segment.start_frame
-            part_duration = segment.duration / expected_parts_count
-            for e in range(expected_parts_count):
-                ep = segment.start_frame + e
-                if str(ep) in parts.keys():
-                    replay_frames_count = len(parts[str(ep)])
-                    replay_frame_duration = part_duration / replay_frames_count
-                    for r in range(replay_frames_count):
-                        subframe = (segment.start_time * self.target_fps) + (e * part_duration * self.target_fps)\
-                                   + (r * replay_frame_duration * self.target_fps)
-
-                        if subframe < prev_subframe:
-                            self.log("subframe {} less than {}".format(subframe, prev_subframe))
-                        prev_subframe = subframe
-
-                        replay_frame = int(parts[str(ep)][r][0])
-                        if replay_frame < prev_replay_frame:
-                            self.log("replay_frame {} less than {}".format(replay_frame, prev_replay_frame))
-                        prev_replay_frame = replay_frame
-
-                        self.process_objects(headers, parts[str(ep)][r], subframe)
-                else:
-                    continue
+    @staticmethod
+    def group_blocks(blocks: Iterator[ExportData]) -> Iterator[ExportData]:
+        """Re-cut blocks so that lines sharing a replay frame are never split between two blocks.
+
+        Only the trailing run of the latest replay frame is carried over to the next block.
+        """
+        carry = None
+        for data in blocks:
+            if carry is not None:
+                data = ExportData.concatenate([carry, data])
+            last = data.replay_frame != data.replay_frame[-1]
+            boundary = len(data) - int(np.argmax(last[::-1])) if last.any() else 0
+            carry = data.take(slice(boundary, None))
+            if boundary:
+                yield data.take(slice(0, boundary))
+        if carry is not None:
+            yield carry
         return
 
-    def get_current_segment(self) -> Optional[Segment]:
+    def build_steps(self) -> Generator[Tuple[str, float], None, Animation]:
+        # the snapshots set the replay frame range, which has to be known before seeking into the export
         if self.segments is None:
             self.init_segments()
-        if self.__current_segment < len(self.segments):
-            return self.segments[self.__current_segment]
-        return None
+        animation = yield from super().build_steps()
+        if self.time_remap:
+            animation.time_map = self.time_map
+            if animation.frame_end is not None:
+                animation.action_frame_end = self.get_highest_subframe()
+                animation.frame_end = animation.time_map.get_scene_frame_end(animation.action_frame_end)
+        return animation
+
+    def time_blocks(self, blocks: Iterator[ExportData], headers: dict) -> Iterator[Tuple[np.ndarray, ExportData]]:
+        if self.segments is None:
+            self.init_segments()
+        self.timing = SegmentTiming(self.segments, self.target_fps)
+        if self.time_remap:
+            self.time_map = TimeMap.from_timing(self.timing, self.replay_frame_start, self.blender_start_frame)
+
+        prev_subframe = 0.0
+        for data in self.group_blocks(blocks):
+            if self.time_remap:
+                replay_times, mask = self.timing.get_replay_times(data.replay_frame)
+                subframes = replay_times - self.replay_frame_start
+            else:
+                subframes, mask = self.timing.get_subframes(data.replay_frame)
+            if not mask.any():
+                continue
+            subframes = subframes[mask]
+            data = data.take(mask)
+            if subframes[0] < prev_subframe or (np.diff(subframes) < 0).any():
+                self.log("subframes out of order in replay frames {} - {}".format(
+                    data.replay_frame[0], data.replay_frame[-1]))
+            prev_subframe = subframes[-1]
+            yield subframes, data
+        return
 
     def init_segments(self) -> None:
-        self.segments = []
-        snapshot_upper = len(self.snapshots) - 1
+        self.segments = self.get_segments(self.snapshots, self.vid_speed, self.target_fps)
+        # lines before the first snapshot fall outside every segment
+        self.replay_frame_start = self.segments[0].start_frame
+        self.replay_frame_end = self.segments[-1].out_frame - 1
+        return
+
+    @staticmethod
+    def get_segments(snapshots: list, vid_speed: float, target_fps: float) -> List[Segment]:
+        segments = []
+        snapshot_upper = len(snapshots) - 1
         start_time = 0.0
         s = 0
         for s in range(snapshot_upper):
             segment = Segment()
             segment.start_time = start_time
-            segment.start_frame = self.snapshots[s]['frame']
-            segment.out_frame = self.snapshots[s + 1]['frame']
+            segment.start_frame = snapshots[s]['frame']
+            segment.out_frame = snapshots[s + 1]['frame']
             segment.duration = \
-                (self.snapshots[s + 1]['timestamp'] - self.snapshots[s]['timestamp']) * 1 / self.vid_speed
-            self.segments.append(segment)
+                (snapshots[s + 1]['timestamp'] - snapshots[s]['timestamp']) * 1 / vid_speed
+            segments.append(segment)
             start_time += segment.duration
 
         # TODO: Limit dup code
         segment = Segment()
         segment.start_time = start_time
-        segment.start_frame = self.snapshots[s + 1]['frame']
-        segment.out_frame = self.snapshots[s + 1]['frame'] + 1
-        segment.duration = 1 / self.vid_speed / self.target_fps
-        self.segments.append(segment)
-        self.replay_frame_end = segment.out_frame - 1
-        return
+        segment.start_frame = snapshots[s + 1]['frame']
+        segment.out_frame = snapshots[s + 1]['frame'] + 1
+        segment.duration = 1 / vid_speed / target_fps
+        segments.append(segment)
+        return segments
 
 
@@ -0,0 +1,53 @@
+import numpy as np
+from typing import Tuple
+
+
+def get_output_frames(frames: np.ndarray) -> np.ndarray:
+    """Whole Blender frames covered by keys at frames (sorted)."""
+    if not len(frames):
+        return np.empty(0)
+    return np.arange(np.ceil(frames[0]), np.floor(frames[-1]) + 1)
+
+
+def get_brackets(frames: np.ndarray, out_frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of the key at or before each output frame, and the factor towards the key after it."""
+    indices = np.clip(np.searchsorted(frames, out_frames, side='right') - 1, 0, max(len(frames) - 2, 0))
+    if len(frames) < 2:
+        return indices, np.zeros(len(out_frames))
+    factors = (out_frames - frames[indices]) / (frames[indices + 1] - frames[indices])
+    return indices, np.clip(factors, 0.0, 1.0)
+
+
+def resample_linear(frames: np.ndarray, values: np.ndarray, out_frames: np.ndarray) -> np.ndarray:
+    """Linearly interpolate (N, k) values keyed at frames onto out_frames."""
+    return np.column_stack([np.interp(out_frames, frames, values[:, x]) for x in range(values.shape[1])])
+
+
+def resample_slerp(frames: np.ndarray, quats: np.ndarray, out_frames: np.ndarray) -> np.ndarray:
+    """Spherically interpolate (N, 4) w, x, y, z quaternions keyed at frames onto out_frames."""
+    if len(frames) < 2:
+        return np.repeat(quats[:1], len(out_frames), axis=0)
+    indices, factors = get_brackets(frames, out_frames)
+    start = quats[indices]
+    end = quats[indices + 1]
+    dots = np.einsum('ij,ij->i', start, end)
+    # take the short way round
+    end = np.where((dots < 0)[:, None], -end, end)
+    dots = np.abs(dots)
+
+    angles = np.arccos(np.clip(dots, -1.0, 1.0))
+    sines = np.sin(angles)
+    # nearly identical rotations fall back to linear interpolation
+    linear = sines < 1e-6
+    safe_sines = np.where(linear, 1.0, sines)
+    start_weights = np.where(linear, 1.0 - factors, np.sin((1.0 - factors) * angles) / safe_sines)
+    end_weights = np.where(linear, factors, np.sin(factors * angles) / safe_sines)
+    result = start * start_weights[:, None] + end * end_weights[:, None]
+    result /= np.linalg.norm(result, axis=1)[:, None]
+
+    # keep consecutive output keys in the same hemisphere so Blender interpolates between them the short way
+    if len(result) > 1:
+        dots = np.einsum('ij,ij->i', result[:-1], result[1:])
+        signs = np.cumprod(np.concatenate(([1.0], np.where(dots < 0, -1.0, 1.0))))
+        result *= signs[:, None]
+    return result
@@ -0,0 +1,45 @@
+from math import ceil
+import numpy as np
+from typing import Tuple
+from .timing import SegmentTiming
+
+
+# Time Map
+class TimeMap:
+    """Piecewise linear mapping between the frames of actions keyed on replay time and scene frames.
+
+    Action frame blender_start_frame is replay frame origin, and every replay frame is one action frame. The
+    mapping is written as the animated strip time of an NLA strip, so retiming only rewrites its few keys.
+    """
+    action_frames: np.ndarray = None
+    scene_frames: np.ndarray = None
+    origin: int = 0
+    blender_start_frame: int = 1
+
+    def __init__(self, action_frames: np.ndarray, scene_frames: np.ndarray, origin: int = 0,
+                 blender_start_frame: int = 1):
+        self.action_frames = action_frames
+        self.scene_frames = scene_frames
+        self.origin = origin
+        self.blender_start_frame = blender_start_frame
+        return
+
+    @staticmethod
+    def from_timing(timing: SegmentTiming, origin: int, blender_start_frame: int) -> 'TimeMap':
+        replay_times, subframes = timing.get_time_map()
+        return TimeMap(replay_times - origin + blender_start_frame, subframes + blender_start_frame, origin,
+                       blender_start_frame)
+
+    def get_scene_frames(self, action_frames: np.ndarray) -> np.ndarray:
+        return np.interp(action_frames, self.action_frames, self.scene_frames)
+
+    def get_action_frames(self, scene_frames: np.ndarray) -> np.ndarray:
+        """The action frames played at scene_frames."""
+        return np.interp(scene_frames, self.scene_frames, self.action_frames)
+
+    def get_scene_frame_end(self, action_frame_end: float) -> int:
+        return ceil(float(self.get_scene_frames(np.array([action_frame_end]))[0]))
+
+    def get_strip_time_keys(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(scene frames, action frames) to key the strip time on."""
+        return self.scene_frames, self.action_frames
@@ -0,0 +1,56 @@
+import os
+from typing import BinaryIO, Optional
+
+
+# Frame Seeker
+class FrameSeeker:
+    """Finds the first data line of an export at or past a replay frame by bisecting its byte offsets.
+
+    Replay frames never decrease down the data section, so only a few dozen lines are read whatever the size of
+    the export. The END line and anything else without a replay frame sort after every data line.
+    """
+    fp: BinaryIO = None
+    token: int = 1
+    data_start: int = 0
+    data_end: int = 0
+
+    def __init__(self, fp: BinaryIO, token: int, data_start: int, data_end: Optional[int] = None):
+        self.fp = fp
+        self.token = token
+        self.data_start = data_start
+        self.data_end = os.fstat(fp.fileno()).st_size if data_end is None else data_end
+        return
+
+    def get_replay_frame(self, line: bytes) -> Optional[int]:
+        tokens = line.split()
+        try:
+            return int(tokens[self.token])
+        except (IndexError, ValueError):
+            return None
+
+    def get_line_start(self, offset: int) -> int:
+        """Offset of the first line starting at or after offset."""
+        if offset <= self.data_start:
+            return self.data_start
+        self.fp.seek(offset - 1)
+        self.fp.readline()
+        return self.fp.tell()
+
+    def find(self, replay_frame: int) -> int:
+        """Byte offset of the first line with a replay frame of at least replay_frame (data_end if none)."""
+        low = self.data_start
+        high = self.data_end
+        # low and high are line starts; every line before low is before replay_frame, none from high on is
+        while low < high:
+            start = self.get_line_start((low + high) // 2)
+            if start >= high:
+                # no line starts in the upper half, test the line at low instead
+                start = low
+            self.fp.seek(start)
+            line = self.fp.readline()
+            line_frame = self.get_replay_frame(line)
+            if line_frame is not None and line_frame < replay_frame:
+                low = start + len(line)
+            else:
+                high = start
+        return low
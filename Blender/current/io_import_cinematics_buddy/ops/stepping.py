@@ -0,0 +1,65 @@
+from time import perf_counter
+from typing import Any, Callable, Generator, Optional
+
+
+def run_steps(steps: Generator) -> Any:
+    """Run a step generator to the end and return its return value."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+# Step Engine
+class StepEngine:
+    """Advances a step generator for about time_budget seconds at a time, so an import can be spread over timer
+    events of a modal operator.
+
+    Steps yield (stage, fraction of the stage done) pairs, which are kept as the progress. The generator's return
+    value is the result. cancel() closes the generator, which rolls back whatever it cleans up on GeneratorExit.
+    """
+    time_budget: float = 0.05
+    stage: str = ''
+    fraction: float = 0.0
+    steps_run: int = 0
+    done: bool = False
+    cancelled: bool = False
+    result: Any = None
+
+    def __init__(self, steps: Generator, time_budget: float = 0.05, clock: Callable[[], float] = perf_counter):
+        self.steps = steps
+        self.time_budget = time_budget
+        self.clock = clock
+        return
+
+    def step(self) -> bool:
+        """Run steps until the time budget is spent (always at least one); returns False once there are none left."""
+        if self.done or self.cancelled:
+            return False
+        deadline = self.clock() + self.time_budget
+        while True:
+            try:
+                progress: Optional[tuple] = next(self.steps)
+            except StopIteration as stop:
+                self.done = True
+                self.result = stop.value
+                return False
+            self.steps_run += 1
+            if progress is not None:
+                self.stage, self.fraction = progress
+            if self.clock() >= deadline:
+                return True
+
+    def cancel(self):
+        if self.done or self.cancelled:
+            return
+        self.cancelled = True
+        self.steps.close()
+        return
+
+    def run(self) -> Any:
+        """Run the remaining steps without a time budget and return the result."""
+        while self.step():
+            pass
+        return self.result
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import Tuple
+
+
+# Segment Timing
+class SegmentTiming:
+    """Maps replay frames to Blender subframes for a list of campath segments.
+
+    Segments are held as start frame, out frame, start time and duration arrays. Each replay frame is mapped to
+    the segment containing it with a binary search, gets an equal share of its segment's duration, and lines
+    sharing a replay frame are spread evenly over that share.
+    """
+    start_frames: np.ndarray = None
+    out_frames: np.ndarray = None
+    start_times: np.ndarray = None
+    durations: np.ndarray = None
+    target_fps: float = None
+
+    def __init__(self, segments: list, target_fps: float):
+        self.start_frames = np.array([segment.start_frame for segment in segments], dtype=np.int64)
+        self.out_frames = np.array([segment.out_frame for segment in segments], dtype=np.int64)
+        self.start_times = np.array([segment.start_time for segment in segments], dtype=np.float64)
+        self.durations = np.array([segment.duration for segment in segments], dtype=np.float64)
+        self.target_fps = target_fps
+        return
+
+    @staticmethod
+    def get_ranks(replay_frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Position of each line within its run of equal replay frames, and the length of that run."""
+        count = len(replay_frames)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(replay_frames)) + 1))
+        lengths = np.diff(np.append(starts, count))
+        run_ids = np.repeat(np.arange(len(starts)), lengths)
+        return np.arange(count) - starts[run_ids], lengths[run_ids]
+
+    def get_subframes(self, replay_frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (subframes, mask) for lines with the given replay frames.
+
+        The mask is False for lines outside every segment. Runs of equal replay frames must not be split across
+        calls, otherwise the duplicates are not spread over the whole replay frame.
+        """
+        count = len(replay_frames)
+        if not count:
+            return np.empty(0), np.zeros(0, dtype=bool)
+
+        segment_ids = np.searchsorted(self.out_frames, replay_frames, side='right')
+        mask = segment_ids < len(self.out_frames)
+        segment_ids = np.minimum(segment_ids, len(self.out_frames) - 1)
+        start_frames = self.start_frames[segment_ids]
+        mask &= replay_frames >= start_frames
+
+        part_durations = self.durations[segment_ids] / (self.out_frames[segment_ids] - start_frames)
+        ranks, replay_frames_counts = self.get_ranks(replay_frames)
+        replay_frame_durations = part_durations / replay_frames_counts
+        parts = replay_frames - start_frames
+
+        # same operation order as the per-line formula so results are identical
+        subframes = (self.start_times[segment_ids] * self.target_fps) + (parts * part_durations * self.target_fps) \
+            + (ranks * replay_frame_durations * self.target_fps)
+        return subframes, mask
+
+    def get_replay_times(self, replay_frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (replay times, mask): replay frames with the lines sharing one spread evenly over it.
+
+        get_subframes() is linear in these times within every segment, see get_time_map().
+        """
+        count = len(replay_frames)
+        if not count:
+            return np.empty(0), np.zeros(0, dtype=bool)
+        segment_ids = np.searchsorted(self.out_frames, replay_frames, side='right')
+        mask = segment_ids < len(self.out_frames)
+        mask &= replay_frames >= self.start_frames[np.minimum(segment_ids, len(self.out_frames) - 1)]
+        ranks, replay_frames_counts = self.get_ranks(replay_frames)
+        return replay_frames + ranks / replay_frames_counts, mask
+
+    def get_time_map(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (replay times, subframes) at the segment boundaries; subframes are linear in between."""
+        replay_times = np.append(self.start_frames, self.out_frames[-1]).astype(np.float64)
+        subframes = np.append(self.start_times, self.start_times[-1] + self.durations[-1]) * self.target_fps
+        return replay_times, subframes
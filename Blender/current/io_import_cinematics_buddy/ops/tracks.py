@@ -0,0 +1,253 @@
+import numpy as np
+from typing import Dict, Optional
+from .animation import BallAnimation, CameraAnimation, CarAnimation, Channel, ObjectAnimation
+from .decimation import decimate, location_errors, lossless_keep, rotation_errors
+from .parsers import ExportData
+from .retiming import TimeMap
+from .resampling import get_output_frames, resample_linear, resample_slerp
+from .transforms import HemisphereContinuity, remap_camera_quaternions, remap_car_quaternions, \
+    remap_locations, remap_object_quaternions
+
+
+TRANSFORM_GROUP = 'Object Transforms'
+
+
+# Object Track
+class ObjectTrack:
+    """Turns an object's columns of export data into the keys of an ObjectAnimation, without Blender."""
+    blender_start_frame = 1
+    unit_scale: float = 1.0
+    continuity: HemisphereContinuity = None
+    highest_subframe = 0.0
+    animation: ObjectAnimation = None
+    location_tolerance: float = 0.0
+    rotation_tolerance: float = 0.0
+    resample: bool = False
+    time_map: Optional[TimeMap] = None
+    lossless: bool = False
+    keys_dropped: int = 0
+
+    def __init__(self, prefix: str, headers: dict, consts: dict, unit_scale, color=(1, 1, 1, 1)):
+        self.prefix = prefix
+        self.headers = headers
+        self.consts = consts
+        self.unit_scale = unit_scale
+        self.continuity = HemisphereContinuity()
+        self.animation = self.create_animation(color)
+        # keys per data path already handed out by take_added_keys()
+        self.keys_taken: Dict[str, int] = {}
+        return
+
+    def create_animation(self, color) -> ObjectAnimation:
+        return ObjectAnimation(self.prefix, self.prefix, color)
+
+    def set_blender_start_frame(self, blender_start_frame: int):
+        self.blender_start_frame = blender_start_frame
+
+    def set_decimation(self, location_tolerance: float, rotation_tolerance: float):
+        """Drop keys that linear interpolation reproduces within the given tolerances.
+
+        location_tolerance is a distance in Blender units, rotation_tolerance an angle in radians; 0 disables.
+        """
+        self.location_tolerance = location_tolerance
+        self.rotation_tolerance = rotation_tolerance
+
+    def set_resample(self, resample: bool):
+        """Replace keys by one key per whole Blender frame."""
+        self.resample = resample
+
+    def set_lossless(self, lossless: bool):
+        """Drop the keys the animation evaluates to exactly without them (constant runs, straight segments)."""
+        self.lossless = lossless
+
+    def set_time_map(self, time_map: Optional[TimeMap]):
+        """Keys are on replay time and played at the scene frames of time_map."""
+        self.time_map = time_map
+
+    @property
+    def decimation_report(self) -> Dict[str, tuple]:
+        return self.animation.decimation_report
+
+    def get_channel(self, channels: Dict[str, Channel], data_path: str, width: int = 1, group: str = None):
+        if data_path not in channels:
+            channels[data_path] = Channel(data_path, width, group, self.headers.get('frames', 0))
+        return channels[data_path]
+
+    def get_resample_frames(self, frames: np.ndarray) -> np.ndarray:
+        """The frames to resample keys at frames onto: the whole scene frames they are played at, as action
+        frames when keys are on replay time."""
+        if self.time_map is None:
+            return get_output_frames(frames)
+        scene_frames = get_output_frames(self.time_map.get_scene_frames(frames))
+        # frames played while the replay is paused all show the same action frame
+        return np.unique(np.round(self.time_map.get_action_frames(scene_frames), 6))
+
+    def resample_channels(self):
+        location = self.animation.channels.get('location')
+        if location is None:
+            return
+        frames, values = location.get_keys()
+        out_frames = self.get_resample_frames(frames)
+        location.set_keys(out_frames, resample_linear(frames, values, out_frames))
+
+        rotation = self.animation.channels['rotation_quaternion']
+        frames, values = rotation.get_keys()
+        rotation.set_keys(out_frames, resample_slerp(frames, values, out_frames))
+        return
+
+    def reduce(self):
+        channels = list(self.animation.channels.values()) + list(self.animation.data_channels.values())
+        for channel in channels:
+            frames, values = channel.get_keys()
+            keep = lossless_keep(frames, values)
+            if len(keep) < len(frames):
+                channel.set_keys(frames[keep], values[keep])
+                self.keys_dropped += len(frames) - len(keep)
+        return
+
+    def decimate(self):
+        channels = [
+            ('location', self.location_tolerance, location_errors),
+            ('rotation_quaternion', self.rotation_tolerance, rotation_errors),
+        ]
+        for data_path, tolerance, get_errors in channels:
+            channel = self.animation.channels.get(data_path)
+            if channel is None or tolerance <= 0.0:
+                continue
+            frames, values = channel.get_keys()
+            keep, max_error = decimate(frames, values, tolerance, get_errors)
+            channel.keep_keys(keep)
+            # (keys kept, keys before decimation, largest error)
+            self.animation.decimation_report[data_path] = (len(keep), len(frames), max_error)
+        return
+
+    def take_added_keys(self) -> ObjectAnimation:
+        """A new animation holding copies of the keys added since the last call, in the order they were added."""
+        part = self.create_animation(self.animation.color)
+        for channels, part_channels in ((self.animation.channels, part.channels),
+                                        (self.animation.data_channels, part.data_channels)):
+            for data_path, channel in channels.items():
+                frames, values = channel.get_added_keys()
+                taken = self.keys_taken.get(data_path, 0)
+                part_channels[data_path] = Channel(data_path, channel.width, channel.group, len(frames) - taken)
+                part_channels[data_path].extend(frames[taken:], values[taken:])
+                self.keys_taken[data_path] = len(frames)
+        return part
+
+    def finish(self) -> ObjectAnimation:
+        """Resample, reduce and decimate the keys as configured and return the finished animation."""
+        if self.resample:
+            self.resample_channels()
+        if self.lossless:
+            self.reduce()
+        self.decimate()
+        self.animation.highest_subframe = self.highest_subframe
+        return self.animation
+
+    def add_subframes(self, subframes: np.ndarray, data: ExportData):
+        """Key every line of data on the matching subframe (frames relative to blender_start_frame)."""
+        if not len(data):
+            return
+        subframes = np.round(subframes + self.blender_start_frame, 6)
+        locations = remap_locations(data.locations[self.prefix], self.unit_scale, self.consts)
+        # which keys sit on real frames is decided by the frames they are played at
+        scene_frames = subframes if self.time_map is None else np.round(self.time_map.get_scene_frames(subframes), 6)
+        rotations = self.continuity.apply(scene_frames, self.get_rotations(data.quaternions[self.prefix]))
+
+        channels = self.animation.channels
+        self.get_channel(channels, 'location', 3, TRANSFORM_GROUP).extend(subframes, locations)
+        self.get_channel(channels, 'rotation_quaternion', 4, TRANSFORM_GROUP).extend(subframes, rotations)
+        self.highest_subframe = max(self.highest_subframe, float(subframes.max()))
+        return
+
+    def get_rotations(self, quaternions: np.ndarray) -> np.ndarray:
+        return remap_object_quaternions(quaternions, self.consts)
+
+
+# Car Track
+class CarTrack(ObjectTrack):
+
+    def create_animation(self, color) -> ObjectAnimation:
+        return CarAnimation(self.prefix, self.prefix, color)
+
+    def get_rotations(self, quaternions: np.ndarray) -> np.ndarray:
+        return remap_car_quaternions(quaternions, self.consts)
+
+
+# Ball Track
+class BallTrack(CarTrack):
+
+    def create_animation(self, color) -> ObjectAnimation:
+        return BallAnimation(self.prefix, self.prefix, color)
+
+
+# Camera Track
+class CameraTrack(ObjectTrack):
+    default_sensor_width = 36.0
+    include_frame_nums: bool = False
+    sensor_width: float = 35.0
+    maintain_sensor_focal_ratio: bool = True
+
+    def __init__(
+            self,
+            prefix: str,
+            headers: dict,
+            consts: dict,
+            unit_scale,
+            include_frame_nums: bool,
+            sensor_width: float,
+            maintain_sensor_focal_ratio: bool
+    ):
+        self.include_frame_nums = include_frame_nums
+        self.sensor_width = sensor_width
+        self.maintain_sensor_focal_ratio = maintain_sensor_focal_ratio
+        super().__init__(prefix, headers, consts, unit_scale)
+        return
+
+    def create_animation(self, color) -> ObjectAnimation:
+        return CameraAnimation(self.prefix, self.headers['camera'], self.sensor_width)
+
+    def get_rotations(self, quaternions: np.ndarray) -> np.ndarray:
+        # rotate -90d on z, +90d on x
+        return remap_camera_quaternions(quaternions, self.consts)
+
+    def get_lenses(self, fovs: np.ndarray) -> np.ndarray:
+        # same conversion Blender applies when setting Camera.angle with a horizontal sensor fit
+        lenses = (self.sensor_width / 2.0) / np.tan(np.radians(fovs) / 2.0)
+        if self.maintain_sensor_focal_ratio:
+            lenses = lenses * self.default_sensor_width / self.sensor_width
+        return lenses
+
+    def get_fovs(self, lenses: np.ndarray) -> np.ndarray:
+        if self.maintain_sensor_focal_ratio:
+            lenses = lenses * self.sensor_width / self.default_sensor_width
+        return np.degrees(2.0 * np.arctan((self.sensor_width / 2.0) / lenses))
+
+    def resample_channels(self):
+        lens = self.animation.data_channels.get('lens')
+        if lens is not None:
+            # interpolate the field of view rather than the focal length
+            frames, values = lens.get_keys()
+            out_frames = self.get_resample_frames(frames)
+            fovs = resample_linear(frames, self.get_fovs(values), out_frames)
+            lens.set_keys(out_frames, self.get_lenses(fovs))
+        cb_frame = self.animation.data_channels.get('cb_frame')
+        if cb_frame is not None:
+            frames, values = cb_frame.get_keys()
+            out_frames = self.get_resample_frames(frames)
+            cb_frame.set_keys(out_frames, resample_linear(frames, values, out_frames))
+        super().resample_channels()
+        return
+
+    def add_subframes(self, subframes: np.ndarray, data: ExportData):
+        if not len(data):
+            return
+        frames = subframes + self.blender_start_frame
+        channels = self.animation.data_channels
+        self.get_channel(channels, 'lens').extend(frames, self.get_lenses(data.fov)[:, None])
+        if 'sensor_width' not in channels:
+            self.get_channel(channels, 'sensor_width').add(frames[0], (self.sensor_width,))
+        if self.include_frame_nums:
+            self.get_channel(channels, 'cb_frame').extend(frames, data.frame[:, None])
+        super().add_subframes(subframes, data)
+        return
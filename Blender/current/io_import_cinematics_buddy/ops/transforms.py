@@ -0,0 +1,116 @@
+from math import cos, radians
+import numpy as np
+from typing import Optional
+
+
+# w, x, y, z of a 90 degree rotation about one axis
+NINETY = cos(radians(90) / 2)
+CAMERA_PRE_ROTATION = np.array([NINETY, 0.0, 0.0, -NINETY])  # -90d on z
+CAMERA_POST_ROTATION = np.array([NINETY, NINETY, 0.0, 0.0])  # +90d on x
+
+
+def multiply_quaternions(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Hamilton product of (..., 4) w, x, y, z arrays (same as mathutils' a @ b)."""
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=-1)
+
+
+def quaternions_to_zyx_eulers(quaternions: np.ndarray) -> np.ndarray:
+    """(N, 4) w, x, y, z quaternions (normalized here) to (N, 3) radians, the same as mathutils' to_euler('ZYX')."""
+    w, x, y, z = np.moveaxis(quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True), -1, 0)
+    # the matrix is Rx @ Ry @ Rz, so its first row and last column hold the z and x angles
+    return np.stack((
+        np.arctan2(-2.0 * (y * z - w * x), 1.0 - 2.0 * (x * x + y * y)),
+        np.arcsin(np.clip(2.0 * (x * z + w * y), -1.0, 1.0)),
+        np.arctan2(-2.0 * (x * y - w * z), 1.0 - 2.0 * (y * y + z * z)),
+    ), axis=-1)
+
+
+def remap_locations(locations: np.ndarray, unit_scale: float, consts: dict) -> np.ndarray:
+    """Convert (N, 3) export locations to Blender space (Y negated, scaled)."""
+    result = np.empty_like(locations)
+    result[:, 0] = locations[:, consts['LOC_X']] * unit_scale
+    result[:, 1] = -locations[:, consts['LOC_Y']] * unit_scale
+    result[:, 2] = locations[:, consts['LOC_Z']] * unit_scale
+    return result
+
+
+def split_quaternions(quaternions: np.ndarray, consts: dict):
+    return (
+        quaternions[:, consts['QUAT_W']],
+        quaternions[:, consts['QUAT_X']],
+        quaternions[:, consts['QUAT_Y']],
+        quaternions[:, consts['QUAT_Z']]
+    )
+
+
+def remap_object_quaternions(quaternions: np.ndarray, consts: dict) -> np.ndarray:
+    """(N, 4) export quaternions to Blender w, x, y, z as (w, -y, -x, -z)."""
+    w, x, y, z = split_quaternions(quaternions, consts)
+    return np.stack((w, -y, -x, -z), axis=-1)
+
+
+def remap_car_quaternions(quaternions: np.ndarray, consts: dict) -> np.ndarray:
+    """(N, 4) export quaternions to Blender w, x, y, z as (w, -x, y, -z); used for cars and the ball."""
+    w, x, y, z = split_quaternions(quaternions, consts)
+    return np.stack((w, -x, y, -z), axis=-1)
+
+
+def remap_camera_quaternions(quaternions: np.ndarray, consts: dict) -> np.ndarray:
+    """Object remap followed by the camera's -90d z pre-rotation and +90d x post-rotation."""
+    result = multiply_quaternions(CAMERA_PRE_ROTATION, remap_object_quaternions(quaternions, consts))
+    return multiply_quaternions(result, CAMERA_POST_ROTATION)
+
+
+# Hemisphere Continuity
+class HemisphereContinuity:
+    """Keeps consecutive quaternions in the same hemisphere so Blender interpolates the short way round.
+
+    A quaternion is negated when its dot product with the previous (already adjusted) one is negative, but only
+    if the two keys fall on different real frames and at least one of them is on a subframe: if both keys sit on
+    real frames, or within the same real frame, the polarity constraint is not necessary. State carries over
+    between calls, so a track can be processed in consecutive batches.
+    """
+    prev_quat: Optional[np.ndarray] = None
+    prev_subframe: float = 0.0
+
+    def apply(self, subframes: np.ndarray, quats: np.ndarray) -> np.ndarray:
+        """Return quats (N, 4) with signs adjusted; subframes are the (rounded) frames they are keyed on."""
+        count = len(quats)
+        if not count:
+            return quats
+
+        if self.prev_quat is None:
+            prev_quats = np.vstack((quats[:1], quats[:-1]))
+            prev_subframes = np.concatenate((subframes[:1], subframes[:-1]))
+        else:
+            prev_quats = np.vstack((self.prev_quat, quats[:-1]))
+            prev_subframes = np.concatenate(([self.prev_subframe], subframes[:-1]))
+
+        real_frames = np.floor(subframes)
+        prev_real_frames = np.floor(prev_subframes)
+        check = (real_frames != prev_real_frames) & (
+            (np.round(real_frames - subframes, 6) != 0) | (np.round(prev_real_frames - prev_subframes, 6) != 0))
+        if self.prev_quat is None:
+            check[0] = False
+
+        # the previous key's sign only depends on the chain of flips since the last key that kept its own sign,
+        # so dot products are taken against the unadjusted previous quaternions and the signs accumulated
+        dots = np.einsum('ij,ij->i', prev_quats, quats)
+        negative = check & (dots < 0)
+        resets = ~check | (dots == 0)
+        resets[0] = True
+        flips = np.cumsum(negative)
+        base = np.maximum.accumulate(np.where(resets, flips - negative, 0))
+        signs = np.where((flips - base) % 2, -1.0, 1.0)
+
+        result = quats * signs[:, None]
+        self.prev_quat = result[-1].copy()
+        self.prev_subframe = float(subframes[-1])
+        return result
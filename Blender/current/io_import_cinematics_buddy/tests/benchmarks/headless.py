@@ -0,0 +1,195 @@
+from bisect import bisect_left
+from math import tan
+import numpy as np
+from types import SimpleNamespace
+from typing import Dict, List
+
+
+# Keyframe Points
+class KeyframePoints:
+    """Keys of one F-curve; keyframe_insert() inserts one key at a time, add() + foreach_set() in bulk."""
+    # keyframe_insert() replaces an existing key closer than this many frames
+    threshold: float = 0.01
+
+    def __init__(self):
+        self.frames: List[float] = []
+        self.values: List[float] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def insert(self, frame: float, value: float):
+        index = bisect_left(self.frames, frame)
+        for near in (index - 1, index):
+            if 0 <= near < len(self.frames) and abs(self.frames[near] - frame) < self.threshold:
+                self.values[near] = value
+                return
+        self.frames.insert(index, frame)
+        self.values.insert(index, value)
+        self.count += 1
+
+    def add(self, count: int):
+        self.count += count
+
+    def foreach_set(self, attr: str, seq):
+        # Blender copies the sequence into its own storage
+        np.array(seq, dtype=np.float32)
+
+
+# F-Curve
+class FCurve:
+
+    def __init__(self, data_path: str, index: int):
+        self.data_path = data_path
+        self.array_index = index
+        self.keyframe_points = KeyframePoints()
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+# F-Curves
+class FCurves(list):
+
+    def find(self, data_path: str, index: int = 0):
+        for fcurve in self:
+            if fcurve.data_path == data_path and fcurve.array_index == index:
+                return fcurve
+        return None
+
+    def new(self, data_path: str, index: int = 0, action_group: str = ''):
+        fcurve = FCurve(data_path, index)
+        self.append(fcurve)
+        return fcurve
+
+
+# ID
+class ID:
+    """Animatable datablock recording its keyframes the way Blender's RNA keyframe_insert() does."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.animation_data = None
+
+    def animation_data_create(self):
+        self.animation_data = SimpleNamespace(action=None, nla_tracks=[])
+        return self.animation_data
+
+    def keyframe_insert(self, data_path: str, frame: float = 0.0):
+        if self.animation_data is None:
+            self.animation_data_create()
+        if self.animation_data.action is None:
+            self.animation_data.action = SimpleNamespace(name=self.name + 'Action', fcurves=FCurves())
+        fcurves = self.animation_data.action.fcurves
+        value = getattr(self, data_path)
+        values = list(value) if isinstance(value, (tuple, list)) else [value]
+        for index, component in enumerate(values):
+            fcurve = fcurves.find(data_path, index) or fcurves.new(data_path, index)
+            fcurve.keyframe_points.insert(frame, component)
+        return True
+
+    def get_key_counts(self) -> Dict[str, int]:
+        """Keys per animated property (keys of its first component)."""
+        counts = {}
+        if self.animation_data is not None and self.animation_data.action is not None:
+            for fcurve in self.animation_data.action.fcurves:
+                if fcurve.array_index == 0:
+                    counts[fcurve.data_path] = len(fcurve.keyframe_points)
+        return counts
+
+
+# Object
+class Object(ID):
+
+    def __init__(self, name: str, data=None):
+        super().__init__(name)
+        self.data = data
+        self.location = (0.0, 0.0, 0.0)
+        self.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        self.rotation_mode = 'XYZ'
+
+    def copy(self) -> 'Object':
+        return Object(self.name, self.data)
+
+
+# Camera
+class Camera(ID):
+    sensor_fit = 'AUTO'
+    sensor_width = 36.0
+    lens = 50.0
+    cb_frame = 0.0
+
+    @property
+    def angle(self) -> float:
+        return 2.0 * np.arctan(self.sensor_width / 2.0 / self.lens)
+
+    @angle.setter
+    def angle(self, angle: float):
+        self.lens = self.sensor_width / 2.0 / tan(angle / 2.0)
+
+
+# Data Collection
+class DataCollection(dict):
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+
+    def new(self, name: str, *args):
+        datablock = self.factory(name, *args)
+        self[name + '.{:03d}'.format(len(self))] = datablock
+        return datablock
+
+
+# Scene Objects
+class SceneObjects(list):
+
+    def link(self, obj):
+        self.append(obj)
+
+
+# Headless Bpy
+class HeadlessBpy:
+    """Minimal stand-in for the parts of bpy the keyframers use, so imports can run without Blender.
+
+    Only the add-on's own work is measured: Blender's F-curve evaluation, depsgraph and undo costs are not.
+    """
+
+    def __init__(self, proxy_names: List[str]):
+        self.data = SimpleNamespace(
+            objects=DataCollection(Object),
+            cameras=DataCollection(Camera),
+            actions=DataCollection(lambda name: SimpleNamespace(name=name, fcurves=FCurves())),
+            materials=DataCollection(lambda name: SimpleNamespace(name=name, diffuse_color=None)),
+        )
+        for name in proxy_names:
+            self.data.objects[name] = Object(name)
+        self.context = SimpleNamespace(active_object=None)
+        self.ops = SimpleNamespace(mesh=SimpleNamespace(primitive_plane_add=self.primitive_plane_add))
+        self.scene = SimpleNamespace(
+            render=SimpleNamespace(fps=24),
+            frame_start=1,
+            frame_end=250,
+            camera=None,
+            collection=SimpleNamespace(objects=SceneObjects()),
+        )
+
+    def primitive_plane_add(self):
+        self.context.active_object = self.data.objects.new('Plane')
+
+    def get_animated(self) -> List[ID]:
+        """Copied proxies linked to the scene plus every new datablock."""
+        datablocks = list(self.scene.collection.objects)
+        for collection in (self.data.objects, self.data.cameras):
+            datablocks += [datablock for datablock in collection.values() if datablock not in datablocks]
+        return datablocks
+
+    def get_key_counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        for datablock in self.get_animated():
+            datablock_counts = datablock.get_key_counts()
+            if datablock_counts:
+                counts['{} {}'.format(type(datablock).__name__, datablock.name)] = datablock_counts
+        return counts
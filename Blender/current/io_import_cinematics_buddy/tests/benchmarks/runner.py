@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from time import perf_counter
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+import numpy as np
+from ..base import BaseTest
+from ...ops import keyframers
+from ...ops.instrumentation import Instrumentation
+from ...ops.processors import FileProcessor, LinesProcessor, SegmentsProcessor
+from .headless import HeadlessBpy
+from .synthetic import SyntheticExport
+
+PROXIES = {
+    'CAR_PROXY_NAME': 'RL_OCTANE_PROXY',
+    'BALL_PROXY_NAME': 'RL_BALL_PROXY',
+    'STADIUM_PROXY_NAME': 'RL_STADIUM_PROXY'
+}
+
+
+# Stage Profiler
+class StageProfiler(Instrumentation):
+    """Import instrumentation that also records the tracemalloc peak of every stage.
+
+    Peak memory per stage needs tracemalloc.reset_peak() (Python 3.9+); before that every stage reports the
+    peak of the run so far.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        super().__init__()
+        self.trace_memory = trace_memory
+        self.peak_memory: Dict[str, int] = {}
+
+    def sample(self):
+        stage = self.stack[-1] if self.stack else 'other'
+        super().sample()
+        if self.trace_memory:
+            self.peak_memory[stage] = max(self.peak_memory.get(stage, 0), tracemalloc.get_traced_memory()[1])
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+
+# Benchmark Case
+class BenchmarkCase:
+    """One export imported with one processor."""
+    snapshot_filename: str = ''
+    vid_speed: float = 1.0
+
+    def __init__(self, name: str, filepath: str, snapshot_filename: str = '', vid_speed: float = 1.0):
+        self.name = name
+        self.filepath = filepath
+        self.snapshot_filename = snapshot_filename
+        self.vid_speed = vid_speed
+
+    @property
+    def processor_name(self) -> str:
+        return 'segments' if self.snapshot_filename else 'lines'
+
+    def is_available(self) -> bool:
+        return os.path.isfile(self.filepath) and (not self.snapshot_filename or os.path.isfile(self.snapshot_filename))
+
+    def create_processor(self, scn, bulk: bool) -> FileProcessor:
+        processor_class = SegmentsProcessor if self.snapshot_filename else LinesProcessor
+        processor = processor_class(
+            self.filepath,
+            PROXIES,
+            1 / 100.0,
+            False,
+            0,
+            999999999,
+            60.0,
+            scn,
+            self.vid_speed,
+            35.0,
+            False,
+            False,
+            1,
+            bulk
+        )
+        if self.snapshot_filename:
+            processor.set_snapshot_file(self.snapshot_filename)
+        return processor
+
+    def run_once(self, bulk: bool, trace_memory: bool = False) -> dict:
+        bpy = HeadlessBpy(list(PROXIES.values()))
+        profiler = StageProfiler(trace_memory)
+        with patch.object(keyframers, 'bpy', bpy):
+            processor = self.create_processor(bpy.scene, bulk)
+            processor.set_instrumentation(profiler)
+            if trace_memory:
+                tracemalloc.start()
+            start = perf_counter()
+            try:
+                processor.process()
+            finally:
+                profiler.sample()
+                total = perf_counter() - start
+                if trace_memory:
+                    tracemalloc.stop()
+        key_counts = bpy.get_key_counts()
+        seconds = dict(profiler.seconds)
+        seconds['other'] = max(total - sum(seconds.values()), 0.0)
+        return {
+            'seconds': seconds,
+            'counters': profiler.counters,
+            'total_seconds': total,
+            'peak_memory': profiler.peak_memory,
+            'keyframes': key_counts,
+            'keyframes_total': sum(sum(counts.values()) for counts in key_counts.values()),
+        }
+
+    def run(self, bulk: bool, repeat: int = 3, trace_memory: bool = True) -> dict:
+        """Best of repeat timed runs, plus a separate traced run for memory since tracemalloc skews timing."""
+        runs = [self.run_once(bulk) for x in range(max(repeat, 1))]
+        result = {
+            'name': self.name,
+            'processor': self.processor_name,
+            'mode': 'bulk' if bulk else 'insert',
+            'file': os.path.basename(self.filepath),
+            'file_size': os.path.getsize(self.filepath),
+            'repeat': len(runs),
+            'seconds': {stage: min(run['seconds'][stage] for run in runs) for stage in runs[0]['seconds']},
+            'total_seconds': min(run['total_seconds'] for run in runs),
+            'counters': runs[0]['counters'],
+            'keyframes': runs[0]['keyframes'],
+            'keyframes_total': runs[0]['keyframes_total'],
+        }
+        if trace_memory:
+            traced = self.run_once(bulk, True)
+            result['peak_memory'] = traced['peak_memory']
+            result['peak_memory_total'] = max(traced['peak_memory'].values())
+        return result
+
+
+def get_fixture_cases() -> List[BenchmarkCase]:
+    resources = BaseTest.get_resources_dir()
+    return [
+        BenchmarkCase('testall', resources + 'testall.txt'),
+        BenchmarkCase('tv425', resources + 'tv425.txt'),
+        BenchmarkCase('otdemo', resources + 'otdemo.txt'),
+        BenchmarkCase('testall-segments', resources + 'testall.txt', resources + 'unordered.json'),
+        BenchmarkCase('tv425-segments', resources + 'tv425.txt', resources + 'tv4.json', 0.25),
+        BenchmarkCase('otdemo-segments', resources + 'otdemo.txt', resources + 'otdemo.json', 0.25),
+    ]
+
+
+def get_synthetic_cases(directory: str, lines: int, cars: int, snapshots: int) -> List[BenchmarkCase]:
+    name = 'synthetic-{}x{}'.format(lines, cars)
+    export = SyntheticExport(lines, cars)
+    filepath = os.path.join(directory, name + '.txt')
+    snapshot_filename = os.path.join(directory, name + '.json')
+    with open(filepath, 'w') as fp:
+        export.write(fp)
+    with open(snapshot_filename, 'w') as fp:
+        export.write_snapshots(fp, snapshots)
+    return [BenchmarkCase(name, filepath), BenchmarkCase(name + '-segments', filepath, snapshot_filename)]
+
+
+def format_result(result: dict) -> str:
+    stages = ' '.join('{}={:.3f}'.format(stage, seconds) for stage, seconds in result['seconds'].items())
+    text = '{:<28} {:<6} {:>8.3f}s  keys={:<9} {}'.format(
+        result['name'], result['mode'], result['total_seconds'], result['keyframes_total'], stages)
+    if 'peak_memory_total' in result:
+        text += ' peak={:.1f}MiB'.format(result['peak_memory_total'] / 1024 / 1024)
+    return text
+
+
+def run_benchmarks(
+        cases: List[BenchmarkCase],
+        modes: List[bool],
+        repeat: int,
+        trace_memory: bool,
+        log: Optional[Callable[[str], None]] = None
+) -> dict:
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': [],
+        'skipped': [],
+    }
+    for case in cases:
+        if not case.is_available():
+            report['skipped'].append(case.name)
+            if log:
+                log('{:<28} skipped: {} not found'.format(case.name, os.path.basename(case.filepath)))
+            continue
+        for bulk in modes:
+            result = case.run(bulk, repeat, trace_memory)
+            report['results'].append(result)
+            if log:
+                log(format_result(result))
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Time Cinematics Buddy imports end to end outside of Blender.')
+    parser.add_argument('--mode', choices=['insert', 'bulk', 'both'], default='both')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, the fastest is reported')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--no-fixtures', action='store_true', help='skip the bundled test exports')
+    parser.add_argument('--synthetic-lines', type=int, default=0, help='also import a generated export')
+    parser.add_argument('--synthetic-cars', type=int, default=8)
+    parser.add_argument('--synthetic-snapshots', type=int, default=10)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    modes = {'insert': [False], 'bulk': [True], 'both': [False, True]}[args.mode]
+    with tempfile.TemporaryDirectory() as directory:
+        cases = [] if args.no_fixtures else get_fixture_cases()
+        if args.synthetic_lines:
+            cases += get_synthetic_cases(directory, args.synthetic_lines, args.synthetic_cars,
+                                         args.synthetic_snapshots)
+        report = run_benchmarks(cases, modes, args.repeat, not args.no_memory, print)
+
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(report, fp, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
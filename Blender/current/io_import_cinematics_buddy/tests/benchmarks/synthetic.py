@@ -0,0 +1,99 @@
+import json
+import numpy as np
+from typing import TextIO
+
+MAX_CARS = 8
+LOC_FORMAT = '%.6f,%.6f,%.6f'
+QUAT_FORMAT = '%.6f,%.6f,%.6f,%.6f'
+LINE_FORMAT = '%d\t%d\t\t%.6f\t' + LOC_FORMAT + '\t' + QUAT_FORMAT + '\t\t' + LOC_FORMAT + '\t\t' + QUAT_FORMAT \
+    + '\t\t' + '\t\t'.join(['%d\t' + LOC_FORMAT + '\t\t' + QUAT_FORMAT] * MAX_CARS)
+COLUMN_TITLES = 'Frame\tTimestamp\tCamera FOV\tCamera Position\t\t\t\tCamera Quaternions\t\t\t\tBall Position\t\t\t\t' \
+    'Ball Quaternions\t\t\t\t' + '\t'.join('Car {} Shortcut\tPosition\t\t\t\t\tQuaternions\t\t\t'.format(car)
+                                           for car in range(1, MAX_CARS + 1)) + '\t'
+
+
+# Synthetic Export
+class SyntheticExport:
+    """Writes animation exports of any length and car count in Cinematics Buddy's column layout.
+
+    Objects follow smooth pseudo-random paths, the export runs at framerate while the replay advances at
+    replay_fps, so consecutive lines share replay frames just like a real recording.
+    """
+    block_size: int = 65536
+    first_frame: int = 1000
+    first_replay_frame: int = 100
+
+    def __init__(self, lines: int, cars: int = MAX_CARS, framerate: int = 60, replay_fps: int = 30, seed: int = 0):
+        if not 0 <= cars <= MAX_CARS:
+            raise Exception('Synthetic exports support 0 to {} cars'.format(MAX_CARS))
+        self.lines = lines
+        self.cars = cars
+        self.framerate = framerate
+        self.replay_fps = replay_fps
+        # per object: frequencies and phases of the sine waves its path is made of
+        random = np.random.RandomState(seed)
+        self.frequencies = random.uniform(0.05, 0.5, size=(2 + MAX_CARS, 6))
+        self.phases = random.uniform(0.0, 2.0 * np.pi, size=(2 + MAX_CARS, 6))
+
+    @property
+    def last_replay_frame(self) -> int:
+        return int(self.get_replay_frames(np.array([self.lines - 1]))[0])
+
+    def get_replay_frames(self, lines: np.ndarray) -> np.ndarray:
+        return self.first_replay_frame + lines * self.replay_fps // self.framerate
+
+    def get_transforms(self, obj: int, times: np.ndarray) -> np.ndarray:
+        """(N, 7) locations in centimeters and unit x, y, z, w quaternions."""
+        waves = np.sin(times[:, None] * self.frequencies[obj] + self.phases[obj])
+        locations = waves[:, :3] * (4000.0, 5000.0, 1000.0) + (0.0, 0.0, 1000.0)
+        quaternions = np.column_stack((waves[:, 3:], np.full(len(times), 1.5)))
+        quaternions /= np.linalg.norm(quaternions, axis=1)[:, None]
+        return np.column_stack((locations, quaternions))
+
+    def get_table(self, start: int, stop: int) -> np.ndarray:
+        lines = np.arange(start, stop)
+        times = lines / self.framerate
+        columns = [
+            (self.first_frame + lines)[:, None],
+            self.get_replay_frames(lines)[:, None],
+            (70.0 + 20.0 * np.sin(times * 0.1))[:, None],
+            self.get_transforms(0, times),
+            self.get_transforms(1, times),
+        ]
+        absent = np.tile((0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0), (len(lines), 1))
+        for car in range(MAX_CARS):
+            if car < self.cars:
+                columns += [np.full((len(lines), 1), car + 1), self.get_transforms(2 + car, times)]
+            else:
+                columns.append(absent)
+        return np.hstack(columns)
+
+    def write_header(self, fp: TextIO):
+        fp.write('Version: 0.9.4\nGameState: REPLAY\nCamera: cam1\n')
+        fp.write('Framerate: {}\nFrames: {}\nCars: {}\n\n'.format(self.framerate, self.lines, self.cars))
+        fp.write('REPLAY METADATA\nName: synthetic\nID: 00000000000000000000000000000000\n')
+        fp.write('Date: 2020-01-01 00-00-00\nFPS: {:.6f}\n'.format(self.replay_fps))
+        fp.write('Frames: {}\n\n{}\n'.format(self.last_replay_frame + 1, COLUMN_TITLES))
+
+    def write(self, fp: TextIO):
+        self.write_header(fp)
+        for start in range(0, self.lines, self.block_size):
+            np.savetxt(fp, self.get_table(start, min(start + self.block_size, self.lines)), fmt=LINE_FORMAT)
+        fp.write('END\n')
+
+    def write_snapshots(self, fp: TextIO, count: int = 10):
+        """Campath snapshots spread over the export, at replay speed between them varying from 0.5x to 2x."""
+        frames = np.unique(np.linspace(self.first_replay_frame, self.last_replay_frame, max(count, 2)).astype(int))
+        speeds = np.random.RandomState(len(frames)).uniform(0.5, 2.0, size=len(frames) - 1)
+        timestamps = np.concatenate(([0.0], np.cumsum(np.diff(frames) / self.replay_fps / speeds)))
+        snapshots = {}
+        for frame, timestamp in zip(frames.tolist(), timestamps.tolist()):
+            snapshots[str(frame)] = {
+                'FOV': 90.0,
+                'frame': frame,
+                'location': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+                'rotation': {'pitch': 0.0, 'roll': 0.0, 'yaw': 0.0},
+                'timestamp': timestamp,
+                'weight': 1.0
+            }
+        json.dump(snapshots, fp, indent=4)
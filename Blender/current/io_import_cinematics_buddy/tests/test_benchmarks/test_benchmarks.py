@@ -0,0 +1,47 @@
+from io import StringIO
+import json
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser
+from io_import_cinematics_buddy.ops.processors import consts
+from io_import_cinematics_buddy.tests.base import BaseTest
+from io_import_cinematics_buddy.tests.benchmarks.runner import BenchmarkCase, run_benchmarks
+from io_import_cinematics_buddy.tests.benchmarks.synthetic import SyntheticExport
+
+
+class TestBenchmarks(BaseTest):
+
+    def test_synthetic_export_layout(self):
+        export = SyntheticExport(300, 3)
+        fp = StringIO()
+        export.write(fp)
+        fp.seek(0)
+        for x in range(consts['DATA_LINE_START'] - 1):
+            fp.readline()
+        data = ColumnarParser(consts).parse(fp)
+        assert len(data) == 300
+        assert data.ended
+        assert data.replay_frame[-1] == export.last_replay_frame
+        assert data.quaternions['CAR3'].any(axis=1).all()
+        assert not data.locations['CAR4'].any()
+
+    def test_run_modes_key_the_same(self, tmp_path):
+        export = SyntheticExport(200, 2)
+        filepath = str(tmp_path / 'export.txt')
+        snapshot_filename = str(tmp_path / 'export.json')
+        with open(filepath, 'w') as fp:
+            export.write(fp)
+        with open(snapshot_filename, 'w') as fp:
+            export.write_snapshots(fp, 4)
+        cases = [
+            BenchmarkCase('lines', filepath),
+            BenchmarkCase('segments', filepath, snapshot_filename),
+            BenchmarkCase('missing', str(tmp_path / 'missing.txt')),
+        ]
+        report = run_benchmarks(cases, [False, True], 1, True)
+
+        assert report['skipped'] == ['missing']
+        insert, bulk = report['results'][:2]
+        assert insert['keyframes'] == bulk['keyframes']
+        # camera, ball and two cars with location and rotation, plus the sensor width key
+        assert insert['keyframes_total'] == 200 * 4 * 2 + 200 + 1
+        assert all(result['peak_memory_total'] > 0 for result in report['results'])
+        json.dumps(report)
@@ -0,0 +1,68 @@
+from io import StringIO
+from math import cos, radians, sin
+import numpy as np
+from io_import_cinematics_buddy.ops.after_effects import AfterEffectsExporter, main
+from io_import_cinematics_buddy.ops.processors import LinesProcessor, SegmentsProcessor
+from io_import_cinematics_buddy.ops.transforms import multiply_quaternions
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestAfterEffectsExporter(BaseTest):
+    proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+
+    def get_animation(self):
+        return LinesProcessor(self.get_resources_dir() + 'testsmall.txt', self.proxies, 0.01, False, 0, 999999999,
+                              60.0, None, 1.0, 35.0, False, False, 1).build()
+
+    def get_segments_animation(self, time_remap: bool):
+        processor = SegmentsProcessor(self.get_resources_dir() + 'testall.txt', self.proxies, 0.01, False, 0,
+                                      999999999, 60.0, None, 1.0, 35.0, False, False, 1)
+        processor.set_snapshot_file(self.get_resources_dir() + 'unordered.json')
+        processor.set_time_remap(time_remap)
+        return processor.build()
+
+    def test_orientation(self):
+        # a Blender camera turned 90 degrees about X looks along +Y, which is ahead in After Effects
+        level = np.array([[cos(radians(45)), sin(radians(45)), 0.0, 0.0]])
+        assert np.allclose(AfterEffectsExporter.get_orientations(level), [[0.0, 0.0, 0.0]])
+        # then turned 30 degrees to the left about the vertical, which is -Y in After Effects
+        turned = multiply_quaternions(np.array([cos(radians(15)), 0.0, 0.0, sin(radians(15))]), level)
+        assert np.allclose(AfterEffectsExporter.get_orientations(turned), [[0.0, -30.0, 0.0]])
+
+    def test_positions(self):
+        exporter = AfterEffectsExporter(1920, 1080, 100.0)
+        positions = exporter.get_positions(np.array([[1.0, 2.0, 3.0]]))
+        assert positions.tolist() == [[1060.0, 240.0, 200.0]]
+
+    def test_camera_keys(self):
+        animation = self.get_animation()
+        times, positions, orientations, zooms = AfterEffectsExporter().get_camera_keys(animation)
+        frame_count = animation.frame_end - animation.frame_start + 1
+        assert len(times) == len(positions) == len(orientations) == len(zooms) == frame_count
+        assert np.allclose(np.diff(times), 1 / 60.0)
+        # without the sensor focal ratio the zoom is the export's horizontal field of view
+        camera = AfterEffectsExporter.get_camera(animation)
+        frames, lenses = camera.data_channels['lens'].get_keys()
+        fovs = np.degrees(2.0 * np.arctan(17.5 / lenses[:, 0]))
+        expected = 960.0 / np.tan(np.radians(fovs) / 2.0)
+        assert np.allclose(np.interp(frames, np.arange(animation.frame_start, animation.frame_end + 1), zooms),
+                           expected)
+
+    def test_time_remap_matches_baked(self):
+        exporter = AfterEffectsExporter()
+        baked = self.get_segments_animation(False)
+        remapped = self.get_segments_animation(True)
+        assert remapped.frame_end == baked.frame_end
+        for expected, actual in zip(exporter.get_camera_keys(baked), exporter.get_camera_keys(remapped)):
+            assert np.allclose(actual, expected, atol=1e-2)
+
+    def test_write(self):
+        fp = StringIO()
+        AfterEffectsExporter().write(self.get_animation(), fp, 'testsmall')
+        script = fp.getvalue()
+        assert 'app.project.items.addComp("testsmall", 1920, 1080, 1.0' in script
+        assert script.count('.setValuesAtTimes(times, ') == 3
+
+    def test_main(self, tmp_path):
+        assert main([self.get_resources_dir() + 'testsmall.txt', '--output-dir', str(tmp_path), '--workers', '1']) == 0
+        assert (tmp_path / 'testsmall.jsx').read_text().startswith('// Cinematics Buddy camera')
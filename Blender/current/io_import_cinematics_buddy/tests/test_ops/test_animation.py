@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from io_import_cinematics_buddy.ops.animation import Channel
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestAnimation(BaseTest):
+
+    def test_channel_grows_past_capacity(self):
+        channel = Channel('location', 3, capacity=2)
+        for x in range(5):
+            channel.add(float(x), (x, x * 2, x * 3))
+        frames, values = channel.get_keys()
+        assert frames.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert values[4].tolist() == [4.0, 8.0, 12.0]
+
+    def test_channel_close_keys_overwrite_value(self):
+        channel = Channel('lens')
+        channel.add(1.0, (10.0,))
+        channel.add(2.0, (12.0,))
+        channel.add(1.005, (11.0,))
+        frames, values = channel.get_keys()
+        assert frames.tolist() == [1.0, 2.0]
+        assert values[:, 0].tolist() == [11.0, 12.0]
+        frames, values = channel.get_added_keys()
+        assert frames.tolist() == [1.0, 2.0, 1.005]
+
+    def test_channel_preview_and_rest(self):
+        channel = Channel('lens')
+        for x in range(10):
+            channel.add(float(x), (x * 2.0,))
+        channel.add(4.005, (9.0,))
+        preview = channel.take_preview(4)
+        rest = channel.take_preview(4, True)
+        assert preview.get_keys()[0].tolist() == [0.0, 4.0, 8.0, 9.0]
+        assert preview.get_keys()[1][:, 0].tolist() == [0.0, 9.0, 16.0, 18.0]
+        assert rest.get_keys()[0].tolist() == [1.0, 2.0, 3.0, 5.0, 6.0, 7.0]
+        assert preview.group == channel.group and rest.width == channel.width
+
+    def test_build_without_bpy(self):
+        script = '\n'.join([
+            'import sys',
+            'sys.modules["bpy"] = None',
+            'from io_import_cinematics_buddy.ops.processors import LinesProcessor',
+            'proxies = {"CAR_PROXY_NAME": "c", "BALL_PROXY_NAME": "b", "STADIUM_PROXY_NAME": "s"}',
+            'processor = LinesProcessor({!r}, proxies, 0.01, False, 0, 999999999, 60.0, None, 1.0, 35.0, False, '
+            'False, 1)'.format(self.get_resources_dir() + 'testsmall.txt'),
+            'animation = processor.build()',
+            'print(len(animation.objects), animation.get_object("CAR1").get_key_count(), animation.frame_end)',
+        ])
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=self.get_package_parent_dir())
+        # camera, ball and 4 cars; 163 lines keyed on location and rotation, 59 fps export retimed to 60 fps
+        assert output.split() == [b'6', b'326', b'166']
+
+    @staticmethod
+    def get_package_parent_dir() -> str:
+        return BaseTest.get_resources_dir().rsplit('io_import_cinematics_buddy', 1)[0]
@@ -0,0 +1,117 @@
+import json
+import pickle
+from unittest.mock import MagicMock, patch
+from io_import_cinematics_buddy.ops import cinematics_buddy_import
+from io_import_cinematics_buddy.ops.batch import BatchBuilder, ImportSettings
+from io_import_cinematics_buddy.ops.cinematics_buddy_import import Importer
+from io_import_cinematics_buddy.ops.instrumentation import Instrumentation
+from io_import_cinematics_buddy.ops.processors import LinesProcessor, SegmentsProcessor, consts
+from io_import_cinematics_buddy.ops.stepping import run_steps
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestBatch(BaseTest):
+
+    @staticmethod
+    def get_settings(car_proxy_name: str = 'c') -> ImportSettings:
+        proxies = {'CAR_PROXY_NAME': car_proxy_name, 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        return ImportSettings(proxies, 0.01, True, 0, 999999999, 60.0, 1.0, 35.0, False, False, 1, True)
+
+    def get_jobs(self) -> list:
+        return [
+            (self.get_resources_dir() + 'testall.txt', self.get_resources_dir() + 'unordered.json'),
+            (self.get_resources_dir() + 'testsmall.txt', ''),
+            (self.get_resources_dir() + 'testsmall.txt', self.get_resources_dir() + 'small.json'),
+        ]
+
+    @staticmethod
+    def get_keys(animation) -> dict:
+        keys = {}
+        for obj in animation.objects:
+            for data_path, channel in list(obj.channels.items()) + list(obj.data_channels.items()):
+                frames, values = channel.get_added_keys()
+                keys[obj.prefix, data_path] = (frames.tolist(), values.tolist())
+        return keys
+
+    def test_processor_per_job(self):
+        settings = self.get_settings()
+        assert isinstance(settings.create_processor(*self.get_jobs()[0]), SegmentsProcessor)
+        processor = settings.create_processor(*self.get_jobs()[1])
+        assert type(processor) is LinesProcessor
+        assert processor.consts['CAR_PROXY_NAME'] == 'c'
+
+    def test_fingerprint(self):
+        filepath = self.get_resources_dir() + 'testsmall.txt'
+        settings = self.get_settings()
+        fingerprint = settings.get_fingerprint(filepath)
+        assert self.get_settings('other').get_fingerprint(filepath) == fingerprint
+        settings.blender_start_frame = 100
+        settings.sensor_width = 50.0
+        assert settings.get_fingerprint(filepath) == fingerprint
+        assert settings.get_fingerprint(filepath, self.get_resources_dir() + 'small.json') != fingerprint
+        assert settings.get_fingerprint(self.get_resources_dir() + 'testall.txt') != fingerprint
+        settings.set_time_remap(True)
+        assert settings.get_fingerprint(filepath) != self.get_settings().get_fingerprint(filepath)
+        settings = self.get_settings()
+        settings.set_decimation(0.1, 0.0)
+        assert settings.get_fingerprint(filepath) != fingerprint
+
+    def test_processors_do_not_share_consts(self):
+        first = self.get_settings('first').create_processor(*self.get_jobs()[1])
+        second = self.get_settings('second').create_processor(*self.get_jobs()[1])
+        assert first.consts['CAR_PROXY_NAME'] == 'first'
+        assert second.consts['CAR_PROXY_NAME'] == 'second'
+        assert 'CAR_PROXY_NAME' not in consts
+
+    def test_pool_matches_sequential_builds(self):
+        settings = self.get_settings()
+        jobs = self.get_jobs()
+        results = list(BatchBuilder(settings, 2).build(jobs))
+        assert len(results) == len(jobs)
+        for (filepath, snapshot_filename), (animation, report) in zip(jobs, results):
+            expected = settings.create_processor(filepath, snapshot_filename).build()
+            assert animation.frame_end == expected.frame_end
+            assert self.get_keys(animation) == self.get_keys(expected)
+            assert report['counters']['lines_keyed'] > 0
+
+    def test_animation_pickles(self):
+        animation = self.get_settings().create_processor(*self.get_jobs()[2]).build()
+        assert self.get_keys(pickle.loads(pickle.dumps(animation))) == self.get_keys(animation)
+
+    def test_importer_writes_a_scene_per_export(self):
+        bpy = cinematics_buddy_import.bpy
+        bpy.reset_mock()
+        jobs = self.get_jobs()[1:]
+        Importer.import_cinematics_batch(self.get_settings(), jobs, 1)
+        assert [args[0] for args, kwargs in bpy.data.scenes.new.call_args_list] == ['testsmall', 'testsmall']
+
+    def test_importer_keys_only_unshared_objects(self):
+        filepath = self.get_resources_dir() + 'testsmall.txt'
+        settings = self.get_settings()
+        processor = settings.create_processor(filepath)
+        processor.process_steps = MagicMock(return_value=iter([]))
+        with patch.object(ImportSettings, 'create_processor', return_value=processor), \
+                patch.object(cinematics_buddy_import, 'SharedActions') as shared_actions_class:
+            shared_actions_class.return_value.find.return_value = {'BALL': MagicMock(), 'CAR2': MagicMock()}
+            run_steps(Importer.import_file_steps(settings, filepath, '', 0.0, False, Instrumentation(), 1, True))
+        shared_actions_class.assert_called_once_with(settings.get_fingerprint(filepath), 1)
+        assert processor.objects == ['CAM', 'CAR1', 'CAR3', 'CAR4', 'CAR5', 'CAR6', 'CAR7', 'CAR8']
+        assert processor.shared_actions is shared_actions_class.return_value
+
+    def test_importer_reports_every_job(self, tmp_path):
+        resources = self.get_resources_dir()
+        jobs = [(resources + 'testsmall.txt', ''), (resources + 'testsmall.txt', resources + 'small.json')]
+        report_filename = str(tmp_path / 'report.json')
+        args = [None, resources + 'testsmall.txt', 0, 999999999, 60.0, False, 'c', 'b', 's', '', 1.0, 35.0, False,
+                False, 1, True, 0, False, 0.0, 0.0, report_filename, None, False, 0.0, jobs, 1, False, True, 0, False]
+        with patch.object(cinematics_buddy_import.bpy.path, 'abspath', side_effect=lambda path: path):
+            Importer.import_cinematics_data(*args)
+        with open(report_filename) as fp:
+            report = json.load(fp)
+
+        expected = [next(BatchBuilder(self.get_settings(), 1).build([job]))[1] for job in jobs]
+        assert [job['filepath'] for job in report['jobs']] == [filepath for filepath, snapshot_filename in jobs]
+        assert [job['counters'] for job in report['jobs']] == [job['counters'] for job in expected]
+        assert report['counters']['lines_keyed'] == sum(job['counters']['lines_keyed'] for job in expected)
+        assert 'scene setup' in report['seconds']
+        assert report['ignored_options'] == ['Read in Background', 'Parse Processes']
@@ -0,0 +1,121 @@
+import os
+import shutil
+from unittest.mock import MagicMock, patch
+from io_import_cinematics_buddy.ops.cache import ParseCache
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestParseCache(BaseTest):
+
+    def copy_export(self, tmp_path, filename: str = 'testsmall.txt') -> str:
+        path = str(tmp_path / filename)
+        shutil.copy(self.get_resources_dir() + filename, path)
+        return path
+
+    @staticmethod
+    def get_lines_processor(filepath: str, cache: ParseCache) -> LinesProcessor:
+        proxies = {
+            'CAR_PROXY_NAME': 'carfoo',
+            'BALL_PROXY_NAME': 'ballfoo',
+            'STADIUM_PROXY_NAME': 'stadiumfoo'
+        }
+        processor = LinesProcessor(filepath, proxies, 1.0, True, 0, 999999999, 60.0, MagicMock(name='scn'), 1.0,
+                                   35.0, True, False, 1)
+        processor.set_parse_cache(cache)
+        return processor
+
+    def process(self, processor: LinesProcessor) -> list:
+        with patch.object(LinesProcessor, 'process_objects') as mock_method:
+            processor.process()
+        return [(args[2].tolist(), args[1].frame.tolist(), args[1].locations['BALL'].tolist())
+                for args, kwargs in mock_method.call_args_list]
+
+    def test_miss_then_hit(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path)
+        assert cache.load(filepath)[1] is None
+
+        uncached = self.process(self.get_lines_processor(filepath, None))
+        first = self.process(self.get_lines_processor(filepath, cache))
+        with patch.object(ColumnarParser, 'parse_text', side_effect=AssertionError('parsed on cache hit')):
+            second = self.process(self.get_lines_processor(filepath, cache))
+
+        assert first == uncached
+        assert second == uncached
+        processor = self.get_lines_processor(filepath, cache)
+        headers, data = cache.load(filepath, processor.get_cache_variant())[1]
+        assert headers['cars'] == 4
+        assert data.ended
+
+    def test_touched_file_hits_by_content(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path)
+        self.process(self.get_lines_processor(filepath, cache))
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with patch.object(ColumnarParser, 'parse_text', side_effect=AssertionError('parsed on cache hit')):
+            self.process(self.get_lines_processor(filepath, cache))
+
+    def test_modified_file_misses(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path)
+        self.process(self.get_lines_processor(filepath, cache))
+        with open(filepath, 'a') as f:
+            f.write('\n')
+        assert cache.load(filepath, self.get_lines_processor(filepath, cache).get_cache_variant())[1] is None
+
+    def test_eviction(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'), max_size=1)
+        first = self.copy_export(tmp_path)
+        second = self.copy_export(tmp_path, 'testall.txt')
+        self.process(self.get_lines_processor(first, cache))
+        self.process(self.get_lines_processor(second, cache))
+
+        assert len([f for f in os.listdir(cache.directory) if f.endswith('.npz')]) == 1
+        variant = self.get_lines_processor(first, cache).get_cache_variant()
+        assert cache.load(first, variant)[1] is None
+        assert cache.load(second, variant)[1] is not None
+
+    def test_miss_hashes_once(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path)
+        with patch.object(ParseCache, 'get_content_hash', wraps=ParseCache.get_content_hash) as get_content_hash:
+            self.process(self.get_lines_processor(filepath, cache))
+        assert get_content_hash.call_count == 1
+
+    def get_range_processor(self, filepath: str, cache: ParseCache, replay_frame_start: int) -> LinesProcessor:
+        processor = self.get_lines_processor(filepath, cache)
+        processor.set_objects(['CAM', 'BALL'])
+        processor.replay_frame_start = replay_frame_start
+        processor.replay_frame_end = 1500
+        return processor
+
+    def test_entry_covers_every_frame_range(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path, 'testall.txt')
+        self.process(self.get_range_processor(filepath, cache, 1400))
+
+        headers, data = cache.load(filepath, self.get_range_processor(filepath, cache, 0).get_cache_variant())[1]
+        assert list(data.locations) == ['CAM', 'BALL']
+        assert data.ended
+        assert data.replay_frame[0] < 1400 < 1500 < data.replay_frame[-1]
+        # another start frame (e.g. from another snapshot file) hits the same entry
+        expected = self.process(self.get_range_processor(filepath, None, 1300))
+        with patch.object(ColumnarParser, 'parse_text', side_effect=AssertionError('parsed on cache hit')):
+            assert self.process(self.get_range_processor(filepath, cache, 1300)) == expected
+        other = self.get_lines_processor(filepath, cache)
+        assert cache.load(filepath, other.get_cache_variant())[1] is None
+
+    def test_miss_keys_blocks_before_saving(self, tmp_path):
+        cache = ParseCache(str(tmp_path / 'cache'))
+        filepath = self.copy_export(tmp_path, 'testall.txt')
+        processor = self.get_lines_processor(filepath, cache)
+        processor.block_size = 200
+        keyed = []
+        with patch.object(LinesProcessor, 'process_objects', side_effect=lambda *args: keyed.append(len(args[1]))):
+            with patch.object(ParseCache, 'save', side_effect=lambda *args: keyed.append('save')):
+                processor.process()
+        # the blocks are keyed as they are decoded, not after the whole export is
+        assert keyed.index('save') > 1
@@ -0,0 +1,142 @@
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+from io_import_cinematics_buddy.ops import chunking
+from io_import_cinematics_buddy.ops.chunking import ChunkedParser, get_line_ranges
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser, ExportData
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.tests.base import BaseTest
+from io_import_cinematics_buddy.tests.test_ops import test_batch
+
+
+def data_start_line(lines: list) -> int:
+    """Index of the first data line, the one after the column titles."""
+    return next(index for index, line in enumerate(lines) if line.startswith('Frame\t')) + 1
+
+
+class FakeExecutor:
+    """Runs submitted jobs in this process, recording how many were submitted."""
+
+    def __init__(self, workers: int, mp_context=None):
+        self.submitted = 0
+        FakeExecutor.last = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, job) -> Future:
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(job))
+        return future
+
+
+class TestChunkedParser(BaseTest):
+
+    @staticmethod
+    def read_data_start(processor: LinesProcessor) -> int:
+        with open(processor.filepath) as fp:
+            processor.read_header(fp, {})
+            return fp.tell()
+
+    def get_processor(self, filename: str) -> LinesProcessor:
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = LinesProcessor(self.get_resources_dir() + filename, proxies, 0.01, True, 0, 999999999, 60.0,
+                                   MagicMock(name='scn'), 1.0, 35.0, False, False, 1)
+        processor.block_size = 500
+        return processor
+
+    @staticmethod
+    def assert_same(data: ExportData, expected: ExportData):
+        assert data.ended == expected.ended
+        for name in ['frame', 'replay_frame', 'fov']:
+            assert getattr(data, name).dtype == getattr(expected, name).dtype
+            assert np.array_equal(getattr(data, name), getattr(expected, name))
+        for name in ['locations', 'quaternions']:
+            assert list(getattr(data, name)) == list(getattr(expected, name))
+            for prefix, array in getattr(expected, name).items():
+                assert np.array_equal(getattr(data, name)[prefix], array)
+        return
+
+    def test_line_ranges(self):
+        filepath = self.get_resources_dir() + 'testsmall.txt'
+        with open(filepath, 'rb') as fp:
+            data_end = fp.seek(0, 2)
+            ranges = get_line_ranges(fp, 100, data_end, 10000)
+            assert ranges[0][0] == 100 and ranges[-1][1] == data_end
+            assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+            for start, end in ranges[:-1]:
+                fp.seek(end - 1)
+                assert fp.read(1) == b'\n'
+        assert len(ranges) > 10
+
+    @pytest.mark.parametrize('filename,prefixes', [('testall.txt', None), ('tv425.txt', ['CAM', 'CAR2'])])
+    def test_chunks_match_single_process(self, filename, prefixes):
+        processor = self.get_processor(filename)
+        data_start = self.read_data_start(processor)
+        parser = ChunkedParser(processor.columns, prefixes, 2, 100000)
+        chunks = list(parser.parse(processor.filepath, data_start))
+        assert len(chunks) > 1
+        with open(processor.filepath) as fp:
+            fp.seek(data_start)
+            expected = ColumnarParser(processor.columns, prefixes).parse(fp)
+        self.assert_same(ExportData.concatenate(chunks), expected)
+
+    def test_malformed_line_number(self, tmp_path):
+        processor = self.get_processor('testsmall.txt')
+        data_start = self.read_data_start(processor)
+        with open(processor.filepath) as fp:
+            lines = fp.readlines()
+        lines[-40] = '1\t2\n'
+        filepath = str(tmp_path / 'malformed.txt')
+        with open(filepath, 'w') as fp:
+            fp.writelines(lines)
+        with open(filepath) as fp:
+            fp.seek(data_start)
+            with pytest.raises(Exception) as expected:
+                ColumnarParser(processor.columns).parse(fp)
+        for workers in [2, 1]:
+            parser = ChunkedParser(processor.columns, None, workers, 20000)
+            with pytest.raises(Exception) as raised:
+                list(parser.parse(filepath, data_start))
+            assert str(raised.value) == str(expected.value)
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_stops_at_end_line(self, tmp_path, workers):
+        processor = self.get_processor('testsmall.txt')
+        data_start = self.read_data_start(processor)
+        with open(processor.filepath) as fp:
+            lines = fp.readlines()
+        end = next(index for index, line in enumerate(lines) if line.startswith('END'))
+        filepath = str(tmp_path / 'trailing.txt')
+        with open(filepath, 'w') as fp:
+            fp.writelines(lines[:end + 1] + ['not a data line\n'] * 2000)
+        parser = ChunkedParser(processor.columns, None, workers, 20000)
+        chunks = list(parser.parse(filepath, data_start))
+        assert chunks[-1].ended
+        assert len(ExportData.concatenate(chunks)) == end - data_start_line(lines)
+
+    def test_chunks_in_flight_are_bounded(self):
+        processor = self.get_processor('testall.txt')
+        data_start = self.read_data_start(processor)
+        parser = ChunkedParser(processor.columns, None, 2, 20000)
+        in_flight = []
+        with patch.object(chunking, 'ProcessPoolExecutor', FakeExecutor):
+            for taken, data in enumerate(parser.parse(processor.filepath, data_start), 1):
+                in_flight.append(FakeExecutor.last.submitted - taken)
+        # one chunk is submitted as each is taken, not all of them up front
+        assert len(in_flight) > 2 * parser.chunks_per_worker
+        assert max(in_flight) == 2 * parser.chunks_per_worker
+
+    def test_processor_keys_match(self):
+        expected = self.get_processor('testall.txt').build()
+        processor = self.get_processor('testall.txt')
+        processor.set_parse_workers(2)
+        processor.parse_chunk_size = 200000
+        animation = processor.build()
+        assert processor.instrumentation.counters['parse_chunks'] > 1
+        assert test_batch.TestBatch.get_keys(animation) == test_batch.TestBatch.get_keys(expected)
@@ -0,0 +1,72 @@
+import bz2
+import gzip
+import lzma
+import pytest
+from io_import_cinematics_buddy.ops.cache import ParseCache
+from io_import_cinematics_buddy.ops.compression import get_compression, strip_compression_extension
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestCompression(BaseTest):
+
+    def get_processor(self, filepath: str, replay_frame_start: int = 0, replay_frame_end: int = 999999999):
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        return LinesProcessor(filepath, proxies, 0.01, True, replay_frame_start, replay_frame_end, 60.0, None, 1.0,
+                              35.0, False, False, 1)
+
+    def write_compressed(self, tmp_path, module, extension: str) -> str:
+        with open(self.get_resources_dir() + 'testsmall.txt', 'rb') as fp:
+            content = fp.read()
+        filepath = str(tmp_path / ('testsmall.txt' + extension))
+        with module.open(filepath, 'wb') as fp:
+            fp.write(content)
+        return filepath
+
+    @staticmethod
+    def get_keys(animation) -> dict:
+        keys = {}
+        for obj in animation.objects:
+            for data_path, channel in list(obj.channels.items()) + list(obj.data_channels.items()):
+                frames, values = channel.get_added_keys()
+                keys[obj.prefix, data_path] = (frames.tolist(), values.tolist())
+        return keys
+
+    @pytest.mark.parametrize('module, extension', [(gzip, '.gz'), (lzma, '.xz'), (bz2, '.bz2')])
+    def test_matches_plain_export(self, tmp_path, module, extension):
+        filepath = self.write_compressed(tmp_path, module, extension)
+        assert get_compression(filepath) is module
+        animation = self.get_processor(filepath).build()
+        expected = self.get_processor(self.get_resources_dir() + 'testsmall.txt').build()
+        assert animation.frame_end == expected.frame_end
+        assert self.get_keys(animation) == self.get_keys(expected)
+
+    def test_plain_export_is_not_compressed(self):
+        assert get_compression(self.get_resources_dir() + 'testsmall.txt') is None
+
+    def test_range_import(self, tmp_path):
+        filepath = self.write_compressed(tmp_path, gzip, '.gz')
+        processor = self.get_processor(filepath, 1280, 1300)
+        animation = processor.build()
+        expected = self.get_processor(self.get_resources_dir() + 'testsmall.txt', 1280, 1300).build()
+        assert processor.instrumentation.counters['lines_keyed'] == 58
+        assert self.get_keys(animation) == self.get_keys(expected)
+
+    def test_parse_cache(self, tmp_path):
+        filepath = self.write_compressed(tmp_path, lzma, '.xz')
+        expected = self.get_processor(self.get_resources_dir() + 'testsmall.txt').build()
+        for _ in range(2):
+            processor = self.get_processor(filepath)
+            processor.set_parse_cache(ParseCache(str(tmp_path / 'cache')))
+            assert self.get_keys(processor.build()) == self.get_keys(expected)
+
+    def test_follow_is_refused(self, tmp_path):
+        processor = self.get_processor(self.write_compressed(tmp_path, bz2, '.bz2'))
+        processor.set_follow(True)
+        with pytest.raises(Exception, match=r'(?i)compressed'):
+            processor.build()
+
+    def test_strip_compression_extension(self):
+        assert strip_compression_extension('/a/b.txt.gz') == '/a/b.txt'
+        assert strip_compression_extension('/a/b.txt.XZ') == '/a/b.txt'
+        assert strip_compression_extension('/a/b.txt') == '/a/b.txt'
@@ -0,0 +1,76 @@
+from math import radians
+import numpy as np
+from io_import_cinematics_buddy.ops.decimation import decimate, location_errors, lossless_keep, rotation_errors
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestDecimation(BaseTest):
+
+    @staticmethod
+    def interpolate_all(times: np.ndarray, values: np.ndarray, keep: np.ndarray) -> np.ndarray:
+        return np.column_stack([np.interp(times, times[keep], values[keep, x]) for x in range(values.shape[1])])
+
+    def test_straight_line(self):
+        times = np.arange(100) * 0.5
+        values = np.column_stack((times * 2.0, times * -1.0, np.full(100, 3.0)))
+        keep, max_error = decimate(times, values, 0.001, location_errors)
+        assert keep.tolist() == [0, 99]
+        assert max_error < 1e-9
+
+    def test_location_error_bound(self):
+        times = np.arange(2000) * 0.25
+        values = np.column_stack((np.sin(times / 10.0), np.cos(times / 7.0), times * 0.01))
+        tolerance = 0.002
+        keep, max_error = decimate(times, values, tolerance, location_errors)
+        errors = location_errors(values, self.interpolate_all(times, values, keep))
+        assert len(keep) < len(times) / 2
+        assert errors.max() <= tolerance
+        assert abs(errors.max() - max_error) < 1e-9
+
+    def test_rotation_error_bound(self):
+        times = np.arange(1000) * 0.5
+        angles = times / 20.0
+        values = np.column_stack((np.cos(angles / 2), np.zeros(1000), np.zeros(1000), np.sin(angles / 2)))
+        tolerance = radians(0.1)
+        keep, max_error = decimate(times, values, tolerance, rotation_errors)
+        errors = rotation_errors(values, self.interpolate_all(times, values, keep))
+        assert len(keep) < len(times) / 5
+        assert errors.max() <= tolerance
+        assert max_error <= tolerance
+
+    def test_zero_tolerance_keeps_curved_keys(self):
+        times = np.arange(10, dtype=np.float64)
+        values = (times ** 2)[:, None]
+        keep, max_error = decimate(times, values, 0.0, location_errors)
+        assert len(keep) == 10
+
+    def test_lossless_constant_runs(self):
+        times = np.arange(20, dtype=np.float64)
+        values = np.column_stack((np.concatenate((np.zeros(8), np.arange(4) + 1.0, np.full(8, 4.0))), np.zeros(20)))
+        keep = lossless_keep(times, values)
+        # the ramp from 0 to 4 is a straight line between the last zero and the first 4
+        assert keep.tolist() == [0, 7, 11, 19]
+        assert np.array_equal(self.interpolate_all(times, values, keep), values)
+
+    def test_lossless_keeps_curves(self):
+        times = np.arange(50) * 0.5
+        values = np.column_stack((np.sin(times), np.cos(times)))
+        assert len(lossless_keep(times, values)) == 50
+
+    def test_lossless_slow_curvature(self):
+        # every key is within float32 resolution of its neighbours' line, the whole run is not
+        times = np.arange(2000, dtype=np.float64)
+        values = (1000.0 + 1e-8 * (times - 1000.0) ** 2)[:, None]
+        keep = lossless_keep(times, values)
+        tolerance = np.finfo(np.float32).eps * np.abs(values).max()
+        assert len(keep) < 2000
+        assert np.abs(self.interpolate_all(times, values, keep) - values).max() <= tolerance
+
+    def test_lossless_per_component_tolerance(self):
+        times = np.arange(20, dtype=np.float64)
+        # a large constant component must not hide a small one's straight line bending
+        small = 1e-4 * times + np.where(times == 10, 1e-9, 0.0)
+        values = np.column_stack((np.full(20, 1e6), small))
+        keep = lossless_keep(times, values)
+        assert keep.tolist() == [0, 9, 10, 11, 19]
+        assert lossless_keep(times, np.column_stack((np.full(20, 1e6), 1e-4 * times))).tolist() == [0, 19]
@@ -0,0 +1,113 @@
+import json
+from time import perf_counter
+from unittest.mock import MagicMock, patch
+import pytest
+import subprocess
+import sys
+from io_import_cinematics_buddy.ops import cinematics_buddy_import
+from io_import_cinematics_buddy.ops.following import FileFollower
+from io_import_cinematics_buddy.ops.cinematics_buddy_import import Importer
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.ops.stepping import StepEngine
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+# appends the bytes of a file in small chunks that split lines, pausing between them
+WRITER = '''
+import sys, time
+with open(sys.argv[1], 'rb') as source:
+    content = source.read()
+with open(sys.argv[2], 'ab') as target:
+    for start in range(0, len(content), int(sys.argv[3])):
+        target.write(content[start:start + int(sys.argv[3])])
+        target.flush()
+        time.sleep(float(sys.argv[4]) if len(sys.argv) > 4 else 0.002)
+'''
+
+
+class TestFileFollower(BaseTest):
+
+    def test_partial_lines_are_buffered(self, tmp_path):
+        filepath = tmp_path / 'export.txt'
+        filepath.write_bytes(b'1\t2\n3\t')
+        with open(str(filepath), 'rb') as fp:
+            follower = FileFollower(fp, 0.01, 1.0)
+            assert follower.read_lines() == '1\t2\n'
+            with open(str(filepath), 'ab') as writer:
+                writer.write(b'4\n5\t6\nEN')
+            assert follower.read_lines() == '3\t4\n5\t6\n'
+            with open(str(filepath), 'ab') as writer:
+                writer.write(b'D')
+            assert follower.read_lines() == 'END'
+            assert follower.ended
+            assert follower.readline() == ''
+
+    def test_timeout(self, tmp_path):
+        filepath = tmp_path / 'export.txt'
+        filepath.write_bytes(b'1\t2')
+        with open(str(filepath), 'rb') as fp:
+            with pytest.raises(Exception, match=r'(?i)stopped growing'):
+                FileFollower(fp, 0.01, 0.05).read_lines()
+
+    def get_processor(self, filepath: str) -> LinesProcessor:
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        return LinesProcessor(filepath, proxies, 0.01, True, 0, 999999999, 60.0, None, 1.0, 35.0, False, False, 1)
+
+    def test_follow_writer_process(self, tmp_path):
+        source = self.get_resources_dir() + 'testsmall.txt'
+        filepath = str(tmp_path / 'export.txt')
+        open(filepath, 'wb').close()
+        writer = subprocess.Popen([sys.executable, '-c', WRITER, source, filepath, '997'])
+        try:
+            processor = self.get_processor(filepath)
+            processor.set_follow(True, poll_interval=0.001, timeout=10.0)
+            animation = processor.build()
+        finally:
+            writer.wait()
+
+        expected = self.get_processor(source).build()
+        assert processor.instrumentation.counters['follow_batches'] > 1
+        assert animation.frame_end == expected.frame_end
+        for obj in expected.objects:
+            for data_path, channel in obj.channels.items():
+                frames, values = channel.get_added_keys()
+                followed_frames, followed_values = animation.get_object(obj.prefix).channels[data_path].get_added_keys()
+                assert followed_frames.tolist() == frames.tolist()
+                assert followed_values.tolist() == values.tolist()
+
+    def test_follow_steps_while_waiting(self, tmp_path):
+        source = self.get_resources_dir() + 'testsmall.txt'
+        filepath = str(tmp_path / 'export.txt')
+        open(filepath, 'wb').close()
+        writer_process = subprocess.Popen([sys.executable, '-c', WRITER, source, filepath, '20000', '0.1'])
+        try:
+            processor = self.get_processor(filepath)
+            processor.set_follow(True, poll_interval=0.3, timeout=10.0)
+            processor.set_threaded(True)
+            writer = MagicMock(name='writer')
+            processor.create_writer = MagicMock(return_value=writer)
+            engine = StepEngine(processor.process_steps(), 0.02)
+            durations = []
+            while True:
+                start = perf_counter()
+                running = engine.step()
+                durations.append(perf_counter() - start)
+                if not running:
+                    break
+        finally:
+            writer_process.wait()
+
+        # the waits for the export to grow happen on the build thread, keys reach the writer batch by batch
+        assert max(durations) < 0.2
+        assert writer.write_keys.call_count > 1
+        writer.finish_keys.assert_called_once_with(engine.result)
+
+    def test_follow_turns_off_whole_animation_options(self, tmp_path):
+        report_filename = str(tmp_path / 'report.json')
+        args = [None, self.get_resources_dir() + 'testsmall.txt', 0, 999999999, 60.0, False, 'c', 'b', 's', '', 1.0,
+                35.0, False, False, 1, True, 0, True, 0.0, 0.0, report_filename, None, False, 5.0, None, 0, True]
+        with patch.object(cinematics_buddy_import.bpy.path, 'abspath', side_effect=lambda path: path):
+            assert Importer.import_cinematics_data(*args) == {'FINISHED'}
+        with open(report_filename) as fp:
+            report = json.load(fp)
+        assert report['ignored_options'] == ['Bulk Keyframes', 'Resample to Target Frames', 'Drop Redundant Keyframes']
+        assert report['counters']['lines_keyed'] > 0
@@ -0,0 +1,54 @@
+import json
+from time import sleep
+from io_import_cinematics_buddy.ops.instrumentation import Instrumentation, Progress
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestInstrumentation(BaseTest):
+
+    def test_nested_stages_are_exclusive(self):
+        instrumentation = Instrumentation()
+
+        def produce():
+            for x in range(3):
+                sleep(0.01)
+                yield x
+
+        with instrumentation.stage('outer'):
+            for item in instrumentation.time_iterator('inner', produce()):
+                sleep(0.02)
+        assert 0.025 <= instrumentation.seconds['inner'] < 0.055
+        assert 0.055 <= instrumentation.seconds['outer']
+        assert not instrumentation.stack
+
+    def test_report(self, tmp_path):
+        instrumentation = Instrumentation()
+        instrumentation.count('lines_read', 10)
+        instrumentation.count('lines_read', 5)
+        instrumentation.add_keys('CAR1', 7)
+        filepath = str(tmp_path / 'report.json')
+        instrumentation.write_report(filepath, {'filepath': 'export.txt'})
+        with open(filepath) as fp:
+            report = json.load(fp)
+        assert report['counters'] == {'lines_read': 15}
+        assert report['keys'] == {'CAR1': 7}
+        assert report['filepath'] == 'export.txt'
+
+    def test_progress_is_throttled(self):
+        messages = []
+        progress = Progress(messages.append, 1000, interval=3600.0, step=25.0)
+        for done in range(0, 1001, 10):
+            progress.update(done)
+        assert messages == ['Read {} of 1000 lines ({}%)'.format(x * 10, x) for x in (25, 50, 75, 100)]
+
+    def test_processor_counters(self):
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = LinesProcessor(self.get_resources_dir() + 'testsmall.txt', proxies, 0.01, False, 1280, 1300,
+                                   60.0, None, 1.0, 35.0, False, False, 1)
+        processor.build()
+        counters = processor.instrumentation.counters
+        # lines with replay frames 1280 to 1300
+        assert counters['lines_keyed'] == 58
+        assert counters['lines_read'] == counters['lines_keyed'] + counters['lines_skipped']
+        assert {'header', 'parse', 'timing', 'keyframe', 'finish'} <= set(processor.instrumentation.seconds)
@@ -0,0 +1,406 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import numpy as np
+from io_import_cinematics_buddy.ops import keyframers
+from io_import_cinematics_buddy.ops.animation import Animation, CarAnimation, Channel, ObjectAnimation
+from io_import_cinematics_buddy.ops.keyframers import AnimationWriter, CarKeyframer, ObjectKeyframer, Preview, \
+    SharedActions, LINEAR
+from io_import_cinematics_buddy.ops.processors import consts
+from io_import_cinematics_buddy.ops.retiming import TimeMap
+from io_import_cinematics_buddy.ops.tracks import CarTrack
+from io_import_cinematics_buddy.tests.base import BaseTest
+from io_import_cinematics_buddy.tests.test_ops.test_tracks import add_subframes, get_data
+
+
+class TestObjectKeyframer(BaseTest):
+
+    @staticmethod
+    def get_keyframer() -> ObjectKeyframer:
+        return ObjectKeyframer(ObjectAnimation('CAR1', 'CAR1'), consts, MagicMock(name='scn'))
+
+    @staticmethod
+    def get_target():
+        target = MagicMock(name='target')
+        target.animation_data.action.fcurves.find.return_value = None
+        fcurves = [MagicMock(name='fcurve{}'.format(x)) for x in range(4)]
+        target.animation_data.action.fcurves.new.side_effect = fcurves
+        return target, fcurves
+
+    def test_add_keys_one_call_per_fcurve(self):
+        target, fcurves = self.get_target()
+        channel = Channel('rotation_quaternion', 4, 'Object Transforms', 10)
+        for x in range(10):
+            channel.add(x * 0.5, (1.0, 0.0, 0.0, x))
+        self.get_keyframer().add_keys(channel, target)
+
+        assert target.animation_data.action.fcurves.new.call_count == 4
+        for index, fcurve in enumerate(fcurves):
+            fcurve.keyframe_points.add.assert_called_once_with(10)
+            fcurve.update.assert_called_once()
+            calls = {args[0]: args[1] for args, kwargs in fcurve.keyframe_points.foreach_set.call_args_list}
+            co = np.asarray(calls['co'])
+            assert co[0::2].tolist() == [x * 0.5 for x in range(10)]
+            assert co[1::2].tolist() == [[1.0, 0.0, 0.0, x][index] for x in range(10)]
+            assert calls['interpolation'] == [LINEAR] * 10
+
+    def test_add_keys_empty(self):
+        target, fcurves = self.get_target()
+        self.get_keyframer().add_keys(Channel('location', 3), target)
+        target.animation_data.action.fcurves.new.assert_not_called()
+
+    def test_insert_keys_in_added_order(self):
+        target = MagicMock(name='target')
+        inserted = []
+        target.keyframe_insert.side_effect = lambda data_path, frame: inserted.append((frame, target.lens))
+        channel = Channel('lens')
+        for frame, lens in ((2.0, 20.0), (1.0, 10.0), (1.005, 11.0)):
+            channel.add(frame, (lens,))
+        self.get_keyframer().insert_keys(channel, target)
+        assert inserted == [(2.0, 20.0), (1.0, 10.0), (1.005, 11.0)]
+
+
+class TestKeyframerUpdates(BaseTest):
+    subframes = 50
+
+    def get_keyframer(self, bulk: bool) -> CarKeyframer:
+        track = CarTrack('CAR1', {'frames': self.subframes}, consts, 1.0)
+        add_subframes(track, self.subframes)
+        keyframer = CarKeyframer(track.finish(), dict(consts, CAR_PROXY_NAME='carfoo'), MagicMock(name='scn'))
+        keyframer.set_bulk(bulk)
+        keyframer.obj = MagicMock(name='CAR1')
+        return keyframer
+
+    def test_insert_mode_updates_each_curve_once(self):
+        keyframer = self.get_keyframer(False)
+        fcurves = [MagicMock(name='fcurve{}'.format(x)) for x in range(7)]
+        for fcurve in fcurves:
+            fcurve.keyframe_points.__len__.return_value = self.subframes
+        keyframer.obj.animation_data.action.fcurves = fcurves
+
+        keyframer.write()
+
+        assert keyframer.obj.keyframe_insert.call_count == self.subframes * 2
+        for fcurve in fcurves:
+            assert fcurve.update.call_count == 1
+
+    def test_bulk_mode_updates_each_curve_once(self):
+        keyframer = self.get_keyframer(True)
+        fcurves = [MagicMock(name='fcurve{}'.format(x)) for x in range(7)]
+        keyframer.obj.animation_data.action.fcurves.find.return_value = None
+        keyframer.obj.animation_data.action.fcurves.new.side_effect = fcurves
+
+        keyframer.write()
+
+        keyframer.obj.keyframe_insert.assert_not_called()
+        for fcurve in fcurves:
+            assert fcurve.update.call_count == 1
+            fcurve.keyframe_points.add.assert_called_once_with(self.subframes)
+
+
+class TestAnimationWriter(BaseTest):
+
+    def test_scene_settings(self):
+        track = CarTrack('CAR1', {'frames': 10}, consts, 1.0)
+        add_subframes(track, 10)
+        animation = track.finish()
+        scn = MagicMock(name='scn')
+        writer = AnimationWriter(scn, dict(consts, CAR_PROXY_NAME='carfoo'))
+        writer.create_keyframer = MagicMock(name='create_keyframer')
+        result = Animation({}, [animation])
+        result.fps = 60
+        result.frame_start = 1
+        result.frame_end = 6
+        writer.write(result)
+
+        writer.create_keyframer.assert_called_once_with(animation)
+        assert (scn.render.fps, scn.frame_start, scn.frame_end) == (60, 1, 6)
+
+    def test_streamed_keys(self):
+        track = CarTrack('CAR1', {'frames': 20}, consts, 1.0)
+        scn = MagicMock(name='scn')
+        writer = AnimationWriter(scn, dict(consts, CAR_PROXY_NAME='carfoo'), False)
+        obj = MagicMock(name='CAR1')
+        inserted = []
+        obj.keyframe_insert.side_effect = lambda data_path, frame: inserted.append((data_path, frame))
+        data = get_data()
+        for start in (0, 10):
+            track.add_subframes(np.arange(start, start + 10) * 0.5, data.take(slice(start, start + 10)))
+            part = track.take_added_keys()
+            assert len(part.channels['location']) == 10
+            if start == 0:
+                writer.keyframers['CAR1'] = writer.create_keyframer(part)
+                writer.keyframers['CAR1'].obj = obj
+            writer.write_keys([part])
+
+        result = Animation({}, [track.finish()])
+        result.fps = 60
+        writer.finish_keys(result)
+        frames = [frame for data_path, frame in inserted if data_path == 'location']
+        assert frames == (np.arange(20) * 0.5 + 1).tolist()
+        assert scn.render.fps == 60
+
+
+class FakeAction(dict):
+
+    def __init__(self, name: str, frame_range: tuple, **tags):
+        super().__init__(**tags)
+        self.name = name
+        self.frame_range = frame_range
+
+
+class TestSharedActions(BaseTest):
+
+    @staticmethod
+    def get_actions() -> list:
+        return [
+            FakeAction('CAR1Action', (1.0, 50.5), cb_fingerprint='abc', cb_prefix='CAR1', cb_blender_start_frame=1,
+                       cb_frame_end=51),
+            FakeAction('BALLAction', (1.0, 50.5), cb_fingerprint='abc', cb_prefix='BALL', cb_blender_start_frame=1,
+                       cb_frame_end=51),
+            FakeAction('CAR1Action.001', (1.0, 50.5), cb_fingerprint='def', cb_prefix='CAR1',
+                       cb_blender_start_frame=1),
+            FakeAction('Untagged', (1.0, 2.0)),
+        ]
+
+    @patch.object(keyframers.bpy, 'data', MagicMock(name='data'))
+    def test_find(self):
+        keyframers.bpy.data.actions = self.get_actions()
+        shared_actions = SharedActions('abc', 101)
+        assert {prefix: action.name for prefix, action in shared_actions.find().items()} == {
+            'CAR1': 'CAR1Action', 'BALL': 'BALLAction'}
+        assert list(shared_actions.find(['CAM', 'BALL'])) == ['BALL']
+        assert shared_actions.get_frame_end() == 151
+
+    def test_link(self):
+        action = self.get_actions()[0]
+        target = MagicMock(name='target')
+        SharedActions('abc', 1).link(target, action)
+        assert target.animation_data.action is action
+        target.animation_data.nla_tracks.new.assert_not_called()
+
+        target = MagicMock(name='target')
+        action.frame_range = (1.5, 50.5)
+        SharedActions('abc', 11).link(target, action)
+        strips = target.animation_data.nla_tracks.new.return_value.strips
+        strips.new.assert_called_once_with(SharedActions.strip_name, 11, action)
+        assert strips.new.return_value.action_frame_start == 1
+
+    @patch.object(keyframers.bpy, 'data', MagicMock(name='data'))
+    def test_writer_tags_and_links(self):
+        keyframers.bpy.data.actions = self.get_actions()
+        shared_actions = SharedActions('abc', 11)
+        shared_actions.find(['BALL'])
+        scn = MagicMock(name='scn')
+        writer = AnimationWriter(scn, dict(consts, CAR_PROXY_NAME='carfoo', BALL_PROXY_NAME='ballfoo'))
+        writer.set_shared_actions(shared_actions)
+        keyed = writer.create_keyframer(CarAnimation('CAR2', 'CAR2'))
+        keyed.obj = MagicMock(name='CAR2')
+        action = FakeAction('CAR2Action', (11.0, 60.0))
+        keyed.obj.animation_data.action = action
+        result = Animation({}, [])
+        result.fps = 60
+        result.frame_end = 61
+        with patch.object(CarKeyframer, 'get_object') as get_object:
+            writer.write_scene(result, [keyed])
+        assert action == {'cb_fingerprint': 'abc', 'cb_prefix': 'CAR2', 'cb_blender_start_frame': 11,
+                          'cb_frame_end': 61}
+        get_object.assert_called_once_with()
+        strips = get_object.return_value.animation_data.nla_tracks.new.return_value.strips
+        strips.new.assert_called_once_with(SharedActions.strip_name, 11, keyframers.bpy.data.actions[1])
+        assert writer.instrumentation.counters['actions_shared'] == 1
+
+    @patch.object(keyframers.bpy, 'data', MagicMock(name='data'))
+    def test_frame_range_of_shared_only_import(self):
+        keyframers.bpy.data.actions = self.get_actions()
+        shared_actions = SharedActions('abc', 11)
+        shared_actions.find()
+        scn = MagicMock(name='scn')
+        writer = AnimationWriter(scn, dict(consts, CAR_PROXY_NAME='carfoo', BALL_PROXY_NAME='ballfoo'))
+        writer.set_shared_actions(shared_actions)
+        result = Animation({}, [])
+        result.fps = 60
+        with patch.object(CarKeyframer, 'get_object'):
+            writer.write_scene(result, [])
+        assert (scn.frame_start, scn.frame_end) == (11, 61)
+
+
+class FakePoints:
+    """Keyframe points of an F-curve: add() grows them, foreach_set() needs a value for every point."""
+
+    def __init__(self):
+        self.co = []
+
+    def __len__(self) -> int:
+        return len(self.co) // 2
+
+    def add(self, count: int):
+        self.co += [0.0, 0.0] * count
+
+    def foreach_set(self, attribute: str, values):
+        if attribute == 'co':
+            assert len(values) == len(self.co)
+            self.co = list(values)
+
+
+class FakeStrips(list):
+
+    def new(self, name: str, start: int, action):
+        strip = MagicMock(name=name)
+        strip.name = name
+        strip.frame_start = start
+        strip.action = action
+        self.append(strip)
+        return strip
+
+
+class FakeTracks(list):
+
+    def new(self):
+        track = SimpleNamespace(name='', strips=FakeStrips())
+        self.append(track)
+        return track
+
+
+class TestPreview(BaseTest):
+    subframes = 30
+    # every 4th key and the last one
+    preview_frames = [x * 0.5 + 1 for x in (0, 4, 8, 12, 16, 20, 24, 28, 29)]
+
+    def get_animation(self) -> Animation:
+        track = CarTrack('CAR1', {'frames': self.subframes}, consts, 1.0)
+        add_subframes(track, self.subframes)
+        result = Animation({}, [track.finish()])
+        result.fps = 60
+        result.frame_start = 1
+        result.frame_end = 12
+        return result
+
+    @staticmethod
+    def get_writer(bulk: bool, preview: Preview = None) -> AnimationWriter:
+        writer = AnimationWriter(MagicMock(name='scn'), dict(consts, CAR_PROXY_NAME='carfoo'), bulk)
+        writer.set_preview(preview)
+        return writer
+
+    @staticmethod
+    def get_fcurve_points(writer: AnimationWriter, animation: Animation) -> dict:
+        obj = MagicMock(name='CAR1')
+        fcurves = {}
+
+        def new(data_path, index, action_group):
+            fcurve = MagicMock(name='{}[{}]'.format(data_path, index))
+            fcurve.keyframe_points = FakePoints()
+            fcurves[data_path, index] = fcurve
+            return fcurve
+
+        obj.animation_data.action.fcurves.find.side_effect = lambda data_path, index: fcurves.get((data_path, index))
+        obj.animation_data.action.fcurves.new.side_effect = new
+        keyframer = writer.create_keyframer(animation.objects[0])
+        keyframer.obj = obj
+        writer.create_keyframer = MagicMock(return_value=keyframer)
+        return fcurves
+
+    def test_bulk_refine_matches_write(self):
+        animation = self.get_animation()
+        expected_writer = self.get_writer(True)
+        expected = self.get_fcurve_points(expected_writer, animation)
+        expected_writer.write(animation)
+
+        writer = self.get_writer(True, Preview(4))
+        fcurves = self.get_fcurve_points(writer, animation)
+        steps = writer.write_steps(animation)
+        stages = [next(steps)[0]]
+        assert fcurves['location', 0].keyframe_points.co[0::2] == self.preview_frames
+        stages += [stage for stage, fraction in steps]
+        assert stages == sorted(stages, key=['preview', 'refine'].index) and stages[-1] == 'refine'
+        assert {key: fcurve.keyframe_points.co for key, fcurve in fcurves.items()} == {
+            key: fcurve.keyframe_points.co for key, fcurve in expected.items()}
+
+    def test_stop_keeps_preview(self):
+        animation = self.get_animation()
+        preview = Preview(4)
+        writer = self.get_writer(False, preview)
+        inserted = []
+        obj = MagicMock(name='CAR1')
+        obj.keyframe_insert.side_effect = lambda data_path, frame: inserted.append((data_path, frame))
+        keyframer = writer.create_keyframer(animation.objects[0])
+        keyframer.obj = obj
+        keyframer.insert_step = 5
+        writer.create_keyframer = MagicMock(return_value=keyframer)
+
+        progress = []
+        for stage, fraction in writer.write_steps(animation):
+            progress.append((stage, fraction))
+            if stage == 'refine':
+                preview.stop()
+        frames = [frame for data_path, frame in inserted if data_path == 'location']
+        assert frames[:9] == self.preview_frames
+        assert [stage for stage, fraction in progress].count('refine') == 1
+        assert frames[9:] == [x * 0.5 + 1 for x in (1, 2, 3, 5, 6)]
+        assert (writer.scn.frame_start, writer.scn.frame_end) == (1, 12)
+
+    def test_no_refine(self):
+        animation = self.get_animation()
+        writer = self.get_writer(False, Preview(4, False))
+        inserted = []
+        obj = MagicMock(name='CAR1')
+        obj.keyframe_insert.side_effect = lambda data_path, frame: inserted.append((data_path, frame))
+        keyframer = writer.create_keyframer(animation.objects[0])
+        keyframer.obj = obj
+        writer.create_keyframer = MagicMock(return_value=keyframer)
+        assert {stage for stage, fraction in writer.write_steps(animation)} == {'preview'}
+        assert [frame for data_path, frame in inserted if data_path == 'location'] == self.preview_frames
+
+    @staticmethod
+    def set_time_map(animation: Animation, keyframer: ObjectKeyframer):
+        """Key animation on replay time played at half speed, into an object that can have NLA strips."""
+        animation.time_map = TimeMap(np.array([1.0, 15.5]), np.array([1.0, 30.0]), 100, 1)
+        animation.action_frame_end = 15.5
+        animation.frame_end = 30
+        action = keyframer.obj.animation_data.action
+        action.frame_range = (1.0, 15.5)
+        keyframer.obj.animation_data = SimpleNamespace(action=action, nla_tracks=FakeTracks())
+        return action
+
+    @patch.object(keyframers.bpy, 'data', MagicMock(name='data'))
+    def test_preview_plays_on_time_map(self):
+        animation = self.get_animation()
+        expected_writer = self.get_writer(True)
+        expected = self.get_fcurve_points(expected_writer, animation)
+        expected_writer.write(animation)
+
+        writer = self.get_writer(True, Preview(4))
+        fcurves = self.get_fcurve_points(writer, animation)
+        keyframer = writer.create_keyframer.return_value
+        action = self.set_time_map(animation, keyframer)
+        animation_data = keyframer.obj.animation_data
+        steps = writer.write_steps(animation)
+        # up to the first refine step
+        next(stage for stage, fraction in steps if stage == 'refine')
+        # the preview already plays through the strip, on scene frames
+        assert animation_data.action is None
+        assert [track.strips[0].action for track in animation_data.nla_tracks] == [action]
+        writer.scn.__setitem__.assert_any_call('cb_replay_origin', 100)
+        assert writer.scn.frame_end == 30
+
+        list(steps)
+        assert len(animation_data.nla_tracks) == 1
+        keyframers.bpy.data.actions.new.assert_not_called()
+        assert {key: fcurve.keyframe_points.co for key, fcurve in fcurves.items()} == {
+            key: fcurve.keyframe_points.co for key, fcurve in expected.items()}
+
+    def test_insert_refine_keys_remapped_action(self):
+        animation = self.get_animation()
+        writer = self.get_writer(False, Preview(4))
+        fcurves = self.get_fcurve_points(writer, animation)
+        keyframer = writer.create_keyframer.return_value
+        keyframer.obj.animation_data.action.fcurves.find.side_effect = lambda data_path, index: fcurves.setdefault(
+            (data_path, index), MagicMock(name='{}[{}]'.format(data_path, index)))
+        inserted = []
+        keyframer.obj.keyframe_insert.side_effect = lambda data_path, frame: inserted.append((data_path, frame))
+        self.set_time_map(animation, keyframer)
+        list(writer.write_steps(animation))
+
+        # keyframe_insert() would have keyed a new action, the refine keys the one in the strip instead
+        assert [frame for data_path, frame in inserted if data_path == 'location'] == self.preview_frames
+        refined = [args[0] for args, kwargs in fcurves['location', 0].keyframe_points.insert.call_args_list]
+        assert sorted(refined + self.preview_frames) == [x * 0.5 + 1 for x in range(self.subframes)]
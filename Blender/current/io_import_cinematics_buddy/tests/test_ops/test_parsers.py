@@ -0,0 +1,133 @@
+import pytest
+from io import StringIO
+import numpy as np
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser, parse_title_line
+from io_import_cinematics_buddy.ops.processors import LinesProcessor, consts
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestColumnarParser(BaseTest):
+
+    def get_data_lines(self, filename: str) -> list:
+        with open(self.get_resources_dir() + filename) as fp:
+            lines = fp.readlines()
+        return lines[consts['DATA_LINE_START'] - 1:]
+
+    def test_matches_tokenized_lines(self):
+        lines = self.get_data_lines('testsmall.txt')
+        data = ColumnarParser(consts).parse(StringIO(''.join(lines)))
+        tokenized = [line.split() for line in lines if not line.startswith('END')]
+
+        assert data.ended
+        assert len(data) == len(tokenized)
+        for index, tokens in enumerate(tokenized):
+            line = data.line(index)
+            assert line.frame == int(tokens[consts['FRAME']])
+            assert line.replay_frame == int(tokens[consts['REPLAY_FRAME']])
+            assert line.fov == float(tokens[consts['FOV']])
+            for prefix in ['CAM', 'BALL', 'CAR1', 'CAR8']:
+                loc = [float(x) for x in tokens[consts[prefix + '_LOC']].split(',')]
+                quat = [float(x) for x in tokens[consts[prefix + '_QUAT']].split(',')]
+                assert line.location(prefix).tolist() == loc
+                assert line.quaternion(prefix).tolist() == quat
+
+    def test_array_shapes(self):
+        lines = self.get_data_lines('testsmall.txt')
+        data = ColumnarParser(consts).parse(StringIO(''.join(lines)))
+        assert data.locations['CAR3'].shape == (len(data), 3)
+        assert data.quaternions['BALL'].shape == (len(data), 4)
+
+    def test_missing_end(self):
+        lines = self.get_data_lines('testsmall.txt')[:10]
+        data = ColumnarParser(consts).parse(StringIO(''.join(lines)))
+        assert not data.ended
+        assert len(data) == 10
+
+    def test_malformed_line(self):
+        lines = self.get_data_lines('testsmall.txt')[:3]
+        lines[1] = lines[1].replace(',', ' ', 1).replace('\t', ' ', 4)[:40] + '\n'
+        with pytest.raises(Exception, match=r'(?i)malformed data line 2'):
+            ColumnarParser(consts).parse(StringIO(''.join(lines)))
+
+    def test_selected_objects_match_full_parse(self):
+        text = ''.join(self.get_data_lines('testall.txt'))
+        full = ColumnarParser(consts).parse(StringIO(text))
+        parser = ColumnarParser(consts, ['CAM', 'CAR3'])
+        data = parser.parse_blocks(StringIO(text), 100)
+        data = list(data)
+        assert parser.reduce
+        assert sorted(data[0].locations) == ['CAM', 'CAR3']
+        assert data[-1].ended
+        for prefix in ['CAM', 'CAR3']:
+            assert np.array_equal(np.concatenate([block.locations[prefix] for block in data]), full.locations[prefix])
+            assert np.array_equal(np.concatenate([block.quaternions[prefix] for block in data]),
+                                  full.quaternions[prefix])
+        assert np.array_equal(np.concatenate([block.replay_frame for block in data]), full.replay_frame)
+        assert np.array_equal(np.concatenate([block.fov for block in data]), full.fov)
+
+    def test_selected_objects_malformed_line(self):
+        lines = self.get_data_lines('testsmall.txt')[:3]
+        lines[1] = lines[1].replace(',', ' ', 1).replace('\t', ' ', 4)[:40] + '\n'
+        with pytest.raises(Exception, match=r'(?i)malformed data line 2'):
+            ColumnarParser(consts, ['BALL']).parse(StringIO(''.join(lines)))
+
+    def test_title_line(self):
+        with open(self.get_resources_dir() + 'testsmall.txt') as fp:
+            title = fp.readlines()[consts['DATA_LINE_START'] - 2]
+        positions = parse_title_line(title)
+        assert positions == {key: value for key, value in consts.items() if key.isupper() and
+                             key.endswith(('_LOC', '_QUAT', 'FRAME', 'FOV'))}
+
+    def test_title_line_with_fewer_cars(self):
+        title = 'Frame\tTimestamp\t\tCamera FOV\tCamera Position\t\tCamera Quaternions\t\tBall Position\t' \
+                'Ball Quaternions\tCar 1 Shortcut\tPosition\tQuaternions\tCar 2 Shortcut\tPosition\n'
+        positions = parse_title_line(title)
+        assert positions['CAR1_QUAT'] == 9
+        assert 'CAR2_LOC' not in positions
+        assert parse_title_line('Version: 0.9.4\n') is None
+
+
+class TestLinesProcessor(BaseTest):
+
+    def get_lines_processor(self, filepath: str):
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        return LinesProcessor(filepath, proxies, 0.01, False, 0, 999999999, 60.0, None, 1.0, 35.0, False, False, 1)
+
+    def test_header_with_extra_lines(self, tmp_path):
+        with open(self.get_resources_dir() + 'testsmall.txt') as fp:
+            lines = fp.readlines()
+        # an extra header line and metadata block shift the titles line
+        lines[1:1] = ['Map: Stadium_P\n']
+        lines[15:15] = ['EXTRA METADATA\n', 'Frames: 1\n', '\n']
+        filepath = str(tmp_path / 'shifted.txt')
+        with open(filepath, 'w') as fp:
+            fp.writelines(lines)
+
+        expected = self.get_lines_processor(self.get_resources_dir() + 'testsmall.txt').build()
+        animation = self.get_lines_processor(filepath).build()
+        assert animation.headers['frames'] == 1702
+        assert animation.headers['map'] == 'Stadium_P'
+        assert animation.frame_end == expected.frame_end
+        assert [obj.get_key_count() for obj in animation.objects] == \
+               [obj.get_key_count() for obj in expected.objects]
+
+    def test_missing_titles_line(self, tmp_path):
+        filepath = str(tmp_path / 'untitled.txt')
+        with open(filepath, 'w') as fp:
+            fp.write('Version: 0.9.4\n' * 100)
+        with pytest.raises(Exception, match=r'(?i)titles line'):
+            self.get_lines_processor(filepath).build()
+
+    def test_selected_objects(self):
+        processor = self.get_lines_processor(self.get_resources_dir() + 'testsmall.txt')
+        processor.set_objects(['CAM', 'CAR2'])
+        animation = processor.build()
+        expected = self.get_lines_processor(self.get_resources_dir() + 'testsmall.txt').build()
+        assert [obj.prefix for obj in animation.objects] == ['CAM', 'CAR2']
+        for obj in animation.objects:
+            expected_obj = expected.get_object(obj.prefix)
+            for data_path, channel in obj.channels.items():
+                frames, values = channel.get_keys()
+                expected_frames, expected_values = expected_obj.channels[data_path].get_keys()
+                assert np.array_equal(frames, expected_frames)
+                assert np.array_equal(values, expected_values)
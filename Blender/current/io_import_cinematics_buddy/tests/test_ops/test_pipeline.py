@@ -0,0 +1,96 @@
+from time import perf_counter, sleep
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+from io_import_cinematics_buddy.ops.pipeline import BuildPipeline
+from io_import_cinematics_buddy.ops.processors import SegmentsProcessor
+from io_import_cinematics_buddy.ops.stepping import StepEngine
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestBuildPipeline(BaseTest):
+
+    def get_processor(self, bulk: bool, filename: str = 'testall.txt') -> SegmentsProcessor:
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = SegmentsProcessor(self.get_resources_dir() + filename, proxies, 0.01, True, 0, 999999999, 60.0,
+                                      MagicMock(name='scn'), 1.0, 35.0, False, False, 1, bulk)
+        processor.set_snapshot_file(self.get_resources_dir() + 'unordered.json')
+        processor.block_size = 200
+        return processor
+
+    def get_threaded(self, bulk: bool) -> tuple:
+        processor = self.get_processor(bulk)
+        processor.set_threaded(True, 2)
+        writer = MagicMock(name='writer')
+        writer.write_steps.return_value = iter([('write', 1.0)])
+        processor.create_writer = MagicMock(return_value=writer)
+        return processor, writer
+
+    def test_streamed_keys_match_build(self):
+        processor, writer = self.get_threaded(False)
+        assert processor.can_stream_keys()
+        animation = processor.process()
+
+        assert writer.write_keys.call_count > 1
+        streamed = {}
+        for args, kwargs in writer.write_keys.call_args_list:
+            for part in args[0]:
+                for data_path, channel in list(part.channels.items()) + list(part.data_channels.items()):
+                    frames, values = channel.get_added_keys()
+                    streamed.setdefault((part.prefix, data_path), []).append(np.column_stack((frames, values)))
+        expected = self.get_processor(False).build()
+        for obj in expected.objects:
+            for data_path, channel in list(obj.channels.items()) + list(obj.data_channels.items()):
+                frames, values = channel.get_added_keys()
+                keys = np.concatenate(streamed[obj.prefix, data_path])
+                assert keys.tolist() == np.column_stack((frames, values)).tolist()
+        writer.finish_keys.assert_called_once_with(animation)
+        writer.write_steps.assert_not_called()
+        assert 'wait' in processor.instrumentation.seconds
+
+    def test_bulk_writes_built_animation(self):
+        processor, writer = self.get_threaded(True)
+        assert not processor.can_stream_keys()
+        animation = processor.process()
+        writer.write_keys.assert_not_called()
+        writer.write_steps.assert_called_once_with(animation)
+        assert [obj.prefix for obj in animation.objects] == [obj.prefix for obj in
+                                                               self.get_processor(True).build().objects]
+
+    def test_thread_error_is_raised(self):
+        processor, writer = self.get_threaded(True)
+        processor.filepath += '.missing'
+        with pytest.raises(OSError):
+            processor.process()
+
+    def test_stop_releases_blocked_thread(self):
+        processor = self.get_processor(False)
+        pipeline = BuildPipeline(processor, 1)
+        pipeline.start()
+        items = pipeline.items()
+        assert next(items)[0] == 'keys'
+        pipeline.stop()
+        assert not pipeline.thread.is_alive()
+
+    def test_slow_build_keeps_step_budget(self):
+        processor, writer = self.get_threaded(True)
+
+        def slow_build_steps():
+            for index in range(3):
+                sleep(0.3)
+                yield 'parse', (index + 1) / 3
+            return 'animation'
+
+        processor.build_steps = slow_build_steps
+        engine = StepEngine(processor.pipeline_steps(), 0.02)
+        durations = []
+        while True:
+            start = perf_counter()
+            running = engine.step()
+            durations.append(perf_counter() - start)
+            if not running:
+                break
+        assert engine.result == 'animation'
+        assert len(durations) > 10
+        assert max(durations) < 0.2
+        writer.write_steps.assert_called_once_with('animation')
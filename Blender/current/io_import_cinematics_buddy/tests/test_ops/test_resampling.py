@@ -0,0 +1,45 @@
+import numpy as np
+from io_import_cinematics_buddy.ops.resampling import get_output_frames, resample_linear, resample_slerp
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestResampling(BaseTest):
+
+    @staticmethod
+    def get_rotations(angles: np.ndarray) -> np.ndarray:
+        """Rotations about z by angles, as w, x, y, z quaternions."""
+        zeros = np.zeros(len(angles))
+        return np.column_stack((np.cos(angles / 2), zeros, zeros, np.sin(angles / 2)))
+
+    def test_output_frames(self):
+        assert get_output_frames(np.array([0.4, 1.0, 3.2])).tolist() == [1.0, 2.0, 3.0]
+        assert get_output_frames(np.array([2.0, 5.0])).tolist() == [2.0, 3.0, 4.0, 5.0]
+        assert not len(get_output_frames(np.empty(0)))
+
+    def test_linear(self):
+        frames = np.array([0.0, 0.4, 1.6, 2.0])
+        values = np.column_stack((frames * 2.0, frames * -1.0))
+        out_frames = get_output_frames(frames)
+        assert np.allclose(resample_linear(frames, values, out_frames), [[0.0, 0.0], [2.0, -1.0], [4.0, -2.0]])
+
+    def test_slerp_constant_angular_velocity(self):
+        frames = np.array([0.0, 0.7, 2.1, 3.0])
+        quats = self.get_rotations(frames * 0.5)
+        result = resample_slerp(frames, quats, np.arange(4.0))
+        assert np.allclose(result, self.get_rotations(np.arange(4.0) * 0.5))
+
+    def test_slerp_short_way_and_continuity(self):
+        frames = np.arange(6.0) * 1.5
+        quats = self.get_rotations(frames * 0.4)
+        # flip every other key into the opposite hemisphere
+        quats[1::2] *= -1.0
+        result = resample_slerp(frames, quats, get_output_frames(frames))
+        expected = self.get_rotations(get_output_frames(frames) * 0.4)
+        assert np.allclose(np.abs(np.einsum('ij,ij->i', result, expected)), 1.0)
+        assert (np.einsum('ij,ij->i', result[:-1], result[1:]) > 0).all()
+        assert np.allclose(np.linalg.norm(result, axis=1), 1.0)
+
+    def test_slerp_identical_rotations(self):
+        frames = np.array([0.0, 2.0])
+        quats = self.get_rotations(np.array([0.3, 0.3]))
+        assert np.allclose(resample_slerp(frames, quats, np.arange(3.0)), self.get_rotations(np.full(3, 0.3)))
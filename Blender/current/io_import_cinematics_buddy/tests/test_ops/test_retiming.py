@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+import numpy as np
+from io_import_cinematics_buddy.ops.cinematics_buddy_retime import Retimer
+from io_import_cinematics_buddy.ops.keyframers import TimeRemapWriter
+from io_import_cinematics_buddy.ops.processors import SegmentsProcessor
+from io_import_cinematics_buddy.ops.retiming import TimeMap
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestTimeMap(BaseTest):
+
+    def get_processor(self, time_remap: bool, vid_speed: float = 0.5) -> SegmentsProcessor:
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = SegmentsProcessor(self.get_resources_dir() + 'testall.txt', proxies, 0.01, True, 0, 999999999,
+                                      60.0, None, vid_speed, 35.0, False, False, 1)
+        processor.set_snapshot_file(self.get_resources_dir() + 'unordered.json')
+        processor.set_time_remap(time_remap)
+        return processor
+
+    def test_remapped_keys_match_baked_keys(self):
+        baked = self.get_processor(False).build()
+        remapped = self.get_processor(True).build()
+        assert baked.time_map is None
+        assert remapped.frame_end == baked.frame_end
+        for obj in baked.objects:
+            for data_path, channel in obj.channels.items():
+                frames, values = channel.get_added_keys()
+                remapped_frames, remapped_values = remapped.get_object(obj.prefix).channels[data_path].get_added_keys()
+                # keys are rounded to 6 decimals, which the slope of the time map scales up
+                assert np.allclose(remapped.time_map.get_scene_frames(remapped_frames), frames, rtol=0, atol=1e-4)
+                assert np.array_equal(remapped_values, values)
+
+    def test_keys_on_replay_time(self):
+        processor = self.get_processor(True)
+        animation = processor.build()
+        frames, values = animation.get_object('CAM').channels['location'].get_added_keys()
+        # one action frame per replay frame, starting at the first snapshot
+        assert frames[0] == 1.0
+        assert np.all(np.diff(frames) > 0)
+        assert animation.time_map.origin == processor.snapshots[0]['frame']
+        assert animation.time_map.action_frames[0] == 1.0
+        assert animation.time_map.scene_frames[0] == 1.0
+
+    def test_resample_remapped_keys(self):
+        processor = self.get_processor(True)
+        processor.set_resample(True)
+        animation = processor.build()
+        for obj in animation.objects:
+            frames, values = obj.channels['location'].get_keys()
+            scene_frames = animation.time_map.get_scene_frames(frames)
+            # one key per whole scene frame, except those showing the same replay frame
+            assert np.allclose(scene_frames, np.round(scene_frames), rtol=0, atol=1e-4)
+            assert np.all(np.diff(frames) > 0)
+            assert len(frames) > 0.9 * (scene_frames[-1] - scene_frames[0])
+
+    def test_retime_to_other_speed(self):
+        remapped = self.get_processor(True, 1.0).build()
+        baked = self.get_processor(False, 0.5).build()
+        properties = {
+            'cb_replay_origin': remapped.time_map.origin,
+            'cb_blender_start_frame': remapped.time_map.blender_start_frame,
+            'cb_action_frame_end': remapped.action_frame_end,
+        }
+        context = MagicMock(name='context')
+        scn = context.scene
+        scn.__contains__.side_effect = properties.__contains__
+        scn.__getitem__.side_effect = properties.__getitem__
+        scn.objects = []
+
+        Retimer.retime_cinematics_data(context, self.get_resources_dir() + 'unordered.json', 0.5, 60.0)
+        assert scn.frame_end == baked.frame_end
+        assert scn.render.fps == 60
+
+
+class TestTimeRemapWriter(BaseTest):
+
+    @staticmethod
+    def get_time_map() -> TimeMap:
+        return TimeMap(np.array([1.0, 11.0, 31.0]), np.array([1.0, 41.0, 61.5]), 100, 1)
+
+    def test_write_moves_action_to_strip(self):
+        target = MagicMock(name='target')
+        target.animation_data.action.frame_range = (1.0, 31.0)
+        strip = target.animation_data.nla_tracks.new.return_value.strips.new.return_value
+        strip.frame_start = 1
+        fcurve = strip.fcurves.find.return_value
+        fcurve.keyframe_points.__len__.return_value = 0
+
+        TimeRemapWriter(self.get_time_map()).write(target)
+        assert target.animation_data.action is None
+        assert strip.use_animated_time
+        fcurve.keyframe_points.add.assert_called_once_with(3)
+        calls = {args[0]: args[1] for args, kwargs in fcurve.keyframe_points.foreach_set.call_args_list}
+        assert np.asarray(calls['co']).tolist() == [1.0, 1.0, 41.0, 11.0, 61.5, 31.0]
+        assert strip.frame_end == 62
+
+    def test_retime_only_touches_imported_strips(self):
+        strips = [MagicMock(name='strip{}'.format(x)) for x in range(2)]
+        strips[0].name = TimeRemapWriter.strip_name
+        strips[1].name = 'Other'
+        for strip in strips:
+            strip.frame_start = 1
+            strip.fcurves.find.return_value.keyframe_points.__len__.return_value = 0
+        target = MagicMock(name='target')
+        target.animation_data.nla_tracks = [MagicMock(strips=strips)]
+
+        assert TimeRemapWriter(self.get_time_map()).retime([target, MagicMock(animation_data=None)]) == 1
+        strips[0].fcurves.find.return_value.update.assert_called_once()
+        strips[1].fcurves.find.assert_not_called()
@@ -0,0 +1,43 @@
+from io import BytesIO
+from io_import_cinematics_buddy.ops.processors import LinesProcessor, consts
+from io_import_cinematics_buddy.ops.seeking import FrameSeeker
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+class TestFrameSeeker(BaseTest):
+
+    def get_export(self, filename: str) -> tuple:
+        with open(self.get_resources_dir() + filename, 'rb') as fp:
+            content = fp.read()
+        lines = content.splitlines(keepends=True)
+        data_start = sum(len(line) for line in lines[:consts['DATA_LINE_START'] - 1])
+        return content, lines[consts['DATA_LINE_START'] - 1:], data_start
+
+    def test_matches_linear_scan(self):
+        content, lines, data_start = self.get_export('testall.txt')
+        seeker = FrameSeeker(BytesIO(content), consts['REPLAY_FRAME'], data_start, len(content))
+        replay_frames = [int(line.split()[consts['REPLAY_FRAME']]) for line in lines if not line.startswith(b'END')]
+        for replay_frame in [0, replay_frames[0], replay_frames[1] + 1, replay_frames[500], replay_frames[-1],
+                             replay_frames[-1] + 1]:
+            index = next((x for x, frame in enumerate(replay_frames) if frame >= replay_frame), len(replay_frames))
+            assert seeker.find(replay_frame) == data_start + sum(len(line) for line in lines[:index])
+
+    def test_first_line_of_repeated_frame(self):
+        content, lines, data_start = self.get_export('testsmall.txt')
+        seeker = FrameSeeker(BytesIO(content), consts['REPLAY_FRAME'], data_start, len(content))
+        offset = seeker.find(1276)
+        assert content[offset:].split(b'\t', 2)[:2] == [b'396', b'1276']
+
+    def test_range_import_skips_lines(self):
+        content, lines, data_start = self.get_export('testsmall.txt')
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = LinesProcessor(self.get_resources_dir() + 'testsmall.txt', proxies, 0.01, False, 1280, 1300,
+                                   60.0, None, 1.0, 35.0, False, False, 1)
+        processor.build()
+        counters = processor.instrumentation.counters
+        lines = [line for line in lines if not line.startswith(b'END')]
+        skipped = [line for line in lines if int(line.split()[consts['REPLAY_FRAME']]) < 1280]
+        assert counters['lines_keyed'] == 58
+        assert counters['bytes_skipped'] == sum(len(line) for line in skipped)
+        # the lines before replay frame 1280 are never read
+        assert counters['lines_read'] == len(lines) - len(skipped)
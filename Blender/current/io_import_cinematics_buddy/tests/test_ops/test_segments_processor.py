@@ -1,5 +1,9 @@
+import json
 import pytest
-from io_import_cinematics_buddy.ops.processors import SegmentsProcessor
+from io import StringIO
+from unittest.mock import MagicMock, patch
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser
+from io_import_cinematics_buddy.ops.processors import SegmentsProcessor, consts
 from io_import_cinematics_buddy.tests.base import BaseTest
 
 
@@ -52,3 +56,52 @@ class TestSegmentsProcessor(BaseTest):
         assert len(segments) == 6
         assert round(segments[5].duration, 6) == 0.016667
 
+    def test_group_blocks(self):
+        with open(self.get_resources_dir() + 'testsmall.txt') as fp:
+            lines = fp.readlines()[consts['DATA_LINE_START'] - 1:]
+        data = ColumnarParser(consts).parse(StringIO(''.join(lines)))
+        blocks = [data.take(slice(x, x + 4)) for x in range(0, 12, 4)]
+        grouped = list(SegmentsProcessor.group_blocks(iter(blocks)))
+        assert [block.replay_frame.tolist() for block in grouped] == [
+            [1275, 1275], [1276, 1276, 1276], [1277, 1277, 1277, 1278, 1278, 1278], [1279]]
+
+    def test_numeric_snapshot_order(self, tmp_path):
+        snapshot_file = tmp_path / 'numeric.json'
+        snapshot_file.write_text(json.dumps({
+            '1000': {'frame': 1000, 'timestamp': 2.0},
+            '999': {'frame': 999, 'timestamp': 1.0},
+            '10000': {'frame': 10000, 'timestamp': 3.0},
+        }))
+        segments_processor = self.get_segments_processor()
+        segments_processor.set_snapshot_file(str(snapshot_file))
+        assert [s['frame'] for s in segments_processor.snapshots] == [999, 1000, 10000]
+
+    def test_block_size_independent(self):
+        subframes = []
+        for block_size in [4096, 7]:
+            segments_processor = self.get_segments_processor()
+            segments_processor.filepath = self.get_resources_dir() + 'testall.txt'
+            segments_processor.replay_frame_start = 0
+            segments_processor.replay_frame_end = 999999999
+            segments_processor.scn = MagicMock(name='scn')
+            segments_processor.block_size = block_size
+            segments_processor.set_snapshot_file(self.get_resources_dir() + 'unordered.json')
+            with patch.object(SegmentsProcessor, 'process_objects') as mock_method:
+                segments_processor.process()
+            subframes.append([x for args, kwargs in mock_method.call_args_list for x in args[2].tolist()])
+        assert subframes[0] == subframes[1]
+
+    def test_repeated_process(self):
+        subframes = []
+        for x in range(2):
+            segments_processor = self.get_segments_processor()
+            segments_processor.filepath = self.get_resources_dir() + 'testsmall.txt'
+            segments_processor.replay_frame_start = 0
+            segments_processor.replay_frame_end = 999999999
+            segments_processor.scn = MagicMock(name='scn')
+            segments_processor.set_snapshot_file(self.get_resources_dir() + 'small.json')
+            with patch.object(SegmentsProcessor, 'process_objects') as mock_method:
+                segments_processor.process()
+            subframes.append([x for args, kwargs in mock_method.call_args_list for x in args[2].tolist()])
+        assert len(subframes[0]) == 147
+        assert subframes[0] == subframes[1]
@@ -0,0 +1,169 @@
+from unittest.mock import MagicMock, patch
+import pytest
+from io_import_cinematics_buddy.ops import cinematics_buddy_import, keyframers
+from io_import_cinematics_buddy.ops.cinematics_buddy_import import CinematicsBuddyImport, Importer
+from io_import_cinematics_buddy.ops.keyframers import ImportRollback
+from io_import_cinematics_buddy.ops.processors import LinesProcessor
+from io_import_cinematics_buddy.ops.stepping import StepEngine, run_steps
+from io_import_cinematics_buddy.tests.base import BaseTest
+from io_import_cinematics_buddy.tests.test_ops import test_batch
+
+
+class FakeClock:
+    """Advances by one second every time it is read."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+class FakeCollection(list):
+
+    def remove(self, block):
+        super().remove(block)
+
+
+class TestStepEngine(BaseTest):
+
+    @staticmethod
+    def count_to(count: int, closed: list):
+        try:
+            for x in range(count):
+                yield 'count', (x + 1) / count
+        except GeneratorExit:
+            closed.append(True)
+            raise
+        return 'counted'
+
+    def test_time_budget(self):
+        engine = StepEngine(self.count_to(10, []), 2.5, FakeClock())
+        # the deadline is 1 + 2.5, passed when the clock reads 4 after the third step
+        assert engine.step()
+        assert (engine.steps_run, engine.stage, engine.fraction) == (3, 'count', 0.3)
+        assert engine.run() == 'counted'
+        assert engine.done and engine.steps_run == 10
+        assert not engine.step()
+
+    def test_at_least_one_step_per_call(self):
+        engine = StepEngine(self.count_to(3, []), 0.0, FakeClock())
+        assert engine.step()
+        assert engine.steps_run == 1
+
+    def test_cancel_closes_steps(self):
+        closed = []
+        engine = StepEngine(self.count_to(10, closed), 0.0, FakeClock())
+        engine.step()
+        engine.cancel()
+        assert closed == [True]
+        assert engine.cancelled and not engine.step()
+        assert engine.result is None
+
+    def test_run_steps(self):
+        assert run_steps(self.count_to(3, [])) == 'counted'
+
+
+class TestImportSteps(BaseTest):
+
+    def get_processor(self) -> LinesProcessor:
+        proxies = {'CAR_PROXY_NAME': 'c', 'BALL_PROXY_NAME': 'b', 'STADIUM_PROXY_NAME': 's'}
+        processor = LinesProcessor(self.get_resources_dir() + 'testsmall.txt', proxies, 0.01, True, 0, 999999999,
+                                   60.0, MagicMock(name='scn'), 1.0, 35.0, False, False, 1)
+        processor.block_size = 50
+        return processor
+
+    def test_build_steps_match_build(self):
+        steps = self.get_processor().build_steps()
+        progress = []
+        while True:
+            try:
+                progress.append(next(steps))
+            except StopIteration as stop:
+                animation = stop.value
+                break
+        assert len(progress) > 1
+        assert all(stage == 'parse' for stage, fraction in progress)
+        # testsmall.txt holds fewer lines than its header's frame count
+        fractions = [fraction for stage, fraction in progress]
+        assert fractions == sorted(fractions) and 0.0 < fractions[-1] < 1.0
+        expected = self.get_processor().build()
+        assert animation.frame_end == expected.frame_end
+        assert test_batch.TestBatch.get_keys(animation) == test_batch.TestBatch.get_keys(expected)
+
+    def test_process_steps_write_in_steps(self):
+        processor = self.get_processor()
+        processor.bulk_keyframes = True
+        progress = list(processor.process_steps())
+        stages = [stage for stage, fraction in progress]
+        assert stages == sorted(stages, key=['parse', 'write'].index)
+        writes = [fraction for stage, fraction in progress if stage == 'write']
+        # one step per F-curve group, the camera data channels included
+        assert len(writes) > len(processor.finish_objects())
+        assert writes[-1] == 1.0
+
+    @patch.object(keyframers.bpy, 'data', MagicMock(name='data'))
+    def test_rollback_removes_added_datablocks(self):
+        bpy = keyframers.bpy
+        existing = MagicMock(name='existing')
+        existing.as_pointer.return_value = 1
+        added = [MagicMock(name='added{}'.format(x)) for x in range(3)]
+        for pointer, block in enumerate(added, 2):
+            block.as_pointer.return_value = pointer
+        for name in ImportRollback.collections:
+            setattr(bpy.data, name, FakeCollection([existing]))
+        scn = MagicMock(name='scn')
+        camera = scn.camera
+
+        rollback = ImportRollback(scn)
+        bpy.data.objects.extend(added[:2])
+        bpy.data.actions.append(added[2])
+        scn.camera = added[0]
+        assert rollback.rollback() == 3
+        assert all(list(getattr(bpy.data, name)) == [existing] for name in ImportRollback.collections)
+        assert scn.camera is camera
+
+    @pytest.mark.parametrize('batch', [False, True])
+    def test_cancel_rolls_back(self, batch):
+        resources = self.get_resources_dir()
+        args = [None, resources + 'testsmall.txt', 0, 999999999, 60.0, False, 'c', 'b', 's', '', 1.0, 35.0, False,
+                False, 1, True, 0, False, 0.0, 0.0, '', None, False, 0.0]
+        if batch:
+            args += [[(resources + 'testsmall.txt', ''), (resources + 'testsmall.txt', '')], 1]
+        with patch.object(cinematics_buddy_import, 'ImportRollback') as rollback_class:
+            engine = StepEngine(Importer.import_cinematics_steps(*args), 0.0)
+            assert engine.step()
+            engine.cancel()
+        rollback_class.assert_called_once_with(cinematics_buddy_import.bpy.context.scene)
+        rollback_class.return_value.rollback.assert_called_once_with()
+
+    def test_finished_import_is_kept(self):
+        resources = self.get_resources_dir()
+        args = [None, resources + 'testsmall.txt', 0, 999999999, 60.0, False, 'c', 'b', 's', '', 1.0, 35.0, False,
+                False, 1, True, 0, False, 0.0, 0.0, '']
+        with patch.object(cinematics_buddy_import, 'ImportRollback') as rollback_class:
+            assert Importer.import_cinematics_data(*args) == {'FINISHED'}
+        rollback_class.return_value.rollback.assert_not_called()
+
+    def test_failed_step_rolls_back(self):
+        def failing_steps(*args):
+            yield 'parse', 0.5
+            raise Exception('malformed line')
+
+        args = [None, self.get_resources_dir() + 'testsmall.txt', 0, 999999999, 60.0, False, 'c', 'b', 's', '', 1.0,
+                35.0, False, False, 1, True, 0, False, 0.0, 0.0, '']
+        operator = CinematicsBuddyImport()
+        operator.report = MagicMock(name='report')
+        context = MagicMock(name='context')
+        operator.timer = context.window_manager.event_timer_add.return_value
+        event = MagicMock(name='event', type='TIMER', timer=operator.timer)
+        with patch.object(cinematics_buddy_import, 'ImportRollback') as rollback_class, \
+                patch.object(Importer, 'import_file_steps', failing_steps):
+            operator.engine = StepEngine(Importer.import_cinematics_steps(*args), 0.0)
+            assert operator.modal(context, event) == {'RUNNING_MODAL'}
+            assert operator.modal(context, event) == {'CANCELLED'}
+        rollback_class.return_value.rollback.assert_called_once_with()
+        assert operator.engine.cancelled
+        operator.report.assert_called_once_with({'ERROR'}, 'Cinematics Buddy import failed: malformed line')
+        context.window_manager.event_timer_remove.assert_called_once_with(operator.timer)
@@ -0,0 +1,101 @@
+from io import StringIO
+import numpy as np
+from io_import_cinematics_buddy.ops.parsers import ColumnarParser, ExportData
+from io_import_cinematics_buddy.ops.processors import consts
+from io_import_cinematics_buddy.ops.retiming import TimeMap
+from io_import_cinematics_buddy.ops.tracks import CameraTrack, CarTrack, ObjectTrack
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+def get_data() -> ExportData:
+    with open(BaseTest.get_resources_dir() + 'testsmall.txt') as fp:
+        lines = fp.readlines()[consts['DATA_LINE_START'] - 1:]
+    return ColumnarParser(consts).parse(StringIO(''.join(lines)))
+
+
+def add_subframes(track: ObjectTrack, count: int):
+    """Add count lines of testsmall.txt half a frame apart, in batches of 10."""
+    data = get_data()
+    for x in range(0, count, 10):
+        track.add_subframes(np.arange(x, x + 10) * 0.5, data.take(slice(x, x + 10)))
+
+
+class TestTracks(BaseTest):
+    subframes = 50
+
+    def get_track(self) -> CarTrack:
+        return CarTrack('CAR1', {'frames': self.subframes}, consts, 1.0)
+
+    def test_keys(self):
+        track = self.get_track()
+        add_subframes(track, self.subframes)
+        animation = track.finish()
+
+        frames, locations = animation.channels['location'].get_keys()
+        assert frames.tolist() == [1.0 + x * 0.5 for x in range(self.subframes)]
+        expected = get_data().locations['CAR1'][:self.subframes] * (1.0, -1.0, 1.0)
+        assert np.allclose(locations, expected)
+        assert animation.channels['rotation_quaternion'].width == 4
+        assert animation.highest_subframe == 1.0 + (self.subframes - 1) * 0.5
+        assert animation.kind == 'car'
+
+    def test_decimation(self):
+        track = self.get_track()
+        track.set_decimation(1000.0, 10.0)
+        add_subframes(track, self.subframes)
+        animation = track.finish()
+
+        assert animation.decimation_report['location'][:2] == (2, self.subframes)
+        assert animation.decimation_report['rotation_quaternion'][:2] == (2, self.subframes)
+        assert len(animation.channels['location']) == 2
+
+    def test_resample(self):
+        track = self.get_track()
+        track.set_resample(True)
+        add_subframes(track, self.subframes)
+        animation = track.finish()
+
+        # 50 keys half a frame apart from frame 1 cover whole frames 1 to 25
+        for channel in animation.channels.values():
+            frames, values = channel.get_keys()
+            assert frames.tolist() == [float(x) for x in range(1, 26)]
+
+    def test_resample_on_scene_frames(self):
+        track = CameraTrack('CAM', {'frames': self.subframes, 'camera': 'cam1'}, consts, 1.0, True, 36.0, False)
+        track.set_resample(True)
+        # keys on replay time, played at half speed
+        track.set_time_map(TimeMap(np.array([1.0, 25.5]), np.array([1.0, 50.0])))
+        add_subframes(track, self.subframes)
+        animation = track.finish()
+
+        # a key for each whole scene frame 1 to 50, on the action frame played there
+        channels = dict(animation.channels, **animation.data_channels)
+        for data_path in ['location', 'rotation_quaternion', 'lens', 'cb_frame']:
+            frames, values = channels[data_path].get_keys()
+            assert frames.tolist() == [1.0 + x * 0.5 for x in range(50)]
+            assert np.allclose(track.time_map.get_scene_frames(frames), np.arange(1.0, 51.0))
+
+    def test_lossless(self):
+        track = CameraTrack('CAM', {'frames': 20, 'camera': 'cam1'}, consts, 1.0, True, 36.0, False)
+        track.set_lossless(True)
+        add_subframes(track, 20)
+        animation = track.finish()
+
+        # the field of view stays at 90 and frame numbers go up one per half frame
+        assert len(animation.data_channels['lens']) == 2
+        assert len(animation.data_channels['cb_frame']) == 2
+        assert track.keys_dropped == 36 + 20 - len(animation.channels['location'])
+
+    def test_camera_channels(self):
+        track = CameraTrack('CAM', {'frames': 20, 'camera': 'cam1'}, consts, 1.0, True, 36.0, False)
+        add_subframes(track, 20)
+        animation = track.finish()
+
+        assert animation.name == 'cam1'
+        assert sorted(animation.data_channels) == ['cb_frame', 'lens', 'sensor_width']
+        assert len(animation.data_channels['sensor_width']) == 1
+        frames, lenses = animation.data_channels['lens'].get_keys()
+        # 90 degree FOV on a 36mm sensor
+        assert np.allclose(lenses[:, 0], 18.0)
+        frames, cb_frames = animation.data_channels['cb_frame'].get_keys()
+        assert cb_frames[:3, 0].tolist() == [394.0, 395.0, 396.0]
@@ -0,0 +1,76 @@
+from math import cos, floor, radians
+import numpy as np
+from io_import_cinematics_buddy.ops.processors import consts
+from io_import_cinematics_buddy.ops.transforms import HemisphereContinuity, remap_camera_quaternions, \
+    remap_car_quaternions, remap_locations
+from io_import_cinematics_buddy.tests.base import BaseTest
+
+
+def multiply(a: tuple, b: tuple) -> tuple:
+    return (
+        a[0] * b[0] - a[1] * b[1] - a[2] * b[2] - a[3] * b[3],
+        a[0] * b[1] + a[1] * b[0] + a[2] * b[3] - a[3] * b[2],
+        a[0] * b[2] - a[1] * b[3] + a[2] * b[0] + a[3] * b[1],
+        a[0] * b[3] + a[1] * b[2] - a[2] * b[1] + a[3] * b[0],
+    )
+
+
+def reference_continuity(subframes: list, quats: list) -> list:
+    """Per-frame polarity rule as applied by keyframe_insert based imports."""
+    result = []
+    prev_quat = None
+    prev_subframe = 0.0
+    for subframe, quat in zip(subframes, quats):
+        if prev_quat is not None:
+            real_frame = floor(subframe)
+            prev_real_frame = floor(prev_subframe)
+            if real_frame != prev_real_frame:
+                if round(real_frame - subframe, 6) or round(prev_real_frame - prev_subframe, 6):
+                    if sum(p * q for p, q in zip(prev_quat, quat)) < 0:
+                        quat = tuple(-q for q in quat)
+        result.append(quat)
+        prev_quat = quat
+        prev_subframe = subframe
+    return result
+
+
+class TestTransforms(BaseTest):
+
+    @staticmethod
+    def get_quats(count: int) -> np.ndarray:
+        quats = np.random.RandomState(7).normal(size=(count, 4))
+        return quats / np.linalg.norm(quats, axis=1)[:, None]
+
+    def test_locations(self):
+        locations = np.array([[100.0, 200.0, 300.0]])
+        assert remap_locations(locations, 0.01, consts).tolist() == [[1.0, -2.0, 3.0]]
+
+    def test_car_quaternions(self):
+        x, y, z, w = 0.1, 0.2, 0.3, 0.9
+        assert remap_car_quaternions(np.array([[x, y, z, w]]), consts).tolist() == [[w, -x, y, -z]]
+
+    def test_camera_quaternions(self):
+        ninety = cos(radians(90) / 2)
+        quats = self.get_quats(20)
+        expected = []
+        for x, y, z, w in quats.tolist():
+            quat = multiply((ninety, 0.0, 0.0, -ninety), (w, -y, -x, -z))
+            expected.append(multiply(quat, (ninety, ninety, 0.0, 0.0)))
+        assert np.allclose(remap_camera_quaternions(quats, consts), expected)
+
+    def test_continuity_matches_per_frame_rule(self):
+        quats = self.get_quats(200)
+        # mix of keys on real frames, several keys per real frame and keys straddling frames
+        subframes = np.round(np.cumsum(np.tile([0.5, 0.5, 1.0, 0.3, 0.25, 2.0, 0.45], 30)[:200]), 6)
+        expected = reference_continuity(subframes.tolist(), [tuple(q) for q in quats.tolist()])
+        result = HemisphereContinuity().apply(subframes, quats)
+        assert np.allclose(result, expected)
+        assert (np.sign(result[:, 0]) != np.sign(quats[:, 0])).any()
+
+    def test_continuity_across_batches(self):
+        quats = self.get_quats(100)
+        subframes = np.round(np.arange(100) * 0.4, 6)
+        whole = HemisphereContinuity().apply(subframes, quats)
+        continuity = HemisphereContinuity()
+        parts = [continuity.apply(subframes[x:x + 7], quats[x:x + 7]) for x in range(0, 100, 7)]
+        assert np.array_equal(np.vstack(parts), whole)